@@ -22,11 +22,17 @@ mkdir -p "$BACKUP_DIR"
 backup_database() {
     echo "[$(date +'%Y-%m-%d %H:%M:%S')] Starting database backup..."
     
-    BACKUP_FILE="${BACKUP_DIR}/tickets-$(date +'%Y%m%d_%H%M%S').db"
+    # Take a consistent, integrity-checked snapshot inside the container with
+    # SQLite's online backup API (copying the live file can capture a torn write)
+    SNAPSHOT=$(docker exec "${CONTAINER_NAME}" flask --app src.app snapshot --force) || {
+        echo "Error: Could not snapshot database"
+        return 1
+    }
+    SNAPSHOT_PATH=$(echo "$SNAPSHOT" | sed -n 's/.*"path": *"\([^"]*\)".*/\1/p')
+    BACKUP_FILE="${BACKUP_DIR}/$(basename "$SNAPSHOT_PATH")"
     
-    # Copy database from running container
-    docker cp "${CONTAINER_NAME}:${DATA_PATH}/tickets.db" "$BACKUP_FILE" 2>/dev/null || {
-        echo "Error: Could not backup database"
+    docker cp "${CONTAINER_NAME}:${SNAPSHOT_PATH}" "$BACKUP_FILE" || {
+        echo "Error: Could not copy snapshot from container"
         return 1
     }
     
@@ -70,11 +76,20 @@ restore_database() {
     
     echo "[$(date +'%Y-%m-%d %H:%M:%S')] Restoring database from: $backup_file"
     
+    # Snapshots are gzip-compressed by default
+    local restore_file="$backup_file"
+    if [[ "$backup_file" == *.gz ]]; then
+        restore_file="$(mktemp)"
+        gunzip -c "$backup_file" > "$restore_file"
+    fi
+    
     # Stop the container
     docker stop "$CONTAINER_NAME" 2>/dev/null || true
     
-    # Copy backup to container
-    docker cp "$backup_file" "${CONTAINER_NAME}:${DATA_PATH}/tickets.db"
+    # Copy backup to container; stale WAL files would be replayed over it
+    docker cp "$restore_file" "${CONTAINER_NAME}:${DATA_PATH}/tickets.db"
+    docker run --rm --volumes-from "$CONTAINER_NAME" alpine \
+        rm -f "${DATA_PATH}/tickets.db-wal" "${DATA_PATH}/tickets.db-shm"
     
     # Start the container
     docker start "$CONTAINER_NAME"
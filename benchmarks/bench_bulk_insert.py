@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk ticket ingestion vs. looping the single-create endpoint
+Student ID: 25RP19452-NIYONKURU
+
+Usage: python benchmarks/bench_bulk_insert.py [--tickets 5000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import app as app_module
+
+
+def ticket(i):
+    return {
+        'title': f'Alert {i}',
+        'description': 'Imported from the monitoring gateway',
+        'category': 'network',
+        'priority': 'high',
+        'submitter_email': 'alerts@uni.edu',
+        'submitter_name': 'Monitoring'
+    }
+
+
+def check(response, created):
+    """Abort unless the request created every ticket, so failures never pass as throughput"""
+    body = response.get_json(silent=True) or {}
+    if response.status_code != 201 or body.get('created', 1) != created:
+        sys.exit(f'{response.request.path}: expected 201 creating {created} tickets, '
+                 f'got {response.status_code}: {response.get_data(as_text=True)[:200]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    app_module.DATABASE = os.path.join(workdir, 'tickets.db')
+    app_module.init_db()
+    app_module.logger.setLevel('WARNING')
+    client = app_module.app.test_client()
+    records = [ticket(i) for i in range(args.tickets)]
+
+    start = time.perf_counter()
+    for record in records:
+        check(client.post('/api/v1/tickets', json=record), 1)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post('/api/v1/tickets/bulk', json=records)
+    bulk_array = time.perf_counter() - start
+    check(response, args.tickets)
+
+    body = '\n'.join(json.dumps(r) for r in records)
+    start = time.perf_counter()
+    response = client.post('/api/v1/tickets/bulk', data=body, content_type='application/x-ndjson')
+    bulk_ndjson = time.perf_counter() - start
+    check(response, args.tickets)
+
+    print(json.dumps({
+        'tickets': args.tickets,
+        'single_create_tps': args.tickets / single,
+        'bulk_json_tps': args.tickets / bulk_array,
+        'bulk_ndjson_tps': args.tickets / bulk_ndjson,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
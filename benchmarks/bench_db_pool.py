@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pooled WAL connections vs. connect-per-request
+Student ID: 25RP19452-NIYONKURU
+
+Drives a concurrent read+write mix against the Flask app and reports
+requests/sec with DB_POOLING enabled and disabled.
+
+Usage: python benchmarks/bench_db_pool.py [--threads 8] [--seconds 5] [--seed 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import app as app_module
+
+CATEGORIES = ['network', 'login', 'lab_computers', 'software', 'hardware', 'other']
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+
+def seed(count):
+    """Insert `count` tickets directly into the database"""
+    conn = app_module.connect_db()
+    conn.executemany('''INSERT INTO tickets
+                        (title, description, category, priority, submitter_email, submitter_name)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                     [(f'Seed {i}', 'Seeded ticket', random.choice(CATEGORIES),
+                       random.choice(PRIORITIES), 'seed@uni.edu', 'Seeder')
+                      for i in range(count)])
+    conn.commit()
+    conn.close()
+
+
+def run(pooling, threads, seconds, write_ratio):
+    """Run the mixed workload and return requests/sec"""
+    app_module.app.config['DB_POOLING'] = pooling
+    stop = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def worker(index):
+        client = app_module.app.test_client()
+        rng = random.Random(index)
+        while time.perf_counter() < stop:
+            if rng.random() < write_ratio:
+                client.post('/api/v1/tickets', json={
+                    'title': 'Bench', 'description': 'Benchmark ticket',
+                    'category': rng.choice(CATEGORIES), 'priority': rng.choice(PRIORITIES),
+                    'submitter_email': 'bench@uni.edu', 'submitter_name': 'Bench'})
+            else:
+                ticket_id = rng.randint(1, 100)
+                client.get(f'/api/v1/tickets/{ticket_id}')
+            counts[index] += 1
+        app_module.close_pooled_connections()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=2000)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    app_module.DATABASE = os.path.join(workdir, 'tickets.db')
+    app_module.init_db()
+    seed(args.seed)
+    logging_level = app_module.logger.level
+    app_module.logger.setLevel('WARNING')
+
+    results = {
+        'connect_per_request_rps': run(False, args.threads, args.seconds, args.write_ratio),
+        'pooled_rps': run(True, args.threads, args.seconds, args.write_ratio),
+    }
+    results['speedup'] = results['pooled_rps'] / max(results['connect_per_request_rps'], 1e-9)
+    app_module.logger.setLevel(logging_level)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: landing page requests/sec, rendered per hit vs. precomputed
+Student ID: 25RP19452-NIYONKURU
+
+"render_per_request" reproduces the old index(), which called
+render_template_string(HTML_TEMPLATE) on every hit; the other rows fetch `/`
+with each Accept-Encoding the precomputed frontend serves.
+
+Usage: python benchmarks/bench_frontend.py [--requests 5000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import app as app_module
+
+
+def measure(client, path, headers, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - start
+    return {'requests_per_sec': count / elapsed, 'bytes': len(response.data)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = app_module.app
+    app.add_url_rule('/_bench/render', 'bench_render',
+                     lambda: app_module.render_template_string(app_module.HTML_TEMPLATE))
+    app_module.logger.setLevel('WARNING')
+    app_module.prepare_frontend()
+    client = app.test_client()
+
+    results = {'render_per_request': measure(client, '/_bench/render', {}, args.requests)}
+    for encoding in ('identity', 'gzip', 'br'):
+        if encoding == 'br' and app_module.brotli is None:
+            continue
+        results[f'precomputed_{encoding}'] = measure(client, '/', {'Accept-Encoding': encoding},
+                                                     args.requests)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON serialization time and bytes on the wire for ticket lists
+Student ID: 25RP19452-NIYONKURU
+
+Serializes 1k and 10k ticket payloads shaped like GET /api/v1/tickets with the
+stdlib and orjson providers, then reports the size and encode time of the
+identity, gzip and deflate bodies compress_response() would send.
+
+Usage: python benchmarks/bench_json.py [--sizes 1000 10000] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import app as app_module
+from flask.json.provider import DefaultJSONProvider
+
+
+WORDS = ('printer', 'wifi', 'password', 'laptop', 'projector', 'login', 'email', 'vpn',
+         'slow', 'error', 'cannot', 'connect', 'after', 'update', 'lab', 'room', 'screen', 'reset')
+
+
+def payload(count):
+    rng = random.Random(0)
+    tickets = [{
+        'id': i, 'title': f'Ticket {i}',
+        'description': ' '.join(rng.choice(WORDS) for _ in range(80)),
+        'category': 'network', 'priority': 'medium', 'status': 'open',
+        'submitter_email': 'student@uni.edu', 'submitter_name': 'Student',
+        'assigned_to': None, 'resolution_notes': None,
+        'created_at': '2024-01-01T00:00:00', 'updated_at': '2024-01-01T00:00:00',
+    } for i in range(count)]
+    return {'tickets': tickets, 'count': count, 'next_cursor': None}
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = app_module.app
+    level = app.config['COMPRESS_LEVEL']
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if app_module.orjson is not None:
+        providers['orjson'] = app_module.OrjsonProvider(app)
+
+    results = {}
+    with app.app_context():
+        for size in args.sizes:
+            data = payload(size)
+            row = {}
+            for name, provider in providers.items():
+                provider.sort_keys = app.config['JSON_SORT_KEYS']
+                ms, response = best_of(args.repeat, lambda: provider.response(data))
+                row[f'{name}_serialize_ms'] = ms
+            body = response.get_data()
+            row['identity_bytes'] = len(body)
+            ms, encoded = best_of(args.repeat, lambda: gzip.compress(body, compresslevel=level, mtime=0))
+            row.update(gzip_bytes=len(encoded), gzip_ms=ms)
+            ms, encoded = best_of(args.repeat, lambda: zlib.compress(body, level))
+            row.update(deflate_bytes=len(encoded), deflate_ms=ms)
+            results[str(size)] = row
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
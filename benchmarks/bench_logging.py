@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request latency with logging off, synchronous, queued and sampled
+Student ID: 25RP19452-NIYONKURU
+
+Usage: python benchmarks/bench_logging.py [--requests 5000]
+"""
+
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import app as app_module
+
+
+def make_handlers(workdir):
+    """File + stream handlers equivalent to the production pair, without flooding the terminal"""
+    handlers = [
+        logging.FileHandler(os.path.join(workdir, 'bench.log')),
+        logging.StreamHandler(open(os.devnull, 'w'))
+    ]
+    for handler in handlers:
+        handler.setFormatter(app_module.JsonFormatter())
+    return handlers
+
+
+def measure(client, ticket_id, count):
+    """Return per-request latencies in microseconds"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get(f'/api/v1/tickets/{ticket_id}')
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    return {
+        'mean_us': statistics.fmean(latencies),
+        'p50_us': latencies[len(latencies) // 2],
+        'p99_us': latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    app_module.DATABASE = os.path.join(workdir, 'tickets.db')
+    app_module.init_db()
+    client = app_module.app.test_client()
+    ticket_id = client.post('/api/v1/tickets', json={
+        'title': 'Bench', 'description': 'Logging benchmark', 'category': 'other',
+        'priority': 'low', 'submitter_email': 'b@uni.edu', 'submitter_name': 'B'}).get_json()['ticket_id']
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    original_handlers = root.handlers[:]
+    original_rates = app_module.app.config['LOG_SAMPLE_RATES']
+    results = {}
+    try:
+        logging.disable(logging.CRITICAL)
+        results['off'] = summarize(measure(client, ticket_id, args.requests))
+        logging.disable(logging.NOTSET)
+
+        app_module.app.config['LOG_SAMPLE_RATES'] = {}
+        sync_handlers = make_handlers(workdir)
+        root.handlers = sync_handlers
+        results['sync'] = summarize(measure(client, ticket_id, args.requests))
+
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *make_handlers(workdir))
+        listener.start()
+        queue_handler = app_module.LazyQueueHandler(log_queue)
+        queue_handler.addFilter(app_module.SamplingFilter())
+        root.handlers = [queue_handler]
+        results['queued'] = summarize(measure(client, ticket_id, args.requests))
+        # Drain the backlog so the listener doesn't compete with the next phase
+        listener.stop()
+        listener.start()
+
+        app_module.app.config['LOG_SAMPLE_RATES'] = {'get_ticket': 0.1}
+        results['queued_sampled'] = summarize(measure(client, ticket_id, args.requests))
+        listener.stop()
+    finally:
+        root.handlers = original_handlers
+        app_module.app.config['LOG_SAMPLE_RATES'] = original_rates
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
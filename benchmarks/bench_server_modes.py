@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sync gunicorn workers vs. the ASGI serving mode under concurrency
+Student ID: 25RP19452-NIYONKURU
+
+Launches gunicorn with docker/gunicorn.conf.py once per SERVER_MODE and drives
+it with --clients concurrent keep-alive connections issuing a read-heavy mix
+with some ticket creates. Reports throughput and p50/p99 latency.
+
+Usage: python benchmarks/bench_server_modes.py [--clients 64] [--seconds 10]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+TICKET = json.dumps({
+    'title': 'Load test', 'description': 'Server mode comparison', 'category': 'network',
+    'priority': 'medium', 'submitter_email': 'load@uni.edu', 'submitter_name': 'Load'
+})
+
+
+def launch(mode, workdir, port):
+    """Start gunicorn in the given SERVER_MODE and wait until it answers"""
+    env = dict(os.environ, SERVER_MODE=mode, DATABASE_PATH=os.path.join(workdir, f'{mode}.db'),
+               PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, f'metrics-{mode}'),
+               LOG_SAMPLE_RATES='get_tickets=0,get_ticket=0,create_ticket=0')
+    proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) did not start')
+
+
+def drive(port, clients, seconds, write_ratio):
+    stop = time.time() + seconds
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+
+    def client(index):
+        rng = random.Random(index)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while time.time() < stop:
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    conn.request('POST', '/api/v1/tickets', TICKET, {'Content-Type': 'application/json'})
+                else:
+                    conn.request('GET', '/api/v1/tickets?limit=20')
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    merged = sorted(l for per_client in latencies for l in per_client)
+    return {
+        'requests_per_sec': len(merged) / seconds,
+        'p50_ms': merged[len(merged) // 2] * 1000 if merged else None,
+        'p99_ms': merged[int(len(merged) * 0.99)] * 1000 if merged else None,
+        'errors': sum(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    shutil.copytree(os.path.join(ROOT, 'src'), os.path.join(workdir, 'src'))
+    shutil.copy(os.path.join(ROOT, 'docker', 'gunicorn.conf.py'), workdir)
+
+    results = {}
+    for port, mode in enumerate(('sync', 'asgi'), start=5081):
+        proc = launch(mode, workdir, port)
+        try:
+            results[mode] = drive(port, args.clients, args.seconds, args.write_ratio)
+        finally:
+            proc.terminate()
+            proc.wait()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
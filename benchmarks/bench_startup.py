@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker startup and time-to-first-response
+Student ID: 25RP19452-NIYONKURU
+
+Each run boots a fresh interpreter, as a gunicorn worker would, and times the
+module import, create_app(), and the first and second requests. With
+--gunicorn it also launches gunicorn and times how long until the first
+ticket list request succeeds.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--gunicorn]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+WORKER_SCRIPT = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+import app as app_module
+imported = time.perf_counter()
+app_module.DATABASE = {db!r}
+app = app_module.create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get('/api/v1/tickets')
+first = time.perf_counter()
+client.get('/api/v1/tickets')
+second = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (first - created) * 1000,
+    'second_request_ms': (second - first) * 1000,
+}}))
+'''
+
+
+def worker_runs(runs, database):
+    script = WORKER_SCRIPT.format(src=os.path.join(ROOT, 'src'), db=database)
+    env = dict(os.environ, LOG_QUEUE='false')
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+
+def gunicorn_ready(workdir, database, port=5077):
+    """Launch gunicorn with the production config and time the first good response"""
+    shutil.copytree(os.path.join(ROOT, 'src'), os.path.join(workdir, 'src'))
+    shutil.copy(os.path.join(ROOT, 'docker', 'gunicorn.conf.py'), workdir)
+    env = dict(os.environ, DATABASE_PATH=database,
+               PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics'))
+    start = time.perf_counter()
+    proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                             'src.app:create_app()'],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < 30:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/v1/tickets', timeout=1) as r:
+                    if r.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError('gunicorn did not become ready within 30s')
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--gunicorn', action='store_true')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    database = os.path.join(workdir, 'tickets.db')
+    results = {'worker_median': worker_runs(args.runs, database)}
+    if args.gunicorn:
+        results['gunicorn_first_response_ms'] = gunicorn_ready(workdir, database)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
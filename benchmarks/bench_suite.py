@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: mixed read/write API workloads with latency percentiles
+Student ID: 25RP19452-NIYONKURU
+
+Seeds a database with --size tickets (1k/100k/1M; seeded files are cached
+under --seed-dir and copied per run), then drives a weighted mix of
+create_ticket, get_tickets, get_ticket, search_tickets, get_metrics and
+/metrics requests from --clients concurrent clients. The target is either
+the Flask test client in this process (--target client, runs offline) or a
+gunicorn started from docker/gunicorn.conf.py (--target gunicorn).
+
+Results (throughput and p50/p95/p99 per operation) are printed and written
+as JSON, tagged with the git commit, under benchmarks/results/. Pass
+--compare with an earlier result file to print the change per operation.
+
+Usage:
+    python benchmarks/bench_suite.py --size 100000 --workload mixed --seconds 10
+    python benchmarks/bench_suite.py --target gunicorn --clients 32 --compare old.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+import app as app_module
+
+WORDS = ('printer', 'wifi', 'password', 'laptop', 'projector', 'login', 'email', 'vpn', 'slow',
+         'error', 'cannot', 'connect', 'after', 'update', 'lab', 'room', 'screen', 'reset')
+
+# Operation weights per workload
+WORKLOADS = {
+    'read_heavy': {'get_tickets': 40, 'get_ticket': 40, 'search_tickets': 5, 'get_metrics': 5,
+                   'prometheus_metrics': 5, 'create_ticket': 5},
+    'mixed': {'get_tickets': 30, 'get_ticket': 25, 'search_tickets': 5, 'get_metrics': 10,
+              'prometheus_metrics': 5, 'create_ticket': 25},
+    'write_heavy': {'get_tickets': 10, 'get_ticket': 10, 'get_metrics': 5, 'create_ticket': 75},
+}
+
+
+def ticket(rng):
+    return {
+        'title': ' '.join(rng.choice(WORDS) for _ in range(4)),
+        'description': ' '.join(rng.choice(WORDS) for _ in range(40)),
+        'category': rng.choice(app_module.VALID_CATEGORIES),
+        'priority': rng.choice(app_module.VALID_PRIORITIES),
+        'submitter_email': f'user{rng.randrange(5000)}@uni.edu',
+        'submitter_name': 'Benchmark',
+    }
+
+
+def seed(path, size, batch=10000):
+    """Create a database of size tickets spread over the past year (deterministic)"""
+    app_module.DATABASE = path
+    app_module.init_db()
+    rng = random.Random(size)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+    for offset in range(0, size, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, size)):
+            t = ticket(rng)
+            created = (start + timedelta(seconds=i * 31536000 // max(size, 1))).isoformat(sep=' ')
+            rows.append(tuple(t[f] for f in app_module.REQUIRED_FIELDS) +
+                        (rng.choice(('open', 'open', 'in_progress', 'closed')), created, created))
+        conn.executemany('''INSERT INTO tickets (title, description, category, priority,
+                            submitter_email, submitter_name, status, created_at, updated_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+        conn.commit()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+
+
+def seeded_database(seed_dir, size, workdir):
+    """Copy of the cached seed database for this size, building it on first use"""
+    os.makedirs(seed_dir, exist_ok=True)
+    cached = os.path.join(seed_dir, f'tickets-{size}.db')
+    if not os.path.exists(cached):
+        print(f'Seeding {size} tickets into {cached}...', file=sys.stderr)
+        start = time.perf_counter()
+        seed(cached + '.tmp', size)
+        os.replace(cached + '.tmp', cached)
+        print(f'Seeded in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    path = os.path.join(workdir, 'tickets.db')
+    shutil.copy(cached, path)
+    return path
+
+
+class ClientTarget:
+    """Drive the app in-process through the Flask test client"""
+
+    def __init__(self, database, workdir):
+        app_module.DATABASE = database
+        app_module.create_app()
+        logging_off()
+
+    def connect(self):
+        client = app_module.app.test_client()
+
+        def send(method, path, body=None):
+            response = client.open(path, method=method, data=body,
+                                   content_type='application/json' if body else None)
+            response.get_data()
+            return response.status_code
+        return send
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    """Drive a gunicorn started with the production config on a local port"""
+
+    def __init__(self, database, workdir, port=5091):
+        self.port = port
+        shutil.copytree(os.path.join(ROOT, 'src'), os.path.join(workdir, 'src'))
+        shutil.copy(os.path.join(ROOT, 'docker', 'gunicorn.conf.py'), workdir)
+        env = dict(os.environ, DATABASE_PATH=database,
+                   PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics'),
+                   WRITE_QUEUE_ADDRESS=os.path.join(workdir, 'writer.sock'),
+                   LOG_SAMPLE_RATES='get_tickets=0,get_ticket=0,create_ticket=0,search_tickets=0')
+        self.proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                                      '--access-logfile', '/dev/null'],
+                                     cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                conn.request('GET', '/health')
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                time.sleep(0.1)
+        self.close()
+        raise RuntimeError('gunicorn did not start')
+
+    def connect(self):
+        state = {'conn': None}
+
+        def send(method, path, body=None):
+            if state['conn'] is None:
+                state['conn'] = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            try:
+                state['conn'].request(method, path, body, {'Content-Type': 'application/json'} if body else {})
+                response = state['conn'].getresponse()
+                response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    state['conn'].close()
+                    state['conn'] = None
+                return response.status
+            except (OSError, http.client.HTTPException):
+                state['conn'].close()
+                state['conn'] = None
+                return 0
+        return send
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+def logging_off():
+    app_module.logger.setLevel('WARNING')
+    app_module.stop_log_listener()
+
+
+def make_request(op, rng, max_id):
+    if op == 'create_ticket':
+        return 'POST', '/api/v1/tickets', json.dumps(ticket(rng))
+    if op == 'get_tickets':
+        status = rng.choice(('', '&status=open', '&status=closed'))
+        return 'GET', f'/api/v1/tickets?limit=50{status}', None
+    if op == 'get_ticket':
+        return 'GET', f'/api/v1/tickets/{rng.randint(1, max_id)}', None
+    if op == 'search_tickets':
+        return 'GET', f'/api/v1/tickets/search?q={rng.choice(WORDS)}+{rng.choice(WORDS)}', None
+    if op == 'get_metrics':
+        return 'GET', '/api/v1/metrics', None
+    return 'GET', '/metrics', None
+
+
+def drive(target, workload, clients, seconds, warmup, max_id):
+    ops, weights = zip(*WORKLOADS[workload].items())
+    samples = [[] for _ in range(clients)]
+    start_barrier = threading.Barrier(clients + 1)
+    window = {}
+
+    def client(index):
+        rng = random.Random(index)
+        send = target.connect()
+        start_barrier.wait()
+        while time.perf_counter() < window['end']:
+            op = rng.choices(ops, weights)[0]
+            method, path, body = make_request(op, rng, max_id)
+            started = time.perf_counter()
+            status = send(method, path, body)
+            finished = time.perf_counter()
+            if started >= window['start']:
+                samples[index].append((op, finished - started, status))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    window['start'] = time.perf_counter() + warmup
+    window['end'] = window['start'] + seconds
+    start_barrier.wait()
+    for t in threads:
+        t.join()
+
+    merged = [s for per_client in samples for s in per_client]
+    results = {'all': summarize([s for s in merged], seconds)}
+    for op in ops:
+        results[op] = summarize([s for s in merged if s[0] == op], seconds)
+    return results
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)] * 1000
+
+
+def summarize(samples, seconds):
+    latencies = sorted(s[1] for s in samples)
+    if not latencies:
+        return {'requests': 0}
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / seconds,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'errors': sum(1 for s in samples if not 200 <= s[2] < 400),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(current, baseline):
+    """Print per-operation throughput and latency change against a baseline result"""
+    print(f"\nvs {baseline['commit']} ({baseline['timestamp']}):")
+    if baseline['params'] != current['params']:
+        print(f"  note: parameters differ, baseline ran with {baseline['params']}")
+    for op, now in current['results'].items():
+        before = baseline['results'].get(op)
+        if not before or not now.get('requests') or not before.get('requests'):
+            continue
+        deltas = [f"{key} {(now[key] - before[key]) / before[key] * 100:+.1f}%"
+                  for key in ('requests_per_sec', 'p50_ms', 'p95_ms', 'p99_ms') if before[key]]
+        print(f"  {op:20} " + '  '.join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', choices=('client', 'gunicorn'), default='client')
+    parser.add_argument('--size', type=int, default=1000, help='tickets to seed, e.g. 1000, 100000, 1000000')
+    parser.add_argument('--workload', choices=sorted(WORKLOADS), default='mixed')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--seed-dir', default=os.path.join(tempfile.gettempdir(), 'helpdesk-bench-seeds'))
+    parser.add_argument('--output', help='result file (default benchmarks/results/<commit>-<target>-<size>-<workload>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    database = seeded_database(args.seed_dir, args.size, workdir)
+    target = (GunicornTarget if args.target == 'gunicorn' else ClientTarget)(database, workdir)
+    try:
+        results = drive(target, args.workload, args.clients, args.seconds, args.warmup, max(args.size, 1))
+    finally:
+        target.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'params': {key: getattr(args, key) for key in ('target', 'size', 'workload', 'clients', 'seconds')},
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results',
+        f"{report['commit']}-{args.target}-{args.size}-{args.workload}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f'\nSaved to {output}', file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
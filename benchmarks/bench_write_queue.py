@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent ticket creates with and without the single-writer queue
+Student ID: 25RP19452-NIYONKURU
+
+Launches gunicorn with docker/gunicorn.conf.py once per WRITE_QUEUE mode and
+has --clients connections create tickets as fast as they can. A short
+DB_BUSY_TIMEOUT_MS makes lock contention between workers show up as errors
+rather than as hidden waits. Reports throughput, p50/p99 latency and errors.
+
+Usage: python benchmarks/bench_write_queue.py [--clients 64] [--seconds 10]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+TICKET = json.dumps({
+    'title': 'Write load', 'description': 'Write queue comparison', 'category': 'hardware',
+    'priority': 'high', 'submitter_email': 'load@uni.edu', 'submitter_name': 'Load'
+})
+
+
+def launch(mode, workdir, port, busy_timeout):
+    """Start gunicorn in the given WRITE_QUEUE mode and wait until it answers"""
+    env = dict(os.environ, WRITE_QUEUE=mode, DATABASE_PATH=os.path.join(workdir, f'{mode}.db'),
+               WRITE_QUEUE_ADDRESS=os.path.join(workdir, 'writer.sock'),
+               DB_BUSY_TIMEOUT_MS=str(busy_timeout),
+               PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, f'metrics-{mode}'))
+    proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                             '--log-level', 'critical', '--access-logfile', '/dev/null'],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                # Give the writer process a moment to bind its socket
+                time.sleep(0.5)
+                return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) did not start')
+
+
+def drive(port, clients, seconds):
+    stop = time.time() + seconds
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while time.time() < stop:
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/api/v1/tickets', TICKET, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 201:
+                    errors[index] += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    merged = sorted(l for per_client in latencies for l in per_client)
+    return {
+        'creates_per_sec': len(merged) / seconds,
+        'p50_ms': merged[len(merged) // 2] * 1000 if merged else None,
+        'p99_ms': merged[int(len(merged) * 0.99)] * 1000 if merged else None,
+        'errors': sum(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--busy-timeout-ms', type=int, default=100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='helpdesk-bench-')
+    shutil.copytree(os.path.join(ROOT, 'src'), os.path.join(workdir, 'src'))
+    shutil.copy(os.path.join(ROOT, 'docker', 'gunicorn.conf.py'), workdir)
+
+    results = {}
+    for port, mode in enumerate(('off', 'process'), start=5083):
+        proc = launch(mode, workdir, port, args.busy_timeout_ms)
+        try:
+            results[mode] = drive(port, args.clients, args.seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
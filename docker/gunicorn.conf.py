@@ -0,0 +1,106 @@
+"""
+Gunicorn configuration for the Campus IT Helpdesk service
+Student ID: 25RP19452-NIYONKURU
+"""
+
+import importlib
+import multiprocessing
+import os
+import secrets
+import shutil
+import signal
+
+bind = '0.0.0.0:5000'
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+timeout = 60
+accesslog = '-'
+errorlog = '-'
+
+# Import the app and run create_app() once in the master; workers fork from it
+preload_app = True
+
+# SERVER_MODE=asgi serves the same routes from uvicorn workers on an asyncio
+# loop (src.app:asgi_app); the default is the synchronous WSGI app
+if os.environ.get('SERVER_MODE', 'sync') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'src.app:asgi_app'
+    _request_threads = int(os.environ.get('ASGI_THREADS', '16'))
+else:
+    wsgi_app = 'src.app:create_app()'
+    # More than one thread per worker selects gunicorn's gthread worker, so open
+    # /api/v1/events streams don't each take a whole worker process
+    threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+    _request_threads = threads
+
+# Each open event stream holds a request thread: allow a quarter of them (none
+# for single-threaded workers) so other requests and health checks still run
+os.environ.setdefault('EVENTS_MAX_STREAMS', str(_request_threads // 4))
+
+# Start every deployment with an empty Prometheus multiprocess directory. This
+# runs when the config loads, before the preloaded app creates its metric files.
+_metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if _metrics_dir:
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+# WRITE_QUEUE=process funnels ticket mutations from every worker through one
+# writer process; the master generates the socket's authkey for its children
+if os.environ.get('WRITE_QUEUE') == 'process':
+    os.environ.setdefault('WRITE_QUEUE_AUTHKEY', secrets.token_hex(16))
+
+# REPLICATION_ROLE=writer adds a process shipping changes to the replication log,
+# REPLICATION_ROLE=reader one applying them to this pod's local copy
+_children = []
+
+
+def _run_child(app_module, target):
+    # Forked from the master: drop its signal handlers so SIGTERM stops us
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    app_module.on_worker_start()
+    getattr(app_module, target)()
+
+
+def when_ready(server):
+    """Start the shared writer and replication processes before workers accept requests"""
+    module = importlib.import_module(server.app.app_uri.split(':')[0])
+    # Rate-limit buckets live in memory shared with the workers, so create them
+    # before they fork. ASGI workers run create_app only after it.
+    module.token_buckets.setup()
+
+    targets = []
+    if os.environ.get('WRITE_QUEUE') == 'process':
+        targets.append(('helpdesk-writer', 'run_write_server'))
+    role = os.environ.get('REPLICATION_ROLE', 'off')
+    if role == 'writer':
+        targets.append(('helpdesk-shipper', 'run_change_shipper'))
+    elif role == 'reader':
+        targets.append(('helpdesk-applier', 'run_replica_applier'))
+
+    for name, target in targets:
+        child = multiprocessing.Process(target=_run_child, args=(module, target), name=name, daemon=True)
+        child.start()
+        _children.append(child)
+
+
+def on_exit(server):
+    for child in _children:
+        child.terminate()
+    for child in _children:
+        child.join(5)
+
+
+def post_fork(server, worker):
+    """Per-worker startup: threads such as the log listener don't survive fork"""
+    # Forget the master's helper processes, or multiprocessing's exit hook in
+    # each worker would terminate them (and then fail to join them)
+    multiprocessing.process._children.clear()
+    module = importlib.import_module(server.app.app_uri.split(':')[0])
+    module.on_worker_start()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the aggregated metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
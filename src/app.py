@@ -5,46 +5,866 @@ Student ID: 25RP19452-NIYONKURU
 Simple REST API for submitting and tracking IT support tickets
 """
 
-from flask import Flask, request, jsonify, render_template_string
-from datetime import datetime
+from flask import (Flask, request, jsonify, render_template_string, g, make_response,
+                   Response, stream_with_context, has_request_context, has_app_context)
+from datetime import datetime, timedelta, timezone
 import sqlite3
 import os
+import sys
+import json
+import base64
+import csv
+import gzip
+import hashlib
+import heapq
+import hmac
+import re
+import shutil
+import fcntl
+import io
+import itertools
 import logging
+import logging.handlers
+import math
+import mmap
+import multiprocessing
+import queue
+import random
+import atexit
+import threading
+import time
+import requests
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from multiprocessing.connection import Client, Listener
 from functools import wraps
+import click
 import tempfile
+import zlib
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+                               generate_latest, multiprocess)
+
+# Optional shared backend for the ticket cache
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Optional fast JSON serializer; the stdlib encoder is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional brotli encoding for the frontend; gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Initialize Flask application
 app = Flask(__name__)
 
 # Configuration
 app.config['JSON_SORT_KEYS'] = False
+# JSON serializer: 'auto' uses orjson when installed, 'stdlib' forces the json module
+app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'auto')
+
+# Response compression for large API/metrics payloads (see compress_response)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', '6'))
 DATABASE = os.environ.get('DATABASE_PATH', '/data/tickets.db')
 
-# Setup logging - handle permissions gracefully
-try:
-    log_dir = '/var/log/helpdesk'
-    if os.access('/var/log', os.W_OK):
-        os.makedirs(log_dir, exist_ok=True)
-    else:
-        log_dir = '/tmp/helpdesk-logs'
-        os.makedirs(log_dir, exist_ok=True)
-except Exception:
-    log_dir = tempfile.gettempdir()
-    os.makedirs(os.path.join(log_dir, 'helpdesk-logs'), exist_ok=True)
-    log_dir = os.path.join(log_dir, 'helpdesk-logs')
-
-LOG_FILE = os.path.join(log_dir, 'app.log')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
+# Database tuning - see connect_db()/get_db()
+app.config['DB_POOLING'] = os.environ.get('DB_POOLING', 'true').lower() in ('1', 'true', 'yes')
+app.config['DB_BUSY_TIMEOUT_MS'] = int(os.environ.get('DB_BUSY_TIMEOUT_MS', '5000'))
+app.config['DB_MMAP_SIZE'] = int(os.environ.get('DB_MMAP_SIZE', str(64 * 1024 * 1024)))
+app.config['DB_CACHE_SIZE_KB'] = int(os.environ.get('DB_CACHE_SIZE_KB', '16384'))
+app.config['DB_STATEMENT_CACHE'] = int(os.environ.get('DB_STATEMENT_CACHE', '256'))
+
+# Conditional GETs - clients must revalidate but can reuse bodies on 304
+app.config['API_CACHE_CONTROL'] = os.environ.get('API_CACHE_CONTROL', 'private, no-cache')
+
+# Frontend: rendered and compressed once, then revalidated by ETag
+app.config['FRONTEND_CACHE_CONTROL'] = os.environ.get('FRONTEND_CACHE_CONTROL',
+                                                      'public, max-age=3600, stale-while-revalidate=86400')
+
+# Ticket list pagination
+app.config['TICKETS_PAGE_SIZE'] = int(os.environ.get('TICKETS_PAGE_SIZE', '50'))
+app.config['TICKETS_MAX_PAGE_SIZE'] = int(os.environ.get('TICKETS_MAX_PAGE_SIZE', '500'))
+
+# Dashboard summary: how many recent tickets it returns, and which fields
+app.config['DASHBOARD_RECENT'] = int(os.environ.get('DASHBOARD_RECENT', '5'))
+DASHBOARD_FIELDS = ('id', 'title', 'priority', 'status', 'created_at')
+
+# Streaming export - rows fetched from the cursor per round trip
+app.config['EXPORT_FETCH_SIZE'] = int(os.environ.get('EXPORT_FETCH_SIZE', '1000'))
+
+# Write coalescing: 'off' writes on the request's connection, 'thread' hands mutations
+# to an in-process writer thread, 'process' to a shared writer process over a socket
+app.config['WRITE_QUEUE'] = os.environ.get('WRITE_QUEUE', 'off')
+app.config['WRITE_QUEUE_ADDRESS'] = os.environ.get('WRITE_QUEUE_ADDRESS', '/tmp/helpdesk-writer.sock')
+app.config['WRITE_BATCH_WINDOW_MS'] = float(os.environ.get('WRITE_BATCH_WINDOW_MS', '1'))
+app.config['WRITE_BATCH_MAX'] = int(os.environ.get('WRITE_BATCH_MAX', '256'))
+# Seconds a request waits for the writer before giving up (below gunicorn's timeout)
+app.config['WRITE_QUEUE_TIMEOUT'] = float(os.environ.get('WRITE_QUEUE_TIMEOUT', '30'))
+
+# Ticket cache: a per-process LRU of serialized tickets (TICKET_CACHE_SIZE entries,
+# 0 disables it) in front of an optional shared store, e.g. redis://host:6379/0
+app.config['TICKET_CACHE_SIZE'] = int(os.environ.get('TICKET_CACHE_SIZE', '1024'))
+app.config['TICKET_CACHE_TTL'] = float(os.environ.get('TICKET_CACHE_TTL', '5'))
+app.config['TICKET_CACHE_URL'] = os.environ.get('TICKET_CACHE_URL', '')
+app.config['TICKET_CACHE_PREFIX'] = os.environ.get('TICKET_CACHE_PREFIX', 'helpdesk:ticket:')
+
+# Read coalescing (see coalesce): identical list/summary reads in flight at once
+# in a worker share one query and one serialized response body
+app.config['READ_COALESCING'] = os.environ.get('READ_COALESCING', 'true').lower() in ('1', 'true', 'yes')
+
+# Live updates (/api/v1/events). Each worker runs one thread that polls the
+# ticket_events change log and fans new events out to its open streams.
+app.config['EVENTS_POLL_INTERVAL'] = float(os.environ.get('EVENTS_POLL_INTERVAL', '0.5'))
+# Streams end after this long and the browser reconnects with Last-Event-ID,
+# which keeps each one under the gunicorn worker timeout
+app.config['EVENTS_STREAM_SECONDS'] = float(os.environ.get('EVENTS_STREAM_SECONDS', '30'))
+app.config['EVENTS_HEARTBEAT_SECONDS'] = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '15'))
+# Events buffered per stream; a client that falls further behind is disconnected
+app.config['EVENTS_QUEUE_SIZE'] = int(os.environ.get('EVENTS_QUEUE_SIZE', '256'))
+app.config['EVENTS_REPLAY_MAX'] = int(os.environ.get('EVENTS_REPLAY_MAX', '1000'))
+# Open streams per worker. Each holds a request thread, so this must stay below
+# the worker's threads (gunicorn.conf.py defaults it to a quarter of them); further
+# streams get 503 and the dashboard polls instead
+app.config['EVENTS_MAX_STREAMS'] = int(os.environ.get('EVENTS_MAX_STREAMS', '2'))
+
+# Online snapshots (see create_snapshot): copied with SQLite's backup API in
+# paced steps from a read snapshot, so writers are never blocked
+app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR', '/data/backups')
+app.config['BACKUP_PAGES_PER_STEP'] = int(os.environ.get('BACKUP_PAGES_PER_STEP', '1024'))
+app.config['BACKUP_STEP_SLEEP_MS'] = float(os.environ.get('BACKUP_STEP_SLEEP_MS', '5'))
+app.config['BACKUP_COMPRESS'] = os.environ.get('BACKUP_COMPRESS', 'true').lower() in ('1', 'true', 'yes')
+# Retention: the newest BACKUP_KEEP snapshots, plus the newest of each of the
+# last BACKUP_KEEP_DAILY days that has one
+app.config['BACKUP_KEEP'] = int(os.environ.get('BACKUP_KEEP', '24'))
+app.config['BACKUP_KEEP_DAILY'] = int(os.environ.get('BACKUP_KEEP_DAILY', '7'))
+
+# Bearer token for /api/v1/admin/* endpoints; they are disabled when unset
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', '')
+
+# Analytics rollups: resolution-time targets per priority (hours) for SLA breach
+# rates. Changes apply from the next backfill-rollups run.
+app.config['SLA_TARGET_HOURS'] = {
+    priority.strip(): float(hours)
+    for priority, hours in (pair.split('=') for pair in os.environ.get(
+        'SLA_TARGET_HOURS', 'critical=4,high=24,medium=72,low=168').split(',') if pair)
+}
+app.config['ANALYTICS_MAX_HOURLY_DAYS'] = int(os.environ.get('ANALYTICS_MAX_HOURLY_DAYS', '31'))
+
+# Archiving (see archive_closed_tickets): resolved/closed tickets untouched for
+# ARCHIVE_AFTER_DAYS move to one SQLite file per month under ARCHIVE_DIR
+# (default: an archive/ directory next to the database, or under
+# REPLICATION_LOG_DIR when replicating, so readers can open the files too)
+app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', '')
+app.config['ARCHIVE_AFTER_DAYS'] = float(os.environ.get('ARCHIVE_AFTER_DAYS', '90'))
+app.config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+
+# Replication: 'writer' ships committed ticket changes to REPLICATION_LOG_DIR (a
+# directory shared with the readers); 'reader' keeps a local copy from that log,
+# serves reads from it and forwards writes to REPLICATION_WRITER_URL
+app.config['REPLICATION_ROLE'] = os.environ.get('REPLICATION_ROLE', 'off')
+app.config['REPLICATION_LOG_DIR'] = os.environ.get('REPLICATION_LOG_DIR', '/data/replication')
+app.config['REPLICATION_WRITER_URL'] = os.environ.get('REPLICATION_WRITER_URL', '')
+app.config['REPLICATION_FORWARD_TIMEOUT'] = float(os.environ.get('REPLICATION_FORWARD_TIMEOUT', '30'))
+app.config['REPLICATION_POLL_INTERVAL'] = float(os.environ.get('REPLICATION_POLL_INTERVAL', '0.2'))
+# Changes per log segment; each new segment comes with a fresh base copy
+app.config['REPLICATION_SEGMENT_ENTRIES'] = int(os.environ.get('REPLICATION_SEGMENT_ENTRIES', '10000'))
+# How long after a write the client's reads go to the writer until a reader catches up
+app.config['REPLICATION_RYW_SECONDS'] = int(os.environ.get('REPLICATION_RYW_SECONDS', '30'))
+
+# Admission control (see admit_request): per-client token buckets shared by all
+# workers (tokens/second and burst per lane, 0 disables) and per-worker caps on
+# requests in flight, so overload is refused early instead of queueing
+app.config['ADMISSION_CONTROL'] = os.environ.get('ADMISSION_CONTROL', 'false').lower() in ('1', 'true', 'yes')
+app.config['ADMISSION_READ_RATE'] = float(os.environ.get('ADMISSION_READ_RATE', '20'))
+app.config['ADMISSION_READ_BURST'] = float(os.environ.get('ADMISSION_READ_BURST', '60'))
+app.config['ADMISSION_WRITE_RATE'] = float(os.environ.get('ADMISSION_WRITE_RATE', '2'))
+app.config['ADMISSION_WRITE_BURST'] = float(os.environ.get('ADMISSION_WRITE_BURST', '10'))
+app.config['ADMISSION_MAX_INFLIGHT'] = int(os.environ.get('ADMISSION_MAX_INFLIGHT', '6'))
+app.config['ADMISSION_MAX_INFLIGHT_READS'] = int(os.environ.get('ADMISSION_MAX_INFLIGHT_READS', '4'))
+app.config['ADMISSION_BUCKET_SLOTS'] = int(os.environ.get('ADMISSION_BUCKET_SLOTS', '65536'))
+# Request header naming the client (e.g. X-Forwarded-For behind a proxy); the peer address otherwise
+app.config['ADMISSION_CLIENT_HEADER'] = os.environ.get('ADMISSION_CLIENT_HEADER', '')
+
+# Bulk ingestion
+app.config['BULK_CHUNK_SIZE'] = int(os.environ.get('BULK_CHUNK_SIZE', '500'))
+app.config['BULK_MAX_ITEMS'] = int(os.environ.get('BULK_MAX_ITEMS', '10000'))
+
+REQUIRED_FIELDS = ['title', 'description', 'category', 'priority', 'submitter_email', 'submitter_name']
+VALID_CATEGORIES = ['network', 'login', 'lab_computers', 'software', 'hardware', 'other']
+VALID_PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+UPDATABLE_FIELDS = ['status', 'assigned_to', 'resolution_notes', 'priority']
+RESOLVED_STATUSES = ('resolved', 'closed')
+
+INSERT_TICKET_SQL = '''INSERT INTO tickets 
+                       (title, description, category, priority, submitter_email, submitter_name)
+                       VALUES (?, ?, ?, ?, ?, ?)'''
+
+TICKET_FIELDS = ('id', 'title', 'description', 'category', 'priority', 'submitter_email',
+                 'submitter_name', 'status', 'created_at', 'updated_at', 'assigned_to',
+                 'resolution_notes')
+
+# Also used for the archive files, so archived rows keep the live layout
+TICKETS_TABLE_SQL = '''CREATE TABLE IF NOT EXISTS tickets
+                       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        description TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        priority TEXT NOT NULL,
+                        submitter_email TEXT NOT NULL,
+                        submitter_name TEXT NOT NULL,
+                        status TEXT DEFAULT 'open',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        assigned_to TEXT,
+                        resolution_notes TEXT)'''
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Logging pipeline: the request thread only filters and enqueues records, a
+# listener thread formats them and does the file/stdout I/O
+app.config['LOG_JSON'] = os.environ.get('LOG_JSON', 'true').lower() in ('1', 'true', 'yes')
+app.config['LOG_QUEUE'] = os.environ.get('LOG_QUEUE', 'true').lower() in ('1', 'true', 'yes')
+# endpoint=rate pairs; INFO and below from these endpoints are kept with that probability
+app.config['LOG_SAMPLE_RATES'] = {
+    endpoint.strip(): float(rate)
+    for endpoint, rate in (pair.split('=') for pair in os.environ.get(
+        'LOG_SAMPLE_RATES', 'get_tickets=0.1,get_ticket=0.1,search_tickets=0.1').split(',') if pair)
+}
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line"""
+    
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process
+        }
+        endpoint = getattr(record, 'endpoint', None)
+        if endpoint:
+            entry['endpoint'] = endpoint
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Tag records with the Flask endpoint and sample high-volume INFO logs"""
+    
+    def filter(self, record):
+        endpoint = request.endpoint if has_request_context() else None
+        record.endpoint = endpoint
+        if record.levelno > logging.INFO or endpoint is None:
+            return True
+        rate = app.config['LOG_SAMPLE_RATES'].get(endpoint, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread"""
+    
+    def prepare(self, record):
+        # Tracebacks must be rendered while the exception is still live
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+def log_directory():
+    """Return a writable log directory - handle permissions gracefully"""
+    try:
+        log_dir = '/var/log/helpdesk'
+        if os.access('/var/log', os.W_OK):
+            os.makedirs(log_dir, exist_ok=True)
+        else:
+            log_dir = '/tmp/helpdesk-logs'
+            os.makedirs(log_dir, exist_ok=True)
+    except Exception:
+        log_dir = tempfile.gettempdir()
+        os.makedirs(os.path.join(log_dir, 'helpdesk-logs'), exist_ok=True)
+        log_dir = os.path.join(log_dir, 'helpdesk-logs')
+    return log_dir
+
+_log_handlers = []
+_log_queue_handler = None
+_log_listener = None
+_log_listener_pid = None
+
+def configure_logging():
+    """Install the logging pipeline on the root logger; later calls are no-ops"""
+    global _log_queue_handler
+    if _log_handlers:
+        return
+    
+    formatter = JsonFormatter() if app.config['LOG_JSON'] else logging.Formatter(LOG_FORMAT)
+    _log_handlers.extend([
+        logging.FileHandler(os.path.join(log_directory(), 'app.log')),
         logging.StreamHandler()
-    ]
-)
+    ])
+    for handler in _log_handlers:
+        handler.setFormatter(formatter)
+    
+    if app.config['LOG_QUEUE']:
+        _log_queue_handler = LazyQueueHandler(queue.SimpleQueue())
+        root_handlers = [_log_queue_handler]
+        start_log_listener()
+        atexit.register(stop_log_listener)
+    else:
+        root_handlers = _log_handlers
+    for handler in root_handlers:
+        handler.addFilter(SamplingFilter())
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=root_handlers
+    )
+
+def start_log_listener():
+    """Start a listener thread on a fresh queue.
+
+    Threads do not survive fork, so each gunicorn worker calls this (via
+    on_worker_start) to get its own listener instead of inheriting a dead one.
+    """
+    global _log_listener, _log_listener_pid
+    if _log_queue_handler is None or _log_listener_pid == os.getpid():
+        return
+    _log_listener_pid = os.getpid()
+    _log_queue_handler.queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(_log_queue_handler.queue, *_log_handlers,
+                                                   respect_handler_level=True)
+    _log_listener.start()
+
+def stop_log_listener():
+    """Flush queued records and stop this process's listener thread"""
+    global _log_listener_pid
+    if _log_listener_pid == os.getpid() and _log_listener._thread is not None:
+        _log_listener.stop()
+        _log_listener_pid = None
+
 logger = logging.getLogger(__name__)
 
+# ASGI serving mode - threads available to run Flask handlers and their SQLite calls
+app.config['ASGI_THREADS'] = int(os.environ.get('ASGI_THREADS', '16'))
+
+# Request instrumentation. Under gunicorn, PROMETHEUS_MULTIPROC_DIR makes
+# prometheus_client keep values in per-worker files that /metrics aggregates.
+app.config['METRICS_DB_TIMING'] = os.environ.get('METRICS_DB_TIMING', 'true').lower() in ('1', 'true', 'yes')
+
+REQUEST_COUNT = Counter('helpdesk_http_requests_total', 'HTTP requests by route and status',
+                        ['method', 'endpoint', 'status'])
+REQUEST_LATENCY = Histogram('helpdesk_http_request_duration_seconds', 'HTTP request latency by route',
+                            ['method', 'endpoint'])
+REQUESTS_IN_FLIGHT = Gauge('helpdesk_http_requests_in_flight', 'HTTP requests currently being served',
+                           multiprocess_mode='livesum')
+DB_TIME = Histogram('helpdesk_db_query_duration_seconds', 'SQLite time spent per request by route',
+                    ['endpoint'],
+                    buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0))
+BACKUP_LAST_SUCCESS = Gauge('helpdesk_backup_last_success_timestamp_seconds',
+                            'Unix time of the last verified database snapshot', multiprocess_mode='max')
+TICKET_CACHE_HITS = Counter('helpdesk_ticket_cache_hits_total', 'Ticket cache hits by tier', ['tier'])
+TICKET_CACHE_MISSES = Counter('helpdesk_ticket_cache_misses_total', 'Ticket cache misses by tier', ['tier'])
+ADMISSION_REJECTED = Counter('helpdesk_admission_rejected_total', 'Requests refused by admission control',
+                             ['lane', 'reason'])
+COALESCED_READS = Counter('helpdesk_coalesced_reads_total',
+                          'Coalescable reads by route: leaders ran the view, followers reused its body',
+                          ['endpoint', 'role'])
+TICKET_CACHE_EVICTIONS = Counter('helpdesk_ticket_cache_evictions_total',
+                                 'Tickets evicted from the local cache to stay within TICKET_CACHE_SIZE')
+
+def metrics_registry():
+    """Registry to expose: aggregated across workers in multiprocess mode, else this process"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def _add_db_time(elapsed):
+    if has_app_context():
+        g.db_time = g.get('db_time', 0.0) + elapsed
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that adds time spent in SQLite to the current request's db_time"""
+    
+    def execute(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            _add_db_time(time.perf_counter() - start)
+    
+    def executemany(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            _add_db_time(time.perf_counter() - start)
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _add_db_time(time.perf_counter() - start)
+    
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(*args)
+        finally:
+            _add_db_time(time.perf_counter() - start)
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _add_db_time(time.perf_counter() - start)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including the execute() shortcuts, are InstrumentedCursors"""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+    
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+# JSON serialization
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson, byte-for-byte compact like the default.
+
+    Pretty-printed output (debug mode, or an explicit indent) still goes
+    through the stdlib encoder. Dates keep Flask's HTTP-date format.
+    """
+    
+    def encode(self, obj):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent') is not None:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b'\n', mimetype=self.mimetype)
+
+def configure_json():
+    """Install the JSON provider selected by JSON_PROVIDER"""
+    if app.config['JSON_PROVIDER'] == 'auto' and orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = DefaultJSONProvider(app)
+    app.json.sort_keys = app.config['JSON_SORT_KEYS']
+
+configure_json()
+
+@app.before_request
+def start_request_timer():
+    """Record the request start and count it as in flight"""
+    g.request_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe latency, status and DB time for the finished request"""
+    start = g.get('request_start')
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(request.method, endpoint, str(response.status_code)).inc()
+        if 'db_time' in g:
+            DB_TIME.labels(endpoint).observe(g.db_time)
+    return response
+
+@app.teardown_request
+def finish_request(exception=None):
+    """Release the in-flight slot, even when the request raised"""
+    if g.pop('request_start', None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
+
+# Database connection management
+_db_local = threading.local()
+
+def connect_db(path=None):
+    """Open a SQLite connection with WAL mode and tuned pragmas applied"""
+    busy_timeout = app.config['DB_BUSY_TIMEOUT_MS']
+    conn = sqlite3.connect(path or DATABASE,
+                           timeout=busy_timeout / 1000.0,
+                           cached_statements=app.config['DB_STATEMENT_CACHE'],
+                           factory=InstrumentedConnection if app.config['METRICS_DB_TIMING'] else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={int(busy_timeout)}')
+    conn.execute(f"PRAGMA mmap_size={int(app.config['DB_MMAP_SIZE'])}")
+    conn.execute(f"PRAGMA cache_size=-{int(app.config['DB_CACHE_SIZE_KB'])}")
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def _pooled_connection():
+    """Return this thread's long-lived connection to DATABASE, opening it on first use"""
+    # Connections must never cross a fork (gunicorn workers), so the pool is per pid
+    if getattr(_db_local, 'pid', None) != os.getpid():
+        _db_local.pid = os.getpid()
+        _db_local.connections = {}
+    conn = _db_local.connections.get(DATABASE)
+    if conn is None:
+        conn = connect_db()
+        _db_local.connections[DATABASE] = conn
+    return conn
+
+def close_pooled_connections():
+    """Close every pooled connection owned by the calling thread"""
+    if getattr(_db_local, 'pid', None) != os.getpid():
+        return
+    for conn in _db_local.connections.values():
+        conn.close()
+    _db_local.connections = {}
+
+def get_db():
+    """Return the database connection bound to the current app context.
+
+    With DB_POOLING enabled each worker thread reuses one connection (and its
+    prepared statement cache) across requests; otherwise a fresh connection is
+    opened per request and closed on teardown.
+    """
+    if 'db' not in g:
+        g.db = _pooled_connection() if app.config['DB_POOLING'] else connect_db()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    """Return the request's connection to the pool, discarding any open transaction"""
+    conn = g.pop('db', None)
+    if conn is None:
+        return
+    if conn.in_transaction:
+        conn.rollback()
+    if not app.config['DB_POOLING']:
+        conn.close()
+
+# Materialized ticket counters: one row per (dimension, value), e.g. ('status', 'open').
+# Triggers keep them in step with the tickets table inside the writing transaction.
+COUNTER_DIMENSIONS = ('status', 'category', 'priority')
+
+COUNTER_REBUILD_SQL = [
+    'DELETE FROM ticket_counters',
+    "INSERT INTO ticket_counters (dimension, value, count) SELECT 'total', '', COUNT(*) FROM tickets",
+] + [
+    f"INSERT INTO ticket_counters (dimension, value, count) "
+    f"SELECT '{dim}', COALESCE({dim}, ''), COUNT(*) FROM tickets GROUP BY {dim}"
+    for dim in COUNTER_DIMENSIONS
+]
+
+def _counter_upsert(dim, ref, delta):
+    """Build a trigger statement adding delta to the counter for ref's (OLD/NEW) value"""
+    value = f"COALESCE({ref}.{dim}, '')" if dim != 'total' else "''"
+    return (f"INSERT INTO ticket_counters (dimension, value, count) VALUES ('{dim}', {value}, {delta}) "
+            f"ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;")
+
+COUNTER_TRIGGERS_SQL = [
+    'CREATE TRIGGER IF NOT EXISTS trg_ticket_counters_insert AFTER INSERT ON tickets BEGIN '
+    + ' '.join(_counter_upsert(dim, 'NEW', 1) for dim in ('total',) + COUNTER_DIMENSIONS)
+    + ' END',
+    'CREATE TRIGGER IF NOT EXISTS trg_ticket_counters_update '
+    f'AFTER UPDATE OF {", ".join(COUNTER_DIMENSIONS)} ON tickets BEGIN '
+    + ' '.join(_counter_upsert(dim, 'OLD', -1) + ' ' + _counter_upsert(dim, 'NEW', 1)
+               for dim in COUNTER_DIMENSIONS)
+    + ' END',
+    'CREATE TRIGGER IF NOT EXISTS trg_ticket_counters_delete AFTER DELETE ON tickets BEGIN '
+    + ' '.join(_counter_upsert(dim, 'OLD', -1) for dim in ('total',) + COUNTER_DIMENSIONS)
+    + ' END',
+]
+
+# Data version: a single counter bumped by every write to tickets, used for ETags
+DATA_VERSION_SQL = [
+    '''CREATE TABLE IF NOT EXISTS data_version
+       (id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL)''',
+    'INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)',
+] + [
+    f'CREATE TRIGGER IF NOT EXISTS trg_data_version_{event.lower()} AFTER {event} ON tickets BEGIN '
+    'UPDATE data_version SET version = version + 1 WHERE id = 1; END'
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+# Full-text search: an external-content FTS5 index over title/description, kept in
+# sync by triggers. Ranking weights title matches 10x over description matches.
+SEARCH_INDEX_SQL = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5
+       (title, description, content='tickets', content_rowid='id',
+        tokenize='porter unicode61')''',
+    "INSERT INTO tickets_fts (tickets_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    '''CREATE TRIGGER IF NOT EXISTS trg_tickets_fts_insert AFTER INSERT ON tickets BEGIN
+         INSERT INTO tickets_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_tickets_fts_delete AFTER DELETE ON tickets BEGIN
+         INSERT INTO tickets_fts (tickets_fts, rowid, title, description)
+         VALUES ('delete', OLD.id, OLD.title, OLD.description);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_tickets_fts_update AFTER UPDATE OF title, description ON tickets BEGIN
+         INSERT INTO tickets_fts (tickets_fts, rowid, title, description)
+         VALUES ('delete', OLD.id, OLD.title, OLD.description);
+         INSERT INTO tickets_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+       END''',
+]
+
+SEARCH_REBUILD_SQL = "INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')"
+
+# Change log for live updates (/api/v1/events): one row per ticket insert/update,
+# written by triggers so every write path is covered. Only the most recent
+# ~10000 rows are kept, enough for reconnecting clients to catch up.
+TICKET_EVENTS_SQL = [
+    '''CREATE TABLE IF NOT EXISTS ticket_events
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT NOT NULL,
+        ticket_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_ticket_events_insert AFTER INSERT ON tickets BEGIN
+         INSERT INTO ticket_events (event, ticket_id) VALUES ('ticket-created', NEW.id);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_ticket_events_update AFTER UPDATE ON tickets BEGIN
+         INSERT INTO ticket_events (event, ticket_id) VALUES ('ticket-updated', NEW.id);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS trg_ticket_events_prune AFTER INSERT ON ticket_events
+       WHEN NEW.id % 1000 = 0 BEGIN
+         DELETE FROM ticket_events WHERE id <= NEW.id - 10000;
+       END''',
+]
+
+# Rows leaving the live table: 'ticket-archived' when archive_closed_tickets
+# indexed the row first, 'ticket-deleted' otherwise
+TICKET_DELETE_EVENTS_SQL = [
+    '''CREATE TRIGGER IF NOT EXISTS trg_ticket_events_delete AFTER DELETE ON tickets BEGIN
+         INSERT INTO ticket_events (event, ticket_id)
+         VALUES (CASE WHEN EXISTS (SELECT 1 FROM archived_tickets WHERE id = OLD.id)
+                      THEN 'ticket-archived' ELSE 'ticket-deleted' END, OLD.id);
+       END''',
+]
+
+# Analytics rollups: per (hour, category) totals of tickets created, tickets
+# resolved, their summed resolution time and how many missed the SLA target for
+# their priority. Triggers fold each creation and each transition into a
+# resolved status into the current bucket, so range queries read buckets, not
+# tickets. Daily figures are sums of 24 hourly buckets.
+_resolved_in = ', '.join(f"'{status}'" for status in RESOLVED_STATUSES)
+
+ROLLUP_UPSERT = '''
+    ON CONFLICT (bucket, category) DO UPDATE SET
+        created = created + excluded.created,
+        resolved = resolved + excluded.resolved,
+        resolution_seconds = resolution_seconds + excluded.resolution_seconds,
+        sla_breaches = sla_breaches + excluded.sla_breaches'''
+
+def rollup_backfill_sql(source='tickets'):
+    """Statements that recompute ticket_rollups from source, a table or subquery
+    with created_at, updated_at, status, category and priority columns"""
+    return [
+        'DELETE FROM ticket_rollups',
+        f'''INSERT INTO ticket_rollups (bucket, category, created)
+           SELECT strftime('%Y-%m-%d %H:00:00', created_at), category, COUNT(*)
+           FROM {source} GROUP BY 1, 2''',
+        # The moment of resolution isn't stored; for existing tickets the last
+        # update is the best estimate
+        f'''INSERT INTO ticket_rollups (bucket, category, resolved, resolution_seconds, sla_breaches)
+            SELECT bucket, category, COUNT(*), SUM(secs), SUM(secs > target) FROM (
+                SELECT strftime('%Y-%m-%d %H:00:00', t.updated_at) AS bucket, t.category AS category,
+                       MAX(0, (julianday(t.updated_at) - julianday(t.created_at)) * 86400) AS secs,
+                       COALESCE(s.hours * 3600, 1e18) AS target
+                FROM {source} t LEFT JOIN sla_targets s ON s.priority = t.priority
+                WHERE t.status IN ({_resolved_in}))
+            WHERE true GROUP BY 1, 2 {ROLLUP_UPSERT}''',
+    ]
+
+ROLLUP_BACKFILL_SQL = rollup_backfill_sql()
+
+ROLLUPS_SQL = [
+    '''CREATE TABLE IF NOT EXISTS ticket_rollups
+       (bucket TEXT NOT NULL,
+        category TEXT NOT NULL,
+        created INTEGER NOT NULL DEFAULT 0,
+        resolved INTEGER NOT NULL DEFAULT 0,
+        resolution_seconds REAL NOT NULL DEFAULT 0,
+        sla_breaches INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, category)) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS sla_targets
+       (priority TEXT PRIMARY KEY,
+        hours REAL NOT NULL)''',
+    '''INSERT OR IGNORE INTO sla_targets (priority, hours) VALUES
+       ('critical', 4), ('high', 24), ('medium', 72), ('low', 168)''',
+    f'''CREATE TRIGGER IF NOT EXISTS trg_rollups_created AFTER INSERT ON tickets BEGIN
+         INSERT INTO ticket_rollups (bucket, category, created)
+         VALUES (strftime('%Y-%m-%d %H:00:00', COALESCE(NEW.created_at, CURRENT_TIMESTAMP)),
+                 NEW.category, 1) {ROLLUP_UPSERT};
+       END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trg_rollups_resolved AFTER UPDATE OF status ON tickets
+       WHEN NEW.status IN ({_resolved_in}) AND OLD.status NOT IN ({_resolved_in}) BEGIN
+         INSERT INTO ticket_rollups (bucket, category, resolved, resolution_seconds, sla_breaches)
+         SELECT strftime('%Y-%m-%d %H:00:00', 'now'), NEW.category, 1, secs,
+                secs > COALESCE((SELECT hours * 3600 FROM sla_targets WHERE priority = NEW.priority), 1e18)
+         FROM (SELECT MAX(0, (julianday('now') - julianday(NEW.created_at)) * 86400) AS secs)
+         WHERE true {ROLLUP_UPSERT};
+       END''',
+] + ROLLUP_BACKFILL_SQL
+
+# Archive index: where each archived ticket went, plus the columns counters and
+# rollups are rebuilt from, so neither has to open the archive files
+ARCHIVED_TICKETS_SQL = [
+    '''CREATE TABLE IF NOT EXISTS archived_tickets
+       (id INTEGER PRIMARY KEY,
+        period TEXT NOT NULL,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        status TEXT,
+        category TEXT,
+        priority TEXT)''',
+    'CREATE INDEX IF NOT EXISTS idx_archived_tickets_period ON archived_tickets (period)',
+]
+
+# Every ticket ever filed, live or archived, for rebuilds of the derived tables
+ALL_TICKETS_SQL = ('(SELECT created_at, updated_at, status, category, priority FROM tickets '
+                   'UNION ALL SELECT created_at, updated_at, status, category, priority FROM archived_tickets)')
+
+# Schema migrations - applied in order by init_db() and tracked in PRAGMA user_version.
+# Append new entries; never edit or reorder ones that have shipped.
+SCHEMA_MIGRATIONS = [
+    # 1: secondary indexes for list filters/ordering and metrics group-bys
+    [
+        'CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON tickets (status, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_tickets_category_created ON tickets (category, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_tickets_priority ON tickets (priority)',
+    ],
+    # 2: materialized counters backing /metrics and /api/v1/metrics
+    [
+        '''CREATE TABLE IF NOT EXISTS ticket_counters
+           (dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)) WITHOUT ROWID''',
+    ] + COUNTER_REBUILD_SQL + COUNTER_TRIGGERS_SQL,
+    # 3: change counter for conditional GETs
+    DATA_VERSION_SQL,
+    # 4: full-text search index, populated from existing tickets
+    SEARCH_INDEX_SQL + [SEARCH_REBUILD_SQL],
+    # 5: change log for Server-Sent Events
+    TICKET_EVENTS_SQL,
+    # 6: hourly analytics rollups, backfilled from existing tickets
+    ROLLUPS_SQL,
+    # 7: index of tickets moved to archive files
+    ARCHIVED_TICKETS_SQL,
+    # 8: a reader's position in the replication log (unused on the writer)
+    [
+        '''CREATE TABLE IF NOT EXISTS replication_state
+           (id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL,
+            source_ts REAL,
+            applied_at REAL)''',
+    ],
+    # 9: deletes and archiving in the change log, so readers drop those rows too
+    TICKET_DELETE_EVENTS_SQL,
+]
+
+def schema_version(conn):
+    """Return the schema version recorded in the database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def apply_migrations(conn):
+    """Apply pending SCHEMA_MIGRATIONS, one transaction per version"""
+    for version, statements in enumerate(SCHEMA_MIGRATIONS, start=1):
+        if schema_version(conn) >= version:
+            continue
+        # IMMEDIATE takes the write lock up front so concurrent workers serialize here
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if schema_version(conn) < version:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {version}')
+                logger.info("Applied schema migration %d", version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def read_counters(conn):
+    """Return the materialized counters as {dimension: {value: count}}, skipping zeros"""
+    counters = {'total': {}}
+    counters.update({dim: {} for dim in COUNTER_DIMENSIONS})
+    for row in conn.execute('SELECT dimension, value, count FROM ticket_counters WHERE count != 0'):
+        counters.setdefault(row[0], {})[row[1]] = row[2]
+    return counters
+
+def data_version(conn):
+    """Return the current ticket data version"""
+    return conn.execute('SELECT version FROM data_version WHERE id = 1').fetchone()[0]
+
+def rebuild_counters(conn):
+    """Recompute ticket_counters from live and archived tickets in one transaction"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for statement in COUNTER_REBUILD_SQL:
+            conn.execute(statement)
+        # Counters cover every ticket filed, so archived ones are added back in
+        for dim in ('total',) + COUNTER_DIMENSIONS:
+            value = f"COALESCE({dim}, '')" if dim != 'total' else "''"
+            conn.execute(f"INSERT INTO ticket_counters (dimension, value, count) "
+                         f"SELECT '{dim}', {value}, COUNT(*) FROM archived_tickets WHERE true GROUP BY 2 "
+                         f"ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def backfill_rollups(conn):
+    """Recompute ticket_rollups from live and archived tickets, applying SLA_TARGET_HOURS"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('DELETE FROM sla_targets')
+        conn.executemany('INSERT INTO sla_targets (priority, hours) VALUES (?, ?)',
+                         app.config['SLA_TARGET_HOURS'].items())
+        for statement in rollup_backfill_sql(ALL_TICKETS_SQL):
+            conn.execute(statement)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def rebuild_search_index(conn):
+    """Repopulate the full-text index from the tickets table"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(SEARCH_REBUILD_SQL)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
 # Initialize database
 def init_db():
     """Initialize SQLite database with schema"""
@@ -55,22 +875,10 @@ def init_db():
         except Exception:
             pass  # Use temp directory as fallback
     
-    conn = sqlite3.connect(DATABASE)
+    conn = connect_db()
     c = conn.cursor()
     
-    c.execute('''CREATE TABLE IF NOT EXISTS tickets
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  title TEXT NOT NULL,
-                  description TEXT NOT NULL,
-                  category TEXT NOT NULL,
-                  priority TEXT NOT NULL,
-                  submitter_email TEXT NOT NULL,
-                  submitter_name TEXT NOT NULL,
-                  status TEXT DEFAULT 'open',
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  assigned_to TEXT,
-                  resolution_notes TEXT)''')
+    c.execute(TICKETS_TABLE_SQL)
     
     c.execute('''CREATE TABLE IF NOT EXISTS metrics
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -78,9 +886,1267 @@ def init_db():
                   metric_value INTEGER NOT NULL,
                   recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
     
-    conn.commit()
-    conn.close()
-    logger.info("Database initialized successfully")
+    conn.commit()
+    apply_migrations(conn)
+    conn.close()
+    logger.info("Database initialized successfully")
+
+# Ticket mutations. Each runs inside a transaction owned by the caller, which
+# is either the request (WRITE_QUEUE=off) or the writer's group commit.
+def apply_create(conn, values):
+    """Insert a ticket from INSERT_TICKET_SQL parameters and return its id"""
+    return conn.execute(INSERT_TICKET_SQL, values).lastrowid
+
+def apply_update(conn, ticket_id, updates):
+    """Apply field updates to a ticket, returning False if it does not exist"""
+    if not conn.execute('SELECT id FROM tickets WHERE id = ?', (ticket_id,)).fetchone():
+        return False
+    if set(updates) - set(UPDATABLE_FIELDS + ['updated_at']):
+        raise ValueError(f'Fields not updatable: {sorted(set(updates) - set(UPDATABLE_FIELDS))}')
+    if updates:
+        set_clause = ', '.join([f'{k} = ?' for k in updates.keys()])
+        values = list(updates.values()) + [ticket_id]
+        conn.execute(f'UPDATE tickets SET {set_clause} WHERE id = ?', values)
+    return True
+
+MUTATIONS = {
+    'create': apply_create,
+    'update': apply_update,
+}
+
+class WriteQueueTimeout(RuntimeError):
+    """The writer did not answer within WRITE_QUEUE_TIMEOUT"""
+
+class WriteOutcomeUnknown(RuntimeError):
+    """The writer process took a mutation but its answer was lost; it may have been applied"""
+
+class WriteCoalescer:
+    """Single writer thread that group-commits queued mutations.
+
+    Callers block on a Future while the writer drains everything queued
+    (waiting up to WRITE_BATCH_WINDOW_MS for stragglers) into one
+    transaction. Each mutation runs under its own savepoint, so one failure
+    doesn't discard the rest of the batch.
+    """
+    
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+        self.batches = 0
+        self.mutations = 0
+    
+    def submit(self, op, *args):
+        """Queue a mutation and wait up to WRITE_QUEUE_TIMEOUT for the result of its commit"""
+        self.ensure_started()
+        future = Future()
+        self.queue.put((op, args, future))
+        timeout = app.config['WRITE_QUEUE_TIMEOUT']
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            # A mutation the writer hasn't started is dropped, so the caller may retry it
+            if future.cancel():
+                raise WriteQueueTimeout(f'Write queue did not start the write within {timeout:g}s')
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            raise WriteQueueTimeout(f'Write queue did not commit the write within {2 * timeout:g}s')
+    
+    def ensure_started(self):
+        with self.lock:
+            if self.pid != os.getpid() or not self.thread.is_alive():
+                if self.pid != os.getpid():
+                    self.queue = queue.Queue()
+                self.thread = threading.Thread(target=self.run, name='write-coalescer', daemon=True)
+                self.thread.start()
+                self.pid = os.getpid()
+    
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + app.config['WRITE_BATCH_WINDOW_MS'] / 1000.0
+        while len(batch) < app.config['WRITE_BATCH_MAX']:
+            try:
+                batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+        return batch
+    
+    def run(self):
+        conn, path = None, None
+        while True:
+            batch = self.next_batch()
+            try:
+                if conn is None or path != DATABASE:
+                    conn, path = connect_db(), DATABASE
+                self.commit(conn, batch)
+            except Exception as e:
+                # Fail this batch, not the writer: reconnect for the next one
+                logger.error("Write batch of %d failed: %s", len(batch), e)
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                conn = None
+    
+    def commit(self, conn, batch):
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for op, args, future in batch:
+                # Skip mutations whose caller gave up waiting (see submit)
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT mutation')
+                try:
+                    outcomes.append((future, MUTATIONS[op](conn, *args), None))
+                    conn.execute('RELEASE mutation')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO mutation')
+                    conn.execute('RELEASE mutation')
+                    outcomes.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.error("Write batch of %d failed: %s", len(batch), e)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.mutations += len(outcomes)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+write_coalescer = WriteCoalescer()
+_writer_clients = threading.local()
+
+def run_write_server(address=None):
+    """Serve the write queue to other processes on a Unix socket (blocks forever)"""
+    address = address or app.config['WRITE_QUEUE_ADDRESS']
+    if os.path.exists(address):
+        os.remove(address)
+    listener = Listener(address, family='AF_UNIX', authkey=write_queue_authkey())
+    logger.info("Write queue listening on %s", address)
+    
+    def serve(connection):
+        with connection:
+            while True:
+                try:
+                    op, args = connection.recv()
+                except EOFError:
+                    return
+                try:
+                    reply = ('ok', write_coalescer.submit(op, *args))
+                except Exception as e:
+                    reply = ('error', f'{type(e).__name__}: {e}')
+                try:
+                    connection.send(reply)
+                except OSError:
+                    # The worker gave up waiting and closed its end
+                    return
+    
+    while True:
+        try:
+            connection = listener.accept()
+        except Exception as e:
+            logger.warning("Rejected write queue connection: %s", e)
+            continue
+        threading.Thread(target=serve, args=(connection,), daemon=True).start()
+
+def write_queue_authkey():
+    return os.environ.get('WRITE_QUEUE_AUTHKEY', 'helpdesk-writer').encode()
+
+def _submit_remote(op, args):
+    """Send a mutation to the writer process over this thread's connection"""
+    connection = getattr(_writer_clients, 'connection', None)
+    if getattr(_writer_clients, 'pid', None) != os.getpid():
+        connection = None
+    if connection is not None:
+        try:
+            # Nothing is owed on an idle connection, so anything readable means
+            # the writer closed it (e.g. it restarted); reconnect before sending
+            if connection.poll(0):
+                connection.close()
+                connection = None
+        except (OSError, EOFError):
+            connection = None
+    if connection is None:
+        _writer_clients.connection = None
+        connection = Client(app.config['WRITE_QUEUE_ADDRESS'], family='AF_UNIX',
+                            authkey=write_queue_authkey())
+        _writer_clients.connection = connection
+        _writer_clients.pid = os.getpid()
+    try:
+        connection.send((op, args))
+    except OSError:
+        # Not delivered, so the caller may still write it directly
+        _writer_clients.connection = None
+        raise
+    # Allow a little over the writer's own timeout so its answer normally arrives first
+    timeout = app.config['WRITE_QUEUE_TIMEOUT'] * 2 + 1
+    try:
+        if not connection.poll(timeout):
+            # A late reply would answer the next request on this connection, so drop it
+            connection.close()
+            _writer_clients.connection = None
+            raise WriteQueueTimeout(f'Writer process did not answer within {timeout:g}s')
+        status, result = connection.recv()
+    except (OSError, EOFError) as e:
+        # Delivered, and possibly committed before the writer died: writing it
+        # again here could create a duplicate, so the request fails instead
+        _writer_clients.connection = None
+        raise WriteOutcomeUnknown(f'Writer process connection lost after the write was sent: {e!r}') from e
+    if status != 'ok':
+        raise RuntimeError(result)
+    return result
+
+def submit_write(op, *args):
+    """Apply a ticket mutation according to WRITE_QUEUE and return its result"""
+    mode = app.config['WRITE_QUEUE']
+    if mode == 'process':
+        try:
+            return _submit_remote(op, args)
+        except (OSError, EOFError) as e:
+            # Keep accepting writes if the writer process is unavailable; only
+            # raised when the mutation never reached it
+            logger.warning("Write queue unavailable (%s), writing directly", e)
+    elif mode == 'thread':
+        return write_coalescer.submit(op, *args)
+    
+    conn = get_db()
+    result = MUTATIONS[op](conn, *args)
+    conn.commit()
+    return result
+
+# Ticket cache. Entries are the serialized JSON body of GET /api/v1/tickets/<id>
+# and the data version read before it; update_ticket() deletes them from both
+# tiers after its write commits. Other workers' local tiers, or a read that raced
+# the update, may serve the previous version for up to TICKET_CACHE_TTL seconds,
+# always tagged with the entry's own version so revalidation can't extend that.
+class LocalTicketCache:
+    """Thread-safe LRU with per-entry expiry"""
+    
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + app.config['TICKET_CACHE_TTL'])
+            self.entries.move_to_end(key)
+            while len(self.entries) > app.config['TICKET_CACHE_SIZE']:
+                self.entries.popitem(last=False)
+                TICKET_CACHE_EVICTIONS.inc()
+    
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class MemoryStore:
+    """In-process stand-in for the shared store (TICKET_CACHE_URL=memory://).
+
+    Implements the subset of the redis client API the ticket cache uses.
+    """
+    
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            value, expires = self.values.get(key, (None, None))
+            if expires is not None and expires < time.monotonic():
+                del self.values[key]
+                return None
+            return value
+    
+    def set(self, key, value, px=None):
+        with self.lock:
+            self.values[key] = (value.encode(), time.monotonic() + px / 1000.0 if px else None)
+    
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.values.pop(key, None)
+
+local_ticket_cache = LocalTicketCache()
+_shared_stores = {}
+
+def shared_ticket_store():
+    """Client for TICKET_CACHE_URL, or None when no shared tier is configured"""
+    url = app.config['TICKET_CACHE_URL']
+    if not url:
+        return None
+    if url not in _shared_stores:
+        if url == 'memory://':
+            _shared_stores[url] = MemoryStore()
+        elif redis is None:
+            logger.warning("TICKET_CACHE_URL is set but the redis package is not installed")
+            _shared_stores[url] = None
+        else:
+            _shared_stores[url] = redis.Redis.from_url(url)
+    return _shared_stores[url]
+
+def cached_ticket(ticket_id):
+    """(data version, serialized ticket) from the local tier, then the shared tier, or None"""
+    if has_app_context() and g.get('bypass_ticket_cache'):
+        return None
+    local_key = (DATABASE, ticket_id)
+    if app.config['TICKET_CACHE_SIZE']:
+        entry = local_ticket_cache.get(local_key)
+        if entry is not None:
+            TICKET_CACHE_HITS.labels('local').inc()
+            return entry
+        TICKET_CACHE_MISSES.labels('local').inc()
+    
+    store = shared_ticket_store()
+    if store is None:
+        return None
+    try:
+        value = store.get(app.config['TICKET_CACHE_PREFIX'] + str(ticket_id))
+    except Exception as e:
+        logger.warning("Shared ticket cache unavailable: %s", e)
+        return None
+    # Shared values are "<version>\n<body>"; anything else is treated as a miss
+    version, _, body = (value or b'').decode().partition('\n')
+    if not version.isdigit():
+        TICKET_CACHE_MISSES.labels('shared').inc()
+        return None
+    TICKET_CACHE_HITS.labels('shared').inc()
+    if app.config['TICKET_CACHE_SIZE']:
+        local_ticket_cache.set(local_key, (version, body))
+    return version, body
+
+def cache_ticket(ticket_id, version, body):
+    if app.config['TICKET_CACHE_SIZE']:
+        local_ticket_cache.set((DATABASE, ticket_id), (version, body))
+    store = shared_ticket_store()
+    if store is not None:
+        try:
+            store.set(app.config['TICKET_CACHE_PREFIX'] + str(ticket_id), f'{version}\n{body}',
+                      px=int(app.config['TICKET_CACHE_TTL'] * 1000))
+        except Exception as e:
+            logger.warning("Shared ticket cache unavailable: %s", e)
+
+def invalidate_ticket(ticket_id):
+    local_ticket_cache.delete((DATABASE, ticket_id))
+    store = shared_ticket_store()
+    if store is not None:
+        try:
+            store.delete(app.config['TICKET_CACHE_PREFIX'] + str(ticket_id))
+        except Exception as e:
+            logger.warning("Shared ticket cache unavailable: %s", e)
+
+# Live update fan-out
+def read_events(conn, after_id, limit):
+    """Change log entries after after_id, oldest first"""
+    return conn.execute('SELECT id, event, ticket_id FROM ticket_events WHERE id > ? '
+                        'ORDER BY id LIMIT ?', (after_id, limit)).fetchall()
+
+class EventBroadcaster:
+    """Polls the change log once per process and fans events out to SSE streams.
+
+    Subscribers get (event, id, data) tuples on a bounded queue. A counters
+    event follows each batch that changed them. A subscriber whose queue is
+    full is sent None and dropped; its client reconnects and replays.
+    subscribe() returns None once EVENTS_MAX_STREAMS streams are open.
+    """
+    
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.pid = None
+    
+    def subscribe(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.subscribers = set()
+                # Read the starting point here so nothing committed after this
+                # subscriber's snapshot is skipped while the thread starts
+                conn = connect_db()
+                start_id = self.latest_id(conn)
+                conn.close()
+                threading.Thread(target=self.run, args=(start_id,), name='event-broadcaster',
+                                 daemon=True).start()
+                self.pid = os.getpid()
+            if len(self.subscribers) >= app.config['EVENTS_MAX_STREAMS']:
+                return None
+            subscription = queue.Queue(maxsize=app.config['EVENTS_QUEUE_SIZE'])
+            self.subscribers.add(subscription)
+        return subscription
+    
+    def open_streams(self):
+        return len(self.subscribers) if self.pid == os.getpid() else 0
+    
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+    
+    def publish(self, item):
+        with self.lock:
+            for subscription in list(self.subscribers):
+                try:
+                    subscription.put_nowait(item)
+                except queue.Full:
+                    self.subscribers.discard(subscription)
+                    # Make room for the sentinel that ends the stream
+                    subscription.get_nowait()
+                    subscription.put_nowait(None)
+    
+    @staticmethod
+    def latest_id(conn):
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM ticket_events').fetchone()[0]
+    
+    def run(self, last_id):
+        conn, path, counters = connect_db(), DATABASE, None
+        while True:
+            time.sleep(app.config['EVENTS_POLL_INTERVAL'])
+            try:
+                if path != DATABASE:
+                    conn, path = connect_db(), DATABASE
+                    last_id = self.latest_id(conn)
+                elif conn is None:
+                    conn = connect_db()
+                rows = read_events(conn, last_id, app.config['EVENTS_REPLAY_MAX'])
+                if not rows:
+                    continue
+                for row in rows:
+                    self.publish((row['event'], row['id'], {'ticket_id': row['ticket_id']}))
+                last_id = rows[-1]['id']
+                latest = read_counters(conn)
+                if latest != counters:
+                    counters = latest
+                    self.publish(('counters', None, counters))
+            except Exception as e:
+                logger.error("Event broadcaster poll failed: %s", e)
+                conn = None
+
+event_broadcaster = EventBroadcaster()
+
+def format_sse(event, event_id, data):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {app.json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+# Online snapshots
+SNAPSHOT_PATTERN = re.compile(r'^tickets-(\d{8})-(\d{6})-v(\d+)\.db(\.gz)?$')
+
+class SnapshotInProgress(Exception):
+    """Another process is already writing a snapshot to the backup directory"""
+
+def list_snapshots(directory=None):
+    """Snapshots in the backup directory, newest first"""
+    directory = directory or app.config['BACKUP_DIR']
+    snapshots = []
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        match = SNAPSHOT_PATTERN.match(name)
+        if match:
+            path = os.path.join(directory, name)
+            snapshots.append({
+                'name': name,
+                'path': path,
+                'taken_at': datetime.strptime(match[1] + match[2], '%Y%m%d%H%M%S').isoformat(),
+                'data_version': int(match[3]),
+                'compressed': bool(match[4]),
+                'bytes': os.path.getsize(path),
+            })
+    return sorted(snapshots, key=lambda snap: snap['name'], reverse=True)
+
+def rotate_snapshots(directory=None):
+    """Delete snapshots outside the retention policy and return their names"""
+    snapshots = list_snapshots(directory)
+    keep = {snap['name'] for snap in snapshots[:app.config['BACKUP_KEEP']]}
+    days = []
+    for snap in snapshots:
+        day = snap['taken_at'][:10]
+        if day not in days:
+            days.append(day)
+            if len(days) <= app.config['BACKUP_KEEP_DAILY']:
+                keep.add(snap['name'])
+    removed = []
+    for snap in snapshots:
+        if snap['name'] not in keep:
+            os.remove(snap['path'])
+            removed.append(snap['name'])
+    return removed
+
+def create_snapshot(directory=None, compress=None, force=False):
+    """Write a verified copy of the database to the backup directory.
+
+    The copy is taken from one read transaction, so it is a consistent
+    snapshot and concurrent writes (which go to the WAL) neither block nor
+    restart it. Pages are copied BACKUP_PAGES_PER_STEP at a time with a
+    short sleep between steps to leave I/O for requests. Unless force is
+    set, nothing is written if the newest snapshot already has the current
+    data version.
+    """
+    directory = directory or app.config['BACKUP_DIR']
+    compress = app.config['BACKUP_COMPRESS'] if compress is None else compress
+    os.makedirs(directory, exist_ok=True)
+    
+    with open(os.path.join(directory, '.snapshot.lock'), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise SnapshotInProgress(directory)
+        
+        start = time.perf_counter()
+        src = connect_db()
+        try:
+            src.execute('BEGIN')
+            version = data_version(src)
+            latest = list_snapshots(directory)[:1]
+            if latest and latest[0]['data_version'] == version and not force:
+                return dict(latest[0], skipped=True)
+            
+            name = f"tickets-{datetime.utcnow():%Y%m%d-%H%M%S}-v{version}.db"
+            partial = os.path.join(directory, name + '.partial')
+            dst = sqlite3.connect(partial)
+            try:
+                pause = app.config['BACKUP_STEP_SLEEP_MS'] / 1000.0
+                src.backup(dst, pages=app.config['BACKUP_PAGES_PER_STEP'],
+                           progress=lambda status, remaining, total: time.sleep(pause))
+                # Make the copy a standalone file rather than a WAL database
+                dst.execute('PRAGMA journal_mode=DELETE')
+                integrity = dst.execute('PRAGMA integrity_check').fetchone()[0]
+            except Exception:
+                dst.close()
+                os.remove(partial)
+                raise
+            dst.close()
+        finally:
+            src.close()
+        
+        if integrity != 'ok':
+            os.remove(partial)
+            raise RuntimeError(f'Snapshot failed integrity check: {integrity}')
+        if compress:
+            name += '.gz'
+            with open(partial, 'rb') as raw, gzip.open(partial + '.gz', 'wb', compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+            os.remove(partial)
+            partial += '.gz'
+        os.replace(partial, os.path.join(directory, name))
+        
+        BACKUP_LAST_SUCCESS.set_to_current_time()
+        snapshot = next(snap for snap in list_snapshots(directory) if snap['name'] == name)
+        snapshot.update(skipped=False, seconds=round(time.perf_counter() - start, 3),
+                        rotated=rotate_snapshots(directory))
+        logger.info("Snapshot written: %s (%d bytes)", name, snapshot['bytes'])
+        return snapshot
+
+# Archiving: closed tickets move out of the live table into one SQLite file per
+# month (by last update), keeping the hot table and its indexes small
+ARCHIVE_PATTERN = re.compile(r'^archive-(\d{4}-\d{2})\.db$')
+
+def archive_dir():
+    """Directory holding the archive files"""
+    if app.config['ARCHIVE_DIR']:
+        return app.config['ARCHIVE_DIR']
+    if app.config['REPLICATION_ROLE'] in ('writer', 'reader'):
+        return os.path.join(app.config['REPLICATION_LOG_DIR'], 'archive')
+    return os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'archive')
+
+def archive_periods():
+    """Months (YYYY-MM) that have an archive file, oldest first"""
+    directory = archive_dir()
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    return sorted(match[1] for match in map(ARCHIVE_PATTERN.match, names) if match)
+
+def connect_archive(period):
+    """Open a read-only connection to one month's archive file"""
+    path = os.path.join(archive_dir(), f'archive-{period}.db')
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def find_archived_ticket(conn, ticket_id):
+    """Return an archived ticket's row, or None if it was never archived"""
+    row = conn.execute('SELECT period FROM archived_tickets WHERE id = ?', (ticket_id,)).fetchone()
+    if row is None:
+        return None
+    archive = connect_archive(row[0])
+    try:
+        return archive.execute('SELECT * FROM tickets WHERE id = ?', (ticket_id,)).fetchone()
+    finally:
+        archive.close()
+
+def index_archived_tickets(conn, rows):
+    """Record rows (live tickets plus their period) in archived_tickets and
+    delete them from the live table, inside the caller's write transaction"""
+    conn.executemany(
+        'INSERT OR REPLACE INTO archived_tickets '
+        '(id, period, created_at, updated_at, status, category, priority) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(row['id'], row['period'], row['created_at'], row['updated_at'], row['status'],
+          row['category'], row['priority']) for row in rows])
+    # Cancel out the counters delete trigger: archived tickets still count
+    conn.executemany(
+        'INSERT INTO ticket_counters (dimension, value, count) VALUES (?, ?, 1) '
+        'ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count',
+        [('total', '') for _ in rows]
+        + [(dim, row[dim] or '') for row in rows for dim in COUNTER_DIMENSIONS])
+    conn.executemany('DELETE FROM tickets WHERE id = ?', [(row['id'],) for row in rows])
+
+def archive_closed_tickets(days=None):
+    """Move tickets resolved or closed more than days ago into the archive files.
+
+    Works in ARCHIVE_BATCH_SIZE batches, each under one write lock: rows are
+    committed to their archive file first, then indexed and deleted from the
+    live table, so an interrupted run only leaves duplicates that the next run
+    overwrites. Counters and rollups keep counting archived tickets.
+    """
+    if app.config['REPLICATION_ROLE'] == 'reader':
+        raise RuntimeError('Archiving runs on the writer; readers follow it through the change log')
+    days = app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat(sep=' ')
+    directory = archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    
+    start = time.perf_counter()
+    periods = {}
+    conn = connect_db()
+    try:
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    f"SELECT strftime('%Y-%m', updated_at) AS period, {', '.join(TICKET_FIELDS)} "
+                    f"FROM tickets WHERE status IN ({', '.join('?' for _ in RESOLVED_STATUSES)}) "
+                    "AND datetime(updated_at) < datetime(?) ORDER BY id LIMIT ?",
+                    RESOLVED_STATUSES + (cutoff, app.config['ARCHIVE_BATCH_SIZE'])).fetchall()
+                if not rows:
+                    conn.rollback()
+                    break
+                
+                by_period = {}
+                for row in rows:
+                    by_period.setdefault(row['period'], []).append(row)
+                for period, batch in by_period.items():
+                    archive = sqlite3.connect(os.path.join(directory, f'archive-{period}.db'))
+                    try:
+                        archive.execute(TICKETS_TABLE_SQL)
+                        archive.executemany(
+                            f'INSERT OR REPLACE INTO tickets ({", ".join(TICKET_FIELDS)}) '
+                            f'VALUES ({", ".join("?" for _ in TICKET_FIELDS)})',
+                            [tuple(row[field] for field in TICKET_FIELDS) for row in batch])
+                        archive.commit()
+                    finally:
+                        archive.close()
+                    periods[period] = periods.get(period, 0) + len(batch)
+                
+                index_archived_tickets(conn, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if len(rows) < app.config['ARCHIVE_BATCH_SIZE']:
+                break
+    finally:
+        conn.close()
+    
+    summary = {'archived': sum(periods.values()), 'periods': periods, 'cutoff': cutoff,
+               'seconds': round(time.perf_counter() - start, 3)}
+    logger.info("Archived %d tickets closed before %s", summary['archived'], cutoff)
+    return summary
+
+# Admission control: shared per-client token buckets and per-worker in-flight
+# limits, checked before any other request work. Requests are sorted into lanes;
+# the priority lane (health checks, metrics) is never refused.
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ADMISSION_PRIORITY_ENDPOINTS = {'health_check', 'api_health', 'prometheus_metrics', 'get_replication', 'static'}
+# A stream's request ends before its body is sent, so it can't hold a slot here;
+# open streams are counted from event_broadcaster instead (see InflightLimiter)
+ADMISSION_UNCOUNTED_ENDPOINTS = {'ticket_events'}
+
+class TokenBuckets:
+    """Fixed table of token buckets in shared memory, shared by forked workers.
+
+    Clients hash to one of ADMISSION_BUCKET_SLOTS slots of (tokens, last
+    refill); two clients that collide share a bucket. setup() must run
+    before gunicorn forks for workers to share it: create_app does this for
+    the WSGI app, and gunicorn's when_ready for both modes, since ASGI
+    workers only run create_app after the fork.
+    """
+    
+    def __init__(self):
+        self.map = None
+        self.values = None
+        self.lock = None
+        self.slots = 0
+    
+    def setup(self):
+        if self.map is None:
+            self.slots = app.config['ADMISSION_BUCKET_SLOTS']
+            self.map = mmap.mmap(-1, self.slots * 16)
+            self.values = memoryview(self.map).cast('d')
+            self.lock = multiprocessing.Lock()
+    
+    def reset(self):
+        self.setup()
+        with self.lock:
+            self.map[:] = bytes(len(self.map))
+    
+    def take(self, key, rate, burst):
+        """Take a token from key's bucket; return 0 if granted, else seconds until one is available"""
+        self.setup()
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        slot = 2 * (int.from_bytes(digest, 'little') % self.slots)
+        now = time.monotonic()
+        with self.lock:
+            stamp = self.values[slot + 1]
+            tokens = burst if not stamp else min(burst, self.values[slot] + (now - stamp) * rate)
+            granted = tokens >= 1
+            self.values[slot] = tokens - 1 if granted else tokens
+            self.values[slot + 1] = now
+        return 0.0 if granted else (1 - tokens) / rate
+
+token_buckets = TokenBuckets()
+
+class InflightLimiter:
+    """Per-worker count of admitted requests, capped by lane.
+
+    Reads may hold ADMISSION_MAX_INFLIGHT_READS slots, reads, writes and
+    open event streams together ADMISSION_MAX_INFLIGHT. Keeping both below
+    the worker's threads leaves some for writes and for the priority lane.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.total = 0
+    
+    def acquire(self, lane):
+        with self.lock:
+            if self.total + event_broadcaster.open_streams() >= app.config['ADMISSION_MAX_INFLIGHT']:
+                return False
+            if lane == 'read':
+                if self.reads >= app.config['ADMISSION_MAX_INFLIGHT_READS']:
+                    return False
+                self.reads += 1
+            self.total += 1
+            return True
+    
+    def release(self, lane):
+        with self.lock:
+            self.total -= 1
+            if lane == 'read':
+                self.reads -= 1
+
+inflight_limiter = InflightLimiter()
+
+def admission_client():
+    """Key identifying the client for rate limits"""
+    header = app.config['ADMISSION_CLIENT_HEADER']
+    if header and request.headers.get(header):
+        # X-Forwarded-For style lists start with the original client
+        return request.headers[header].split(',')[0].strip()
+    return request.remote_addr or ''
+
+def admission_lane():
+    if request.endpoint in ADMISSION_PRIORITY_ENDPOINTS:
+        return 'priority'
+    return 'read' if request.method in READ_METHODS else 'write'
+
+def refuse_request(lane, reason, status, retry_after, message):
+    ADMISSION_REJECTED.labels(lane, reason).inc()
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+@app.before_request
+def admit_request():
+    """Refuse requests over the client's rate (429) or the worker's capacity (503)"""
+    if not app.config['ADMISSION_CONTROL']:
+        return None
+    lane = admission_lane()
+    if lane == 'priority':
+        return None
+    
+    rate, burst = app.config[f'ADMISSION_{lane.upper()}_RATE'], app.config[f'ADMISSION_{lane.upper()}_BURST']
+    if rate > 0:
+        wait = token_buckets.take(f'{lane}:{admission_client()}', rate, burst)
+        if wait:
+            return refuse_request(lane, 'rate_limited', 429, wait, 'Too many requests, slow down')
+    
+    if request.endpoint in ADMISSION_UNCOUNTED_ENDPOINTS:
+        return None
+    if not inflight_limiter.acquire(lane):
+        return refuse_request(lane, 'overloaded', 503, 1, 'Server busy, retry shortly')
+    g.admission_lane = lane
+    return None
+
+@app.teardown_request
+def release_admission(exception=None):
+    lane = g.pop('admission_lane', None)
+    if lane is not None:
+        inflight_limiter.release(lane)
+
+# Replication: the writer ships committed ticket changes to a shared directory
+# as an append-only log, and readers tail it into a local copy of the database.
+#   base-<seq>.db       consistent copy of the writer's database as of change <seq>
+#   changes-<seq>.log   NDJSON {"seq", "ts", "id", "ticket", "archived"} entries, the
+#                       first one being <seq>: ticket is the row's current image (null
+#                       once deleted) and archived its archive period, if it has one
+#   head.json           last shipped change, replaced atomically after each batch
+REPLICATION_BASE_PATTERN = re.compile(r'^base-(\d+)\.db$')
+REPLICATION_SEGMENT_PATTERN = re.compile(r'^changes-(\d+)\.log$')
+
+# Applied on readers as an upsert, so the usual insert/update triggers keep the
+# replica's counters, search index, rollups and event log in step
+REPLICA_UPSERT_SQL = (f'INSERT INTO tickets ({", ".join(TICKET_FIELDS)}) '
+                      f'VALUES ({", ".join("?" for _ in TICKET_FIELDS)}) ON CONFLICT (id) DO UPDATE SET '
+                      + ', '.join(f'{field} = excluded.{field}' for field in TICKET_FIELDS[1:]))
+
+def apply_replica_entries(conn, entries):
+    """Replay shipped entries in order, inside the caller's write transaction.
+
+    An archived ticket is upserted and then archived the way the writer did it,
+    so counters and rollups end up the same; a reader that already indexed it
+    skips the entry. Runs of plain upserts go to the database together.
+    """
+    def kind(entry):
+        if entry.get('archived') and entry['ticket']:
+            return 'archived'
+        return 'upsert' if entry['ticket'] else 'delete'
+    
+    for action, run in itertools.groupby(entries, key=kind):
+        run = list(run)
+        if action == 'upsert':
+            conn.executemany(REPLICA_UPSERT_SQL, [tuple(entry['ticket'][field] for field in TICKET_FIELDS)
+                                                  for entry in run])
+        elif action == 'delete':
+            # Entries shipped before deletes were logged carry no id
+            conn.executemany('DELETE FROM tickets WHERE id = ?',
+                             [(entry['id'],) for entry in run if entry.get('id') is not None])
+        else:
+            for entry in run:
+                if conn.execute('SELECT 1 FROM archived_tickets WHERE id = ?', (entry['id'],)).fetchone():
+                    continue
+                conn.execute(REPLICA_UPSERT_SQL, tuple(entry['ticket'][field] for field in TICKET_FIELDS))
+                index_archived_tickets(conn, [dict(entry['ticket'], period=entry['archived'])])
+
+class ReplicationGap(Exception):
+    """The log no longer holds the changes following a replica's position"""
+
+def replication_files(pattern, directory=None):
+    """(seq, path) of the base or segment files in the log directory, oldest first"""
+    directory = directory or app.config['REPLICATION_LOG_DIR']
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    return sorted((int(match[1]), os.path.join(directory, match[0]))
+                  for match in map(pattern.match, names) if match)
+
+def read_replication_head(directory=None):
+    try:
+        with open(os.path.join(directory or app.config['REPLICATION_LOG_DIR'], 'head.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def committed_seq(conn):
+    """Id of the newest ticket_events row ever written; pruning doesn't lower it"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ticket_events'").fetchone()
+    return row[0] if row else 0
+
+def replica_position(conn):
+    """The local copy's replication_state row (seq, source_ts, applied_at), or None"""
+    return conn.execute('SELECT seq, source_ts, applied_at FROM replication_state WHERE id = 1').fetchone()
+
+class ChangeShipper:
+    """Ships committed changes from the writer's database to the log directory.
+
+    Tails ticket_events, which triggers fill on every write path, and appends
+    the current image of each changed ticket. A base copy is written on first
+    start, every REPLICATION_SEGMENT_ENTRIES changes (with a new segment) and
+    whenever event pruning overtook the shipper. The two newest bases and the
+    segments needed to replay from the older one are kept.
+    """
+    
+    BATCH = 500
+    
+    def __init__(self, directory=None, database=None):
+        self.directory = directory or app.config['REPLICATION_LOG_DIR']
+        self.database = database
+        self.seq = None
+        self.segment = None
+        self.entries = 0
+    
+    def start(self, conn):
+        os.makedirs(self.directory, exist_ok=True)
+        head = read_replication_head(self.directory)
+        if (head is None or not replication_files(REPLICATION_BASE_PATTERN, self.directory)
+                or committed_seq(conn) < head['seq']):
+            self.rebase()
+            return
+        # Entries after head may be half-written, so resume in a fresh segment;
+        # readers skip anything they already applied
+        self.seq = head['seq']
+        self.new_segment()
+    
+    def rebase(self):
+        """Restart the log from a new base; readers older than it must resync"""
+        self.seq = self.write_base()
+        self.new_segment()
+    
+    def new_segment(self):
+        self.segment = os.path.join(self.directory, f'changes-{self.seq + 1:012d}.log')
+        open(self.segment, 'w').close()
+        self.entries = 0
+        self.write_head()
+    
+    def write_head(self):
+        path = os.path.join(self.directory, 'head.json')
+        with open(path + '.partial', 'w') as f:
+            json.dump({'seq': self.seq, 'time': time.time(), 'segment': os.path.basename(self.segment)}, f)
+        os.replace(path + '.partial', path)
+    
+    def write_base(self):
+        """Copy the database from one read transaction and return its change seq"""
+        src = connect_db(self.database)
+        try:
+            src.execute('BEGIN')
+            seq = committed_seq(src)
+            path = os.path.join(self.directory, f'base-{seq:012d}.db')
+            dst = sqlite3.connect(path + '.partial')
+            try:
+                src.backup(dst)
+                dst.execute('PRAGMA journal_mode=DELETE')
+            finally:
+                dst.close()
+            os.replace(path + '.partial', path)
+        finally:
+            src.close()
+        self.prune()
+        logger.info("Replication base written at change %d", seq)
+        return seq
+    
+    def prune(self):
+        bases = replication_files(REPLICATION_BASE_PATTERN, self.directory)
+        for _, path in bases[:-2]:
+            os.remove(path)
+        oldest = bases[-2:][0][0]
+        segments = replication_files(REPLICATION_SEGMENT_PATTERN, self.directory)
+        # A segment is obsolete once the next one starts at or before the oldest base
+        for (_, path), (following, _) in zip(segments, segments[1:]):
+            if following <= oldest + 1:
+                os.remove(path)
+    
+    def ship_once(self, conn):
+        """Append the next batch of changes and return how many were shipped"""
+        conn.execute('BEGIN')
+        try:
+            oldest = conn.execute('SELECT MIN(id) FROM ticket_events').fetchone()[0]
+            events = read_events(conn, self.seq, self.BATCH)
+            ids = sorted({row['ticket_id'] for row in events})
+            tickets = {row['id']: dict(row) for row in conn.execute(
+                f'SELECT * FROM tickets WHERE id IN ({", ".join("?" for _ in ids)})', ids)} if ids else {}
+            gone = [ticket_id for ticket_id in ids if ticket_id not in tickets]
+            archived = dict(conn.execute(
+                f'SELECT id, period FROM archived_tickets WHERE id IN ({", ".join("?" for _ in gone)})',
+                gone).fetchall()) if gone else {}
+        finally:
+            conn.rollback()
+        # Archive files are written before the index, so every indexed row is there
+        for period in set(archived.values()):
+            archive = connect_archive(period)
+            try:
+                wanted = [ticket_id for ticket_id, where in archived.items() if where == period]
+                tickets.update((row['id'], dict(row)) for row in archive.execute(
+                    f'SELECT * FROM tickets WHERE id IN ({", ".join("?" for _ in wanted)})', wanted))
+            finally:
+                archive.close()
+        if oldest is not None and oldest > self.seq + 1:
+            logger.warning("Change log pruned past change %d; writing a new base", self.seq)
+            self.rebase()
+            return 0
+        if not events:
+            return 0
+        
+        shipped_at = time.time()
+        with open(self.segment, 'a') as f:
+            f.writelines(json.dumps({'seq': row['id'], 'ts': shipped_at, 'id': row['ticket_id'],
+                                     'ticket': tickets.get(row['ticket_id']),
+                                     'archived': archived.get(row['ticket_id'])}) + '\n' for row in events)
+            f.flush()
+            os.fsync(f.fileno())
+        self.seq = events[-1]['id']
+        self.entries += len(events)
+        if self.entries >= app.config['REPLICATION_SEGMENT_ENTRIES']:
+            self.write_base()
+            self.new_segment()
+        else:
+            self.write_head()
+        return len(events)
+    
+    def run(self, once=False):
+        """Ship changes until stopped, or until caught up when once is set"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.shipper.lock'), 'w') as lock:
+            # One shipper per log directory; a second one waits as a standby
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            conn = connect_db(self.database)
+            self.start(conn)
+            logger.info("Shipping changes to %s from change %d", self.directory, self.seq)
+            while True:
+                try:
+                    if self.ship_once(conn):
+                        continue
+                except Exception as e:
+                    logger.error("Change shipping failed: %s", e)
+                if once:
+                    return self.seq
+                time.sleep(app.config['REPLICATION_POLL_INTERVAL'])
+
+class ReplicaApplier:
+    """Applies shipped changes to a reader's local copy of the database"""
+    
+    READ_BYTES = 4 * 1024 * 1024
+    
+    def __init__(self, directory=None, database=None):
+        self.directory = directory or app.config['REPLICATION_LOG_DIR']
+        self.database = database
+        self.seq = None
+        self.segment = None
+        self.offset = 0
+    
+    def bootstrap(self):
+        """Create the local copy from the newest base unless it is one already"""
+        path = self.database or DATABASE
+        if os.path.exists(path):
+            conn = connect_db(path)
+            try:
+                try:
+                    if replica_position(conn) is not None:
+                        return
+                except sqlite3.OperationalError:
+                    pass
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tickets'").fetchone() and \
+                        conn.execute('SELECT 1 FROM tickets LIMIT 1').fetchone():
+                    raise RuntimeError(f'{path} holds tickets but is not a replica; refusing to replace it')
+            finally:
+                conn.close()
+        
+        bases = replication_files(REPLICATION_BASE_PATTERN, self.directory)
+        if not bases:
+            raise RuntimeError(f'No replication base in {self.directory}; is the writer shipping?')
+        seq, base = bases[-1]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        shutil.copyfile(base, path + '.partial')
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.replace(path + '.partial', path)
+        
+        conn = connect_db(path)
+        try:
+            apply_migrations(conn)
+            conn.execute('INSERT OR REPLACE INTO replication_state (id, seq, applied_at) VALUES (1, ?, ?)',
+                         (seq, time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info("Replica bootstrapped from %s", os.path.basename(base))
+    
+    def read_segment(self):
+        """Complete entries past the read offset that haven't been applied"""
+        try:
+            with open(self.segment[1], 'rb') as f:
+                # The shipper truncates a segment it restarts in
+                if os.fstat(f.fileno()).st_size < self.offset:
+                    self.offset = 0
+                f.seek(self.offset)
+                data = f.read(self.READ_BYTES)
+        except FileNotFoundError:
+            raise ReplicationGap(f'segment {os.path.basename(self.segment[1])} was pruned')
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        entries = (json.loads(line) for line in data[:end].splitlines())
+        return [entry for entry in entries if entry['seq'] > self.seq]
+    
+    def apply_once(self, conn):
+        """Apply the next batch of shipped changes and return how many were read"""
+        if self.seq is None:
+            self.seq = replica_position(conn)['seq']
+        if self.segment is None:
+            segments = replication_files(REPLICATION_SEGMENT_PATTERN, self.directory)
+            candidates = [segment for segment in segments if segment[0] <= self.seq + 1]
+            if not candidates:
+                if segments:
+                    raise ReplicationGap(f'log starts after change {self.seq + 1}')
+                return 0
+            self.segment, self.offset = candidates[-1], 0
+        
+        entries = self.read_segment()
+        if not entries:
+            later = [segment for segment in replication_files(REPLICATION_SEGMENT_PATTERN, self.directory)
+                     if segment[0] > self.segment[0]]
+            # Once a newer segment exists this one is complete; read its tail first
+            entries = self.read_segment() if later else []
+            if later and not entries:
+                if later[0][0] > self.seq + 1:
+                    raise ReplicationGap(f'log skips from change {self.seq} to {later[0][0]}')
+                self.segment, self.offset = later[0], 0
+                entries = self.read_segment()
+        if not entries:
+            return 0
+        
+        last = entries[-1]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            apply_replica_entries(conn, entries)
+            conn.execute('UPDATE replication_state SET seq = ?, source_ts = ?, applied_at = ? WHERE id = 1',
+                         (last['seq'], last['ts'], time.time()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.seq = last['seq']
+        return len(entries)
+    
+    def run(self, once=False):
+        """Apply changes until stopped, or until caught up when once is set"""
+        path = self.database or DATABASE
+        with open(path + '.applier.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            conn = connect_db(path)
+            logger.info("Applying changes from %s", self.directory)
+            while True:
+                try:
+                    if self.apply_once(conn):
+                        continue
+                except ReplicationGap as e:
+                    # Nothing to do but wait for an operator to resync this replica
+                    logger.error("Replica needs a resync (delete %s and restart): %s", path, e)
+                    self.segment = None
+                    if once:
+                        raise
+                    time.sleep(max(app.config['REPLICATION_POLL_INTERVAL'], 5))
+                    continue
+                except Exception as e:
+                    logger.error("Applying changes failed: %s", e)
+                    self.seq = self.segment = None
+                if once:
+                    return self.seq
+                time.sleep(app.config['REPLICATION_POLL_INTERVAL'])
+
+def run_change_shipper():
+    ChangeShipper().run()
+
+def run_replica_applier():
+    ReplicaApplier().run()
+
+def replication_status(conn):
+    """Role, position and lag of this instance; lag_seconds is an upper bound while behind"""
+    role = app.config['REPLICATION_ROLE']
+    if role not in ('writer', 'reader'):
+        return {'role': 'off'}
+    head = read_replication_head() or {}
+    now = time.time()
+    if role == 'writer':
+        position = head.get('seq', 0)
+        lag_entries = max(0, committed_seq(conn) - position)
+        lag_seconds = now - head['time'] if lag_entries and head else 0.0
+    else:
+        state = replica_position(conn)
+        position = state['seq']
+        lag_entries = max(0, head.get('seq', position) - position)
+        if lag_entries:
+            lag_seconds = now - (state['source_ts'] or state['applied_at'])
+        else:
+            lag_seconds = state['applied_at'] - state['source_ts'] if state['source_ts'] else 0.0
+    return {'role': role, 'position': position, 'lag_entries': lag_entries,
+            'lag_seconds': round(max(0.0, lag_seconds), 3), 'head': head or None}
+
+# Served by a reader even when its copy is behind the client's last write; the
+# event stream follows the local copy, which catches up within a poll or two
+REPLICA_LOCAL_ENDPOINTS = {'health_check', 'api_health', 'prometheus_metrics', 'get_replication', 'static',
+                           'ticket_events'}
+
+# Hop-by-hop headers (RFC 9110 section 7.6.1) and those the forwarding hop sets itself
+FORWARD_SKIP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+                        'trailer', 'transfer-encoding', 'upgrade', 'host', 'content-length'}
+
+writer_session = requests.Session()
+
+def forward_to_writer():
+    """Replay the request on the writer and stream its response back unchanged.
+
+    The client stays on this origin, so the writer's helpdesk_seq cookie is
+    set for the reader's host and the dashboard needs no cross-origin calls.
+    """
+    headers = {name: value for name, value in request.headers if name.lower() not in FORWARD_SKIP_HEADERS}
+    # The writer rate-limits by this (ADMISSION_CLIENT_HEADER), not by the reader's address
+    headers['X-Forwarded-For'] = admission_client()
+    try:
+        upstream = writer_session.request(
+            request.method, app.config['REPLICATION_WRITER_URL'].rstrip('/') + request.full_path.rstrip('?'),
+            headers=headers, data=request.get_data(), stream=True, allow_redirects=False,
+            timeout=app.config['REPLICATION_FORWARD_TIMEOUT'])
+    except requests.RequestException as e:
+        logger.error("Forwarding %s %s to the writer failed: %s", request.method, request.path, e)
+        return jsonify({'error': 'Writer unavailable'}), 502
+    response = Response(upstream.raw.stream(64 * 1024, decode_content=False), status=upstream.status_code,
+                        headers=[(name, value) for name, value in upstream.raw.headers.items()
+                                 if name.lower() not in FORWARD_SKIP_HEADERS])
+    # Already encoded by the writer; compress_response leaves it alone
+    response.direct_passthrough = True
+    response.call_on_close(upstream.close)
+    return response
+
+@app.before_request
+def route_replica_request():
+    """On a reader, forward writes, and reads that need a newer copy, to the writer"""
+    if app.config['REPLICATION_ROLE'] != 'reader' or request.endpoint in REPLICA_LOCAL_ENDPOINTS:
+        return None
+    if request.method in READ_METHODS:
+        try:
+            wanted = int(request.headers.get('X-Replication-Seq') or request.cookies.get('helpdesk_seq') or 0)
+        except ValueError:
+            wanted = 0
+        if not wanted:
+            return None
+        if wanted <= replica_position(get_db())['seq']:
+            # Caught up with the client's write; cached bodies may predate it
+            g.bypass_ticket_cache = True
+            return None
+    if not app.config['REPLICATION_WRITER_URL']:
+        return jsonify({'error': 'Read-only replica (REPLICATION_WRITER_URL not set)'}), 503
+    return forward_to_writer()
+
+@app.after_request
+def mark_replication_position(response):
+    """On the writer, hand clients the change their write produced for read-your-writes"""
+    if (app.config['REPLICATION_ROLE'] == 'writer' and request.method not in READ_METHODS
+            and response.status_code < 400):
+        seq = str(committed_seq(get_db()))
+        response.headers['X-Replication-Seq'] = seq
+        # Explicit path: without one the cookie would only cover the written URL's directory
+        response.set_cookie('helpdesk_seq', seq, max_age=app.config['REPLICATION_RYW_SECONDS'], path='/',
+                            httponly=True, samesite='Lax')
+    return response
 
 # Decorator for error handling
 def handle_errors(f):
@@ -89,17 +2155,282 @@ def handle_errors(f):
         try:
             return f(*args, **kwargs)
         except Exception as e:
-            logger.error(f"Error in {f.__name__}: {str(e)}")
+            logger.error("Error in %s: %s", f.__name__, e)
             return jsonify({'error': str(e)}), 500
     return decorated_function
 
-# Initialize database on app startup
-@app.before_request
-def ensure_db():
-    """Ensure database exists before handling request"""
-    if not hasattr(app, 'db_initialized'):
-        init_db()
-        app.db_initialized = True
+def require_admin(f):
+    """Allow the request only with Authorization: Bearer <ADMIN_TOKEN>"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = app.config['ADMIN_TOKEN']
+        if not token:
+            return jsonify({'error': 'Admin API disabled (ADMIN_TOKEN not set)'}), 403
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Decorator for ETag / If-None-Match handling on read endpoints
+def conditional_get(f=None, vary=None):
+    """Answer If-None-Match with 304 while the data version is unchanged.
+
+    vary, for views whose result also depends on something else (such as the
+    clock), returns a string that is mixed into the ETag.
+    """
+    if f is None:
+        return lambda f: conditional_get(f, vary)
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Read the version before the data: a write landing in between only makes
+        # the tag older than the body, which costs the client one extra 200
+        etag = g.data_version = str(data_version(get_db()))
+        if vary is not None:
+            etag = f'{etag}-{vary()}'
+        if etag_matches(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        # A view serving an older cached body lowers g.etag_version to match it
+        response.set_etag(g.get('etag_version', etag))
+        response.headers['Cache-Control'] = app.config['API_CACHE_CONTROL']
+        return response
+    return decorated_function
+
+class SingleFlight:
+    """At most one call per key at a time; callers arriving meanwhile wait for its result"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn):
+        """Return (result, shared), shared being True when another caller's run was reused"""
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            with self.lock:
+                del self.calls[key]
+            future.set_exception(e)
+            raise
+        # Later callers start a fresh run; only the ones already waiting share this one
+        with self.lock:
+            del self.calls[key]
+        future.set_result(result)
+        return result, False
+
+read_flights = SingleFlight()
+
+def coalesce(f):
+    """Answer identical concurrent requests from one run of the view
+
+    Goes under @conditional_get: the key holds the data version it read, so a
+    follower never gets a body older than its own ETag. Followers get copies of
+    the leader's body, status and headers; if the leader raises, so do they.
+    The key also holds the negotiated content-coding and the leader compresses,
+    so followers share the encoded body rather than each compressing it again.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not app.config['READ_COALESCING']:
+            return f(*args, **kwargs)
+        encoding = negotiated_encoding()
+        key = (DATABASE, request.endpoint, g.get('data_version'), encoding,
+               tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+        
+        def run():
+            response = make_response(f(*args, **kwargs))
+            if encoding and response.status_code == 200:
+                encode_response(response, encoding)
+            return response.get_data(), response.status_code, list(response.headers.items())
+        
+        (body, status, headers), shared = read_flights.do(key, run)
+        COALESCED_READS.labels(request.endpoint, 'follower' if shared else 'leader').inc()
+        return app.response_class(body, status=status, headers=headers)
+    return decorated_function
+
+def etag_matches(etag):
+    """True if If-None-Match names this version in any content-coding (see compress_response)"""
+    return any(request.if_none_match.contains(etag + suffix) for suffix in ('', '-gzip', '-deflate'))
+
+# Response compression. Runs before record_request_metrics (after_request hooks
+# run in reverse), so compression time is part of the recorded latency.
+COMPRESSED_ENDPOINTS = {'get_tickets', 'search_tickets', 'prometheus_metrics', 'get_metrics'}
+
+def negotiated_encoding():
+    """The content-coding this request's response will get, or None"""
+    if request.endpoint not in COMPRESSED_ENDPOINTS:
+        return None
+    return request.accept_encodings.best_match(['gzip', 'deflate'])
+
+def encode_response(response, encoding):
+    """Encode response's body in place unless it is under COMPRESS_MIN_SIZE"""
+    body = response.get_data()
+    if len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return
+    level = app.config['COMPRESS_LEVEL']
+    if encoding == 'gzip':
+        response.set_data(gzip.compress(body, compresslevel=level, mtime=0))
+    else:
+        response.set_data(zlib.compress(body, level))
+    response.content_encoding = encoding
+
+@app.after_request
+def compress_response(response):
+    """gzip/deflate-encode large bodies from COMPRESSED_ENDPOINTS when the client accepts it"""
+    if request.endpoint not in COMPRESSED_ENDPOINTS or response.direct_passthrough:
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200:
+        return response
+    # Coalesced reads arrive already encoded (see coalesce)
+    if not response.content_encoding:
+        encoding = negotiated_encoding()
+        if encoding is None:
+            return response
+        encode_response(response, encoding)
+    if response.content_encoding:
+        # The encoded body is a different representation, so it needs its own strong tag
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{response.content_encoding}', weak)
+    return response
+
+# Validation helpers
+def validate_ticket(data):
+    """Return an error message for an invalid new-ticket payload, or None if valid"""
+    if not isinstance(data, dict):
+        return 'Ticket must be a JSON object'
+    
+    if not all(field in data for field in REQUIRED_FIELDS):
+        return 'Missing required fields'
+    
+    if data['category'] not in VALID_CATEGORIES:
+        return f'Invalid category. Must be one of {VALID_CATEGORIES}'
+    
+    if data['priority'] not in VALID_PRIORITIES:
+        return f'Invalid priority. Must be one of {VALID_PRIORITIES}'
+    
+    return None
+
+def ticket_values(data):
+    """Parameters for INSERT_TICKET_SQL from a validated payload"""
+    return tuple(data[field] for field in REQUIRED_FIELDS)
+
+# Search helpers
+def fts_query(text):
+    """Turn free text into an FTS5 query matching all terms, with no operator syntax"""
+    terms = ['"' + term.replace('"', '""') + '"' for term in text.split()]
+    if not terms:
+        raise ValueError('q must contain at least one search term')
+    return ' '.join(terms)
+
+# Pagination helpers
+def encode_cursor(created_at, ticket_id):
+    """Encode the (created_at, id) keyset position of the last row on a page"""
+    raw = json.dumps([created_at, ticket_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, ticket_id = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(created_at, str) or not isinstance(ticket_id, int):
+        raise ValueError('Invalid cursor')
+    return created_at, ticket_id
+
+def parse_fields(fields):
+    """Parse a comma-separated field projection, always keeping the ticket id"""
+    if not fields:
+        return list(TICKET_FIELDS)
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in TICKET_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields {unknown}. Must be among {list(TICKET_FIELDS)}')
+    return ['id'] + [f for f in TICKET_FIELDS if f in requested and f != 'id']
+
+def parse_limit(limit):
+    """Parse a page size, clamping it to TICKETS_MAX_PAGE_SIZE"""
+    if limit is None:
+        return app.config['TICKETS_PAGE_SIZE']
+    try:
+        value = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if value < 1:
+        raise ValueError('limit must be positive')
+    return min(value, app.config['TICKETS_MAX_PAGE_SIZE'])
+
+# Analytics helpers
+def parse_time_range():
+    """Return (start, end) datetimes from the from/to query args (default: the last 7 days)"""
+    bounds = {}
+    for name in ('from', 'to'):
+        value = request.args.get(name)
+        if value:
+            try:
+                bound = datetime.fromisoformat(value.rstrip('Z'))
+            except ValueError:
+                raise ValueError(f"Invalid '{name}': use an ISO 8601 date or date-time")
+            # Buckets are naive UTC, so convert values given with an offset
+            if bound.tzinfo is not None:
+                bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+            bounds[name] = bound
+    # The default window ends at the next hour boundary: it covers the same
+    # buckets as ending now, but only moves when a bucket enters or leaves it
+    end = bounds.get('to') or datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    start = bounds.get('from') or end - timedelta(days=7)
+    if start >= end:
+        raise ValueError("'from' must be before 'to'")
+    return start, end
+
+def rollup_summary(row):
+    """Derived figures for one group of summed rollup columns"""
+    created, resolved, seconds, breaches = (row[key] or 0 for key in ('created', 'resolved', 'seconds', 'breaches'))
+    return {
+        'created': created,
+        'resolved': resolved,
+        'mean_resolution_hours': round(seconds / resolved / 3600, 2) if resolved else None,
+        'sla_breaches': breaches,
+        'sla_breach_rate': round(breaches / resolved, 4) if resolved else None,
+    }
+
+# Application startup
+def create_app(config=None):
+    """Prepare logging and the database schema, then return the application.
+
+    Gunicorn loads ``src.app:create_app()`` once in the master (preload_app),
+    so schema setup happens at startup instead of on each worker's first
+    request, and importing this module has no filesystem side effects.
+    """
+    if config:
+        app.config.update(config)
+    configure_logging()
+    # Before gunicorn forks, so every worker shares the same buckets
+    token_buckets.setup()
+    if app.config['REPLICATION_ROLE'] == 'reader':
+        ReplicaApplier().bootstrap()
+    init_db()
+    prepare_frontend()
+    return app
+
+def on_worker_start():
+    """Per-worker setup after a gunicorn fork (pooled connections are already per-pid)"""
+    start_log_listener()
 
 # HTML Frontend Template
 HTML_TEMPLATE = """
@@ -293,14 +2624,22 @@ HTML_TEMPLATE = """
 
         // Load initial data
         function loadDashboard() {
-            fetch(API_BASE + '/tickets')
-                .then(r => r.json())
+            fetch(API_BASE + '/dashboard')
+                .then(r => {
+                    // Shed or rate limited: come back when told to, with jitter
+                    if (r.status === 429 || r.status === 503) {
+                        const wait = parseInt(r.headers.get('Retry-After') || '1', 10) * 1000;
+                        setTimeout(loadDashboard, wait + Math.random() * 1000);
+                        throw new Error('Server busy');
+                    }
+                    return r.json();
+                })
                 .then(data => {
-                    const tickets = data.tickets || [];
-                    document.getElementById('totalTickets').textContent = tickets.length;
-                    document.getElementById('openTickets').textContent = tickets.filter(t => t.status === 'open').length;
-                    document.getElementById('closedTickets').textContent = tickets.filter(t => t.status === 'closed').length;
-                    renderTickets(tickets.slice(0, 5));
+                    const counts = data.counts || {};
+                    document.getElementById('totalTickets').textContent = counts.total || 0;
+                    document.getElementById('openTickets').textContent = counts.open || 0;
+                    document.getElementById('closedTickets').textContent = counts.closed || 0;
+                    renderTickets(data.recent_tickets || []);
                 })
                 .catch(err => console.error('Error loading dashboard:', err));
         }
@@ -340,10 +2679,9 @@ HTML_TEMPLATE = """
             })
             .then(r => r.json())
             .then(data => {
-                if (data.id) {
-                    document.getElementById('submitAlert').innerHTML = '<div class="alert alert-success">✓ Ticket submitted successfully! ID: ' + data.id + '</div>';
+                if (data.ticket_id) {
+                    document.getElementById('submitAlert').innerHTML = '<div class="alert alert-success">✓ Ticket submitted successfully! ID: ' + data.ticket_id + '</div>';
                     document.getElementById('ticketForm').reset();
-                    setTimeout(() => loadDashboard(), 500);
                 } else {
                     throw new Error(data.error || 'Error submitting ticket');
                 }
@@ -353,19 +2691,94 @@ HTML_TEMPLATE = """
             });
         });
 
-        // Refresh every 10 seconds
+        function renderCounts(counters) {
+            const status = counters.status || {};
+            document.getElementById('totalTickets').textContent = (counters.total || {})[''] || 0;
+            document.getElementById('openTickets').textContent = status.open || 0;
+            document.getElementById('closedTickets').textContent = status.closed || 0;
+        }
+
+        // Reload the recent list at most once a second while tickets change
+        let reloadPending = false;
+        function scheduleReload() {
+            if (reloadPending) return;
+            reloadPending = true;
+            setTimeout(() => { reloadPending = false; loadDashboard(); }, 1000);
+        }
+
+        // Poll while live updates are unavailable
+        let polling = null;
+        function startPolling() {
+            if (!polling) polling = setInterval(loadDashboard, 10000);
+        }
+        function stopPolling() {
+            clearInterval(polling);
+            polling = null;
+        }
+
+        // Live updates pushed by the server. The browser reconnects a dropped
+        // stream itself, but gives up on a refused one (429/503): poll and retry later
+        function connectEvents() {
+            const events = new EventSource(API_BASE + '/events');
+            events.addEventListener('open', stopPolling);
+            events.addEventListener('counters', e => renderCounts(JSON.parse(e.data)));
+            events.addEventListener('ticket-created', scheduleReload);
+            events.addEventListener('ticket-updated', scheduleReload);
+            events.addEventListener('ticket-archived', scheduleReload);
+            events.addEventListener('ticket-deleted', scheduleReload);
+            events.addEventListener('error', () => {
+                startPolling();
+                if (events.readyState === EventSource.CLOSED) {
+                    setTimeout(connectEvents, 30000 + Math.random() * 5000);
+                }
+            });
+        }
+
         loadDashboard();
-        setInterval(loadDashboard, 10000);
+        if (window.EventSource) {
+            connectEvents();
+        } else {
+            startPolling();
+        }
     </script>
 </body>
 </html>
 """
 
+# Precomputed frontend: encoding -> body, plus a strong ETag per encoding
+_frontend = {}
+
+def prepare_frontend():
+    """Render HTML_TEMPLATE once and keep identity, gzip and (if available) brotli bodies"""
+    with app.app_context():
+        html = render_template_string(HTML_TEMPLATE).encode('utf-8')
+    bodies = {'identity': html, 'gzip': gzip.compress(html, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies['br'] = brotli.compress(html, quality=11)
+    digest = hashlib.sha256(html).hexdigest()[:16]
+    _frontend.clear()
+    _frontend.update({encoding: (body, f'{digest}-{encoding}') for encoding, body in bodies.items()})
+
 # Routes
 @app.route('/', methods=['GET'])
 def index():
     """Serve HTML frontend"""
-    return render_template_string(HTML_TEMPLATE)
+    if not _frontend:
+        prepare_frontend()
+    encoding = request.accept_encodings.best_match([e for e in ('br', 'gzip') if e in _frontend])
+    body, etag = _frontend[encoding or 'identity']
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(body)
+        response.content_type = 'text/html; charset=utf-8'
+        if encoding:
+            response.content_encoding = encoding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = app.config['FRONTEND_CACHE_CONTROL']
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -380,13 +2793,9 @@ def health_check():
 def prometheus_metrics():
     """Prometheus metrics endpoint in text/plain format"""
     try:
-        conn = sqlite3.connect(DATABASE)
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM tickets')
-        total_tickets = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM tickets WHERE status='open'")
-        open_tickets = c.fetchone()[0]
-        conn.close()
+        counters = read_counters(get_db())
+        total_tickets = counters['total'].get('', 0)
+        open_tickets = counters['status'].get('open', 0)
         
         metrics = f"""# HELP helpdesk_tickets_total Total number of tickets
 # TYPE helpdesk_tickets_total gauge
@@ -399,10 +2808,28 @@ helpdesk_tickets_open{{service="25RP19452-NIYONKURU"}} {open_tickets}
 # HELP helpdesk_up Application health status
 # TYPE helpdesk_up gauge
 helpdesk_up{{service="25RP19452-NIYONKURU"}} 1
+
+"""
+        replication = replication_status(get_db())
+        if replication['role'] != 'off':
+            labels = f'service="25RP19452-NIYONKURU",role="{replication["role"]}"'
+            metrics += f"""# HELP helpdesk_replication_position Last change shipped (writer) or applied (reader)
+# TYPE helpdesk_replication_position gauge
+helpdesk_replication_position{{{labels}}} {replication['position']}
+
+# HELP helpdesk_replication_lag_entries Changes committed but not yet shipped (writer) or applied (reader)
+# TYPE helpdesk_replication_lag_entries gauge
+helpdesk_replication_lag_entries{{{labels}}} {replication['lag_entries']}
+
+# HELP helpdesk_replication_lag_seconds Replication delay; an upper bound while entries are pending
+# TYPE helpdesk_replication_lag_seconds gauge
+helpdesk_replication_lag_seconds{{{labels}}} {replication['lag_seconds']}
+
 """
+        metrics += generate_latest(metrics_registry()).decode()
         return metrics, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
     except Exception as e:
-        logger.error(f"Error generating metrics: {e}")
+        logger.error("Error generating metrics: %s", e)
         return "# Error generating metrics\nhelpdesk_up 0\n", 500, {'Content-Type': 'text/plain'}
 
 @app.route('/api/v1/tickets', methods=['POST'])
@@ -411,54 +2838,142 @@ def create_ticket():
     """Create a new support ticket"""
     data = request.get_json()
     
-    # Validate required fields
-    required_fields = ['title', 'description', 'category', 'priority', 'submitter_email', 'submitter_name']
-    if not all(field in data for field in required_fields):
-        return jsonify({'error': 'Missing required fields'}), 400
-    
-    # Validate category and priority
-    valid_categories = ['network', 'login', 'lab_computers', 'software', 'hardware', 'other']
-    valid_priorities = ['low', 'medium', 'high', 'critical']
-    
-    if data['category'] not in valid_categories:
-        return jsonify({'error': f'Invalid category. Must be one of {valid_categories}'}), 400
-    
-    if data['priority'] not in valid_priorities:
-        return jsonify({'error': f'Invalid priority. Must be one of {valid_priorities}'}), 400
+    # Validate required fields, category and priority
+    error = validate_ticket(data)
+    if error:
+        return jsonify({'error': error}), 400
     
     # Insert ticket into database
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    
-    c.execute('''INSERT INTO tickets 
-                 (title, description, category, priority, submitter_email, submitter_name)
-                 VALUES (?, ?, ?, ?, ?, ?)''',
-              (data['title'], data['description'], data['category'], 
-               data['priority'], data['submitter_email'], data['submitter_name']))
-    
-    ticket_id = c.lastrowid
-    conn.commit()
-    conn.close()
+    ticket_id = submit_write('create', ticket_values(data))
     
-    logger.info(f"Ticket created: ID={ticket_id}, Category={data['category']}, Priority={data['priority']}")
+    logger.info("Ticket created: ID=%s, Category=%s, Priority=%s", ticket_id, data['category'], data['priority'])
     
     return jsonify({
         'message': 'Ticket created successfully',
         'ticket_id': ticket_id
     }), 201
 
+def iter_bulk_records():
+    """Yield (record, error) pairs from a JSON array or NDJSON request body"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        # Read in blocks so large NDJSON uploads are never held in memory at once
+        buffered = b''
+        while True:
+            block = request.stream.read(64 * 1024)
+            lines = (buffered + block).split(b'\n')
+            buffered = lines.pop() if block else b''
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line), None
+                except ValueError:
+                    yield None, 'Invalid JSON'
+            if not block:
+                return
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError('Body must be a JSON array or NDJSON (application/x-ndjson)')
+    for record in data:
+        yield record, None
+
+def insert_ticket_chunk(conn, rows):
+    """Insert validated rows in one transaction and return their ticket ids"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.executemany(INSERT_TICKET_SQL, rows)
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    # AUTOINCREMENT ids are consecutive while this transaction holds the write lock
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+@app.route('/api/v1/tickets/bulk', methods=['POST'])
+@handle_errors
+def create_tickets_bulk():
+    """Create many tickets from a JSON array or NDJSON stream
+
+    Records are validated individually and valid ones are inserted with
+    executemany in BULK_CHUNK_SIZE transactions. The response lists a
+    ticket_id or an error for every input record, in input order.
+    """
+    conn = get_db()
+    chunk_size = app.config['BULK_CHUNK_SIZE']
+    max_items = app.config['BULK_MAX_ITEMS']
+    results = []
+    pending = []  # (result index, row values)
+    
+    def flush():
+        ids = insert_ticket_chunk(conn, [values for _, values in pending])
+        for (index, _), ticket_id in zip(pending, ids):
+            results[index] = {'index': index, 'ticket_id': ticket_id}
+        pending.clear()
+    
+    truncated = False
+    try:
+        for record, error in iter_bulk_records():
+            index = len(results)
+            if index >= max_items:
+                truncated = True
+                break
+            error = error or validate_ticket(record)
+            if error:
+                results.append({'index': index, 'error': error})
+                continue
+            results.append(None)
+            pending.append((index, ticket_values(record)))
+            if len(pending) >= chunk_size:
+                flush()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if pending:
+        flush()
+    
+    created = sum(1 for r in results if 'ticket_id' in r)
+    failed = len(results) - created
+    logger.info("Bulk ticket import: created=%d, failed=%d, truncated=%s", created, failed, truncated)
+    
+    body = {
+        'created': created,
+        'failed': failed,
+        'results': results
+    }
+    if truncated:
+        # Earlier chunks are already committed, so report them alongside the error
+        body['error'] = f'Too many tickets. Only the first {max_items} were processed'
+        return jsonify(body), 413
+    return jsonify(body), 201 if not failed else 207
+
 @app.route('/api/v1/tickets', methods=['GET'])
 @handle_errors
+@conditional_get
+@coalesce
 def get_tickets():
-    """Retrieve all tickets with optional filtering"""
+    """Retrieve a page of tickets with optional filtering and field projection
+
+    Pages are ordered newest first and addressed by an opaque keyset cursor on
+    (created_at, id), so every page is a bounded range scan.
+    """
     status = request.args.get('status')
     category = request.args.get('category')
     
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        fields = parse_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    query = 'SELECT * FROM tickets WHERE 1=1'
+    c = get_db().cursor()
+    
+    # created_at is always selected so the next cursor can be built
+    columns = fields if 'created_at' in fields else fields + ['created_at']
+    query = f'SELECT {", ".join(columns)} FROM tickets WHERE 1=1'
     params = []
     
     if status:
@@ -469,37 +2984,222 @@ def get_tickets():
         query += ' AND category = ?'
         params.append(category)
     
-    query += ' ORDER BY created_at DESC'
+    if position:
+        query += ' AND (created_at, id) < (?, ?)'
+        params.extend(position)
+    
+    query += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
     c.execute(query, params)
     rows = c.fetchall()
-    conn.close()
     
-    tickets = [dict(row) for row in rows]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    
+    tickets = [{field: row[field] for field in fields} for row in rows]
     
-    logger.info(f"Retrieved {len(tickets)} tickets with filters: status={status}, category={category}")
+    logger.info("Retrieved %d tickets with filters: status=%s, category=%s", len(tickets), status, category)
     
     return jsonify({
         'count': len(tickets),
-        'tickets': tickets
+        'tickets': tickets,
+        'next_cursor': next_cursor
     }), 200
 
-@app.route('/api/v1/tickets/<int:ticket_id>', methods=['GET'])
+def _iter_rows(cursor, size):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+def iter_export_batches(query, params, archives=()):
+    """Yield lists of rows for an export from a dedicated connection, EXPORT_FETCH_SIZE at a time.
+
+    Rows from the given archive periods are merged in by id; query must
+    select id and order by it.
+    """
+    size = app.config['EXPORT_FETCH_SIZE']
+    # A private connection keeps the long read transaction off the pooled one
+    connections = [connect_db()]
+    try:
+        connections.extend(connect_archive(period) for period in archives)
+        cursors = [conn.execute(query, params) for conn in connections]
+        if len(cursors) == 1:
+            while True:
+                rows = cursors[0].fetchmany(size)
+                if not rows:
+                    break
+                yield rows
+            return
+        
+        merged = heapq.merge(*(_iter_rows(c, size) for c in cursors), key=lambda row: row['id'])
+        # A ticket archived mid-export can be seen in both places; keep one copy
+        last_id = None
+        rows = []
+        for row in merged:
+            if row['id'] == last_id:
+                continue
+            last_id = row['id']
+            rows.append(row)
+            if len(rows) == size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    finally:
+        for conn in connections:
+            conn.close()
+
+def export_query(fields, status=None, category=None, since=None):
+    """SQL and parameters for an export, in id order.
+
+    The filters are written as +column so SQLite can't serve them from the
+    (column, created_at) indexes: that plan needs a temp B-tree to sort by
+    id, which buffers every matching row before the first one is returned.
+    A rowid scan filters as it goes and streams in id order.
+    """
+    query = f'SELECT {", ".join(fields)} FROM tickets WHERE 1=1'
+    params = []
+    
+    if status:
+        query += ' AND +status = ?'
+        params.append(status)
+    
+    if category:
+        query += ' AND +category = ?'
+        params.append(category)
+    
+    if since:
+        # updated_at mixes SQLite's and isoformat()'s layouts, so normalize both sides
+        query += ' AND datetime(updated_at) >= datetime(?)'
+        params.append(since)
+    
+    return query + ' ORDER BY id', params
+
+def export_ndjson(batches, fields):
+    for rows in batches:
+        yield ''.join(json.dumps({field: row[field] for field in fields}) + '\n' for row in rows)
+
+def export_csv(batches, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in batches:
+        writer.writerows([row[field] for field in fields] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+}
+
+@app.route('/api/v1/tickets/export', methods=['GET'])
 @handle_errors
-def get_ticket(ticket_id):
-    """Retrieve a specific ticket by ID"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+def export_tickets():
+    """Stream every matching ticket as NDJSON or CSV with constant memory
+
+    Honors the same status/category filters as the list endpoint, plus
+    `since` (ISO timestamp) to export only tickets updated at or after it.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Invalid format. Must be one of {list(EXPORT_FORMATS)}'}), 400
     
-    c.execute('SELECT * FROM tickets WHERE id = ?', (ticket_id,))
-    row = c.fetchone()
-    conn.close()
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        since = request.args.get('since')
+        if since:
+            since = datetime.fromisoformat(since).isoformat(sep=' ')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if not row:
-        return jsonify({'error': 'Ticket not found'}), 404
+    query, params = export_query(fields, request.args.get('status'), request.args.get('category'), since)
+    
+    # Archive files are per month of last update, so earlier ones can't match since
+    archives = [period for period in archive_periods() if not since or period >= since[:7]]
+    
+    render, mimetype = EXPORT_FORMATS[export_format]
+    logger.info("Exporting tickets: format=%s, since=%s", export_format, since)
+    
+    return Response(stream_with_context(render(iter_export_batches(query, params, archives), fields)),
+                    mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=tickets.{export_format}'})
+
+@app.route('/api/v1/tickets/search', methods=['GET'])
+@handle_errors
+@conditional_get
+@coalesce
+def search_tickets():
+    """Full-text search over ticket titles and descriptions, best matches first"""
+    try:
+        match = fts_query(request.args.get('q', ''))
+        limit = parse_limit(request.args.get('limit'))
+        offset = int(request.args.get('offset', 0))
+        if offset < 0:
+            raise ValueError('offset must not be negative')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = '''SELECT t.id, t.title, t.category, t.priority, t.status, t.created_at,
+                      snippet(tickets_fts, -1, '**', '**', '...', 12) AS snippet,
+                      tickets_fts.rank AS score
+               FROM tickets_fts JOIN tickets t ON t.id = tickets_fts.rowid
+               WHERE tickets_fts MATCH ?'''
+    params = [match]
+    
+    if request.args.get('status'):
+        query += ' AND t.status = ?'
+        params.append(request.args['status'])
+    
+    if request.args.get('category'):
+        query += ' AND t.category = ?'
+        params.append(request.args['category'])
+    
+    query += ' ORDER BY tickets_fts.rank LIMIT ? OFFSET ?'
+    params.extend([limit + 1, offset])
+    rows = get_db().execute(query, params).fetchall()
+    
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
     
-    logger.info(f"Retrieved ticket: ID={ticket_id}")
-    return jsonify(dict(row)), 200
+    return jsonify({
+        'count': len(rows),
+        'results': [dict(row) for row in rows],
+        'next_offset': next_offset
+    }), 200
+
+@app.route('/api/v1/tickets/<int:ticket_id>', methods=['GET'])
+@handle_errors
+@conditional_get
+def get_ticket(ticket_id):
+    """Retrieve a specific ticket by ID, live or archived"""
+    entry = cached_ticket(ticket_id)
+    if entry is not None:
+        # Tag the body with the version it was read at, not the current one
+        g.etag_version, body = entry
+    else:
+        version = g.get('data_version') or str(data_version(get_db()))
+        c = get_db().cursor()
+        
+        c.execute('SELECT * FROM tickets WHERE id = ?', (ticket_id,))
+        row = c.fetchone() or find_archived_ticket(get_db(), ticket_id)
+        
+        if not row:
+            return jsonify({'error': 'Ticket not found'}), 404
+        
+        body = app.json.dumps(dict(row))
+        cache_ticket(ticket_id, version, body)
+    
+    logger.info("Retrieved ticket: ID=%s", ticket_id)
+    return app.response_class(body, mimetype=app.json.mimetype), 200
 
 @app.route('/api/v1/tickets/<int:ticket_id>', methods=['PUT'])
 @handle_errors
@@ -507,57 +3207,189 @@ def update_ticket(ticket_id):
     """Update a ticket"""
     data = request.get_json()
     
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
+    # Update allowed fields
+    updates = {k: v for k, v in data.items() if k in UPDATABLE_FIELDS}
+    if updates:
+        updates['updated_at'] = datetime.utcnow().isoformat()
     
-    # Check if ticket exists
-    c.execute('SELECT id FROM tickets WHERE id = ?', (ticket_id,))
-    if not c.fetchone():
-        conn.close()
+    # Also checks the ticket exists
+    if not submit_write('update', ticket_id, updates):
+        if get_db().execute('SELECT 1 FROM archived_tickets WHERE id = ?', (ticket_id,)).fetchone():
+            return jsonify({'error': 'Ticket is archived'}), 409
         return jsonify({'error': 'Ticket not found'}), 404
     
-    # Update allowed fields
-    allowed_updates = ['status', 'assigned_to', 'resolution_notes', 'priority']
-    updates = {k: v for k, v in data.items() if k in allowed_updates}
-    
     if updates:
-        updates['updated_at'] = datetime.utcnow().isoformat()
-        set_clause = ', '.join([f'{k} = ?' for k in updates.keys()])
-        values = list(updates.values()) + [ticket_id]
-        
-        c.execute(f'UPDATE tickets SET {set_clause} WHERE id = ?', values)
-        conn.commit()
-        logger.info(f"Ticket updated: ID={ticket_id}, Updates={updates}")
+        invalidate_ticket(ticket_id)
+        logger.info("Ticket updated: ID=%s, Updates=%s", ticket_id, updates)
     
-    conn.close()
     return jsonify({'message': 'Ticket updated successfully'}), 200
 
-@app.route('/api/v1/metrics', methods=['GET'])
+@app.route('/api/v1/dashboard', methods=['GET'])
 @handle_errors
-def get_metrics():
-    """Get system metrics for administrators"""
-    conn = sqlite3.connect(DATABASE)
+@conditional_get
+@coalesce
+def get_dashboard():
+    """Constant-size summary for the dashboard: ticket counts plus the most recent tickets"""
+    conn = get_db()
+    counters = read_counters(conn)
+    
     c = conn.cursor()
+    c.execute(f'SELECT {", ".join(DASHBOARD_FIELDS)} FROM tickets '
+              'ORDER BY created_at DESC, id DESC LIMIT ?',
+              (app.config['DASHBOARD_RECENT'],))
+    recent_tickets = [dict(row) for row in c.fetchall()]
+    
+    return jsonify({
+        'counts': {
+            'total': counters['total'].get('', 0),
+            'open': counters['status'].get('open', 0),
+            'closed': counters['status'].get('closed', 0),
+            'by_status': counters['status']
+        },
+        'recent_tickets': recent_tickets,
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@app.route('/api/v1/events', methods=['GET'])
+def ticket_events():
+    """Server-Sent Events stream of ticket and counters events"""
+    subscription = event_broadcaster.subscribe()
+    if subscription is None:
+        # Every stream holds a thread; past the cap the client should poll instead
+        return refuse_request('read', 'streams_full', 503, app.config['EVENTS_STREAM_SECONDS'],
+                              'Too many live update streams, poll instead')
+    try:
+        conn = get_db()
+        counters = read_counters(conn)
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        replay = read_events(conn, last_id, app.config['EVENTS_REPLAY_MAX']) if last_id is not None else []
+    except Exception:
+        event_broadcaster.unsubscribe(subscription)
+        raise
+    environ = request.environ
+    
+    def stream():
+        sent_id = replay[-1]['id'] if replay else (last_id or 0)
+        # Set by the ASGI adapter when the client goes away; WSGI servers only
+        # notice on the next write, which the keepalive bounds
+        disconnected = environ.get('helpdesk.disconnected')
+        heartbeat = app.config['EVENTS_HEARTBEAT_SECONDS']
+        wait = min(heartbeat, 1.0) if disconnected else heartbeat
+        try:
+            yield 'retry: 2000\n\n'
+            yield format_sse('counters', None, counters)
+            for row in replay:
+                yield format_sse(row['event'], row['id'], {'ticket_id': row['ticket_id']})
+            deadline = time.monotonic() + app.config['EVENTS_STREAM_SECONDS']
+            last_write = time.monotonic()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (disconnected and disconnected.is_set()):
+                    return
+                try:
+                    item = subscription.get(timeout=min(remaining, wait))
+                except queue.Empty:
+                    if time.monotonic() - last_write >= heartbeat:
+                        last_write = time.monotonic()
+                        yield ': keepalive\n\n'
+                    continue
+                if item is None:
+                    return
+                event, event_id, data = item
+                # Already replayed from the change log
+                if event_id is not None and event_id <= sent_id:
+                    continue
+                last_write = time.monotonic()
+                yield format_sse(event, event_id, data)
+        finally:
+            event_broadcaster.unsubscribe(subscription)
     
-    # Total tickets
-    c.execute('SELECT COUNT(*) as count FROM tickets')
-    total_tickets = c.fetchone()[0]
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/v1/admin/snapshots', methods=['GET'])
+@require_admin
+@handle_errors
+def get_snapshots():
+    """List database snapshots, newest first"""
+    return jsonify({'snapshots': list_snapshots()}), 200
+
+@app.route('/api/v1/admin/snapshots', methods=['POST'])
+@require_admin
+@handle_errors
+def take_snapshot():
+    """Take an online snapshot of the database now"""
+    data = request.get_json(silent=True) or {}
+    try:
+        snapshot = create_snapshot(compress=data.get('compress'), force=bool(data.get('force')))
+    except SnapshotInProgress:
+        return jsonify({'error': 'A snapshot is already in progress'}), 409
+    return jsonify(snapshot), 200 if snapshot['skipped'] else 201
+
+def analytics_window():
+    """The requested [from, to) range for the analytics ETag; empty if invalid (the view answers 400)"""
+    try:
+        start, end = parse_time_range()
+    except ValueError:
+        return ''
+    return f'{start:%Y%m%d%H%M%S}-{end:%Y%m%d%H%M%S}'
+
+@app.route('/api/v1/analytics', methods=['GET'])
+@handle_errors
+@conditional_get(vary=analytics_window)
+@coalesce
+def get_analytics():
+    """Tickets created/resolved, mean time to resolution and SLA breach rate per hour or day"""
+    granularity = request.args.get('granularity', 'day')
+    category = request.args.get('category')
+    try:
+        if granularity not in ('hour', 'day'):
+            raise ValueError("granularity must be 'hour' or 'day'")
+        start, end = parse_time_range()
+        if granularity == 'hour' and end - start > timedelta(days=app.config['ANALYTICS_MAX_HOURLY_DAYS']):
+            raise ValueError(f"Hourly ranges are limited to {app.config['ANALYTICS_MAX_HOURLY_DAYS']} days")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Open tickets
-    c.execute('SELECT COUNT(*) as count FROM tickets WHERE status = "open"')
-    open_tickets = c.fetchone()[0]
+    # Buckets are hour-aligned; a range covers every bucket that starts inside it
+    where = 'bucket >= ? AND bucket < ?'
+    params = [start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S')]
+    if category:
+        where += ' AND category = ?'
+        params.append(category)
+    sums = ('SUM(created) AS created, SUM(resolved) AS resolved, '
+            'SUM(resolution_seconds) AS seconds, SUM(sla_breaches) AS breaches')
+    period = 'bucket' if granularity == 'hour' else 'substr(bucket, 1, 10)'
     
-    # Tickets by category
-    c.execute('''SELECT category, COUNT(*) as count 
-                 FROM tickets GROUP BY category''')
-    tickets_by_category = {row[0]: row[1] for row in c.fetchall()}
+    conn = get_db()
+    series = conn.execute(f'SELECT {period} AS period, {sums} FROM ticket_rollups WHERE {where} '
+                          'GROUP BY period ORDER BY period', params).fetchall()
+    by_category = conn.execute(f'SELECT category, {sums} FROM ticket_rollups WHERE {where} '
+                               'GROUP BY category ORDER BY category', params).fetchall()
+    totals = conn.execute(f'SELECT {sums} FROM ticket_rollups WHERE {where}', params).fetchone()
     
-    # Tickets by priority
-    c.execute('''SELECT priority, COUNT(*) as count 
-                 FROM tickets GROUP BY priority''')
-    tickets_by_priority = {row[0]: row[1] for row in c.fetchall()}
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'granularity': granularity,
+        'buckets': [dict(period=row['period'], **rollup_summary(row)) for row in series],
+        'by_category': {row['category']: rollup_summary(row) for row in by_category},
+        'totals': rollup_summary(totals),
+        'sla_target_hours': dict(conn.execute('SELECT priority, hours FROM sla_targets').fetchall()),
+    }), 200
+
+@app.route('/api/v1/metrics', methods=['GET'])
+@handle_errors
+@conditional_get
+@coalesce
+def get_metrics():
+    """Get system metrics for administrators"""
+    counters = read_counters(get_db())
     
-    conn.close()
+    total_tickets = counters['total'].get('', 0)
+    open_tickets = counters['status'].get('open', 0)
+    tickets_by_category = counters['category']
+    tickets_by_priority = counters['priority']
     
     logger.info("Metrics retrieved for dashboard")
     
@@ -573,9 +3405,7 @@ def get_metrics():
 def api_health():
     """API health endpoint with detailed status"""
     try:
-        conn = sqlite3.connect(DATABASE)
-        conn.execute('SELECT 1')
-        conn.close()
+        get_db().execute('SELECT 1')
         db_status = 'connected'
     except Exception as e:
         db_status = f'error: {str(e)}'
@@ -587,6 +3417,12 @@ def api_health():
         'timestamp': datetime.utcnow().isoformat()
     }), 200
 
+@app.route('/api/v1/replication', methods=['GET'])
+@handle_errors
+def get_replication():
+    """Replication role, log position and lag of this instance"""
+    return jsonify(replication_status(get_db())), 200
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -595,9 +3431,245 @@ def not_found(error):
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    logger.error(f"Internal server error: {str(error)}")
+    logger.error("Internal server error: %s", error)
     return jsonify({'error': 'Internal server error'}), 500
 
-if __name__ == '__main__':
+# ASGI serving mode
+class AsgiAdapter:
+    """Serve a WSGI app over ASGI, running handlers in a bounded thread pool.
+
+    The event loop owns connections and request/response I/O, so slow clients
+    and keep-alive sockets cost no threads. Each request's handler, including
+    its blocking SQLite calls and any streamed body, runs start to finish on
+    one of at most ASGI_THREADS pool threads, which keeps sqlite3 connections
+    and Flask's context on a single thread.
+    """
+    
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self._executor = None
+    
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=app.config['ASGI_THREADS'],
+                                                thread_name_prefix='asgi-handler')
+        return self._executor
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+    
+    async def lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await loop.run_in_executor(self.executor, create_app)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                self._executor = None
+                stop_log_listener()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    @staticmethod
+    def build_environ(scope, body):
+        """Translate an ASGI HTTP scope into a PEP 3333 environ"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = 'HTTP_' + name
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+    
+    async def http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = self.build_environ(scope, bytes(body))
+        
+        loop = asyncio.get_running_loop()
+        # Small bound so a fast handler can't buffer a whole streamed export here
+        chunks = asyncio.Queue(maxsize=8)
+        disconnected = threading.Event()
+        # Long-lived handlers (event streams) watch this between waits
+        environ['helpdesk.disconnected'] = disconnected
+        
+        async def watch():
+            # Servers don't fail send() once the client is gone (uvicorn drops
+            # the data), so the only notice is this message
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+        
+        watcher = loop.create_task(watch())
+        
+        def put(item):
+            asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+        
+        def run():
+            state = {}
+            
+            def start_response(status, headers, exc_info=None):
+                state['start'] = (int(status.split(' ', 1)[0]), headers)
+            
+            try:
+                result = self.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if disconnected.is_set():
+                            break
+                        if chunk:
+                            if 'start' in state:
+                                put(state.pop('start'))
+                            put(chunk)
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+                if 'start' in state:
+                    put(state.pop('start'))
+            except Exception as e:
+                logger.exception("Unhandled error serving %s", environ['PATH_INFO'])
+                put(e)
+            put(None)
+        
+        handler = loop.run_in_executor(self.executor, run)
+        started = finished = False
+        try:
+            while True:
+                item = await chunks.get()
+                if item is None:
+                    finished = True
+                    break
+                if disconnected.is_set():
+                    # Nobody to send to; drain until the handler notices and stops
+                    continue
+                if isinstance(item, Exception):
+                    if not started:
+                        started = True
+                        await send({'type': 'http.response.start', 'status': 500,
+                                    'headers': [(b'content-type', b'application/json')]})
+                        await send({'type': 'http.response.body',
+                                    'body': b'{"error": "Internal server error"}', 'more_body': True})
+                elif isinstance(item, tuple):
+                    status, headers = item
+                    started = True
+                    await send({'type': 'http.response.start', 'status': status,
+                                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                                            for k, v in headers]})
+                else:
+                    await send({'type': 'http.response.body', 'body': item, 'more_body': True})
+            if not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except Exception:
+            # Client went away mid-response: stop the handler and let it unwind
+            disconnected.set()
+            while not finished:
+                finished = (await chunks.get()) is None
+            raise
+        finally:
+            watcher.cancel()
+            await handler
+
+asgi_app = AsgiAdapter(app)
+
+@app.cli.command('rebuild-counters')
+def rebuild_counters_command():
+    """Recompute the materialized ticket counters from the tickets table"""
+    init_db()
+    conn = connect_db()
+    rebuild_counters(conn)
+    conn.close()
+    logger.info("Ticket counters rebuilt")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Repopulate the full-text search index from the tickets table"""
+    init_db()
+    conn = connect_db()
+    rebuild_search_index(conn)
+    conn.close()
+    logger.info("Search index rebuilt")
+
+@app.cli.command('backfill-rollups')
+def backfill_rollups_command():
+    """Recompute the analytics rollups from the tickets table"""
+    init_db()
+    conn = connect_db()
+    backfill_rollups(conn)
+    conn.close()
+    logger.info("Analytics rollups backfilled")
+
+@app.cli.command('archive-tickets')
+@click.option('--days', type=float, help='Archive tickets closed more than this many days ago '
+                                          '(default ARCHIVE_AFTER_DAYS)')
+def archive_tickets_command(days):
+    """Move long-closed tickets from the live table into the monthly archive files"""
     init_db()
-    app.run(debug=False, host='0.0.0.0', port=5000)
+    click.echo(json.dumps(archive_closed_tickets(days)))
+
+@app.cli.command('ship-changes')
+@click.option('--once', is_flag=True, help='Exit once every committed change is shipped')
+def ship_changes_command(once):
+    """Ship committed ticket changes to REPLICATION_LOG_DIR (writer)"""
+    init_db()
+    ChangeShipper().run(once=once)
+
+@app.cli.command('apply-changes')
+@click.option('--once', is_flag=True, help='Exit once every shipped change is applied')
+def apply_changes_command(once):
+    """Keep the local replica in step with REPLICATION_LOG_DIR (reader)"""
+    ReplicaApplier().bootstrap()
+    init_db()
+    ReplicaApplier().run(once=once)
+
+@app.cli.command('snapshot')
+@click.option('--dir', 'directory', help='Backup directory (default BACKUP_DIR)')
+@click.option('--compress/--no-compress', default=None, help='gzip the snapshot (default BACKUP_COMPRESS)')
+@click.option('--force', is_flag=True, help='Write a snapshot even if nothing changed since the last one')
+def snapshot_command(directory, compress, force):
+    """Take a verified online snapshot of the database and apply retention"""
+    init_db()
+    click.echo(json.dumps(create_snapshot(directory, compress, force)))
+
+if __name__ == '__main__':
+    create_app().run(debug=False, host='0.0.0.0', port=5000)
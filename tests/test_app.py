@@ -4,9 +4,18 @@ Student ID: 25RP19452-NIYONKURU
 """
 
 import unittest
+import gzip
+import importlib.util
 import json
+import zlib
+import logging
 import sys
 import os
+import threading
+import time
+from datetime import timedelta
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -164,10 +173,1956 @@ class HelpdeskTestCase(unittest.TestCase):
         self.assertIn('tickets_by_category', data)
         self.assertIn('tickets_by_priority', data)
     
+    def test_dashboard_summary(self):
+        """Test dashboard endpoint returns counts and projected recent tickets"""
+        response = self.client.get('/api/v1/dashboard')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        metrics = json.loads(self.client.get('/api/v1/metrics').data)
+        self.assertEqual(data['counts']['total'], metrics['total_tickets'])
+        self.assertEqual(data['counts']['open'], metrics['open_tickets'])
+        self.assertLessEqual(len(data['recent_tickets']), app.config['DASHBOARD_RECENT'])
+        for ticket in data['recent_tickets']:
+            self.assertEqual(set(ticket), set(app_module.DASHBOARD_FIELDS))
+    
     def test_404_error(self):
         """Test 404 error handling"""
         response = self.client.get('/invalid/endpoint')
         self.assertEqual(response.status_code, 404)
 
+class PaginationTestCase(unittest.TestCase):
+    """Test cases for cursor pagination and field projection"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        for i in range(5):
+            self.client.post('/api/v1/tickets', json={
+                'title': f'Paged ticket {i}',
+                'description': 'Pagination test',
+                'category': 'other',
+                'priority': 'low',
+                'submitter_email': 'page@uni.edu',
+                'submitter_name': 'Pager'
+            })
+    
+    def test_cursor_walk_visits_every_ticket_once(self):
+        """Test following next_cursor returns each ticket exactly once"""
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/v1/tickets?category=other&limit=2'
+            if cursor:
+                url += f'&cursor={cursor}'
+            data = json.loads(self.client.get(url).data)
+            self.assertLessEqual(data['count'], 2)
+            seen.extend(t['id'] for t in data['tickets'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        with self.app.app_context():
+            expected = [row[0] for row in app_module.get_db().execute(
+                "SELECT id FROM tickets WHERE category = 'other' ORDER BY created_at DESC, id DESC")]
+        self.assertEqual(seen, expected)
+    
+    def test_field_projection(self):
+        """Test fields= limits the returned columns and keeps the id"""
+        response = self.client.get('/api/v1/tickets?fields=title,status&limit=3')
+        self.assertEqual(response.status_code, 200)
+        for ticket in json.loads(response.data)['tickets']:
+            self.assertEqual(set(ticket), {'id', 'title', 'status'})
+    
+    def test_invalid_parameters(self):
+        """Test malformed limit, cursor and fields are rejected"""
+        for query in ('limit=abc', 'limit=0', 'cursor=not-a-cursor', 'fields=title,password'):
+            response = self.client.get(f'/api/v1/tickets?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+class BulkIngestionTestCase(unittest.TestCase):
+    """Test cases for bulk ticket ingestion"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def tearDown(self):
+        self.app.config['BULK_CHUNK_SIZE'] = 500
+        self.app.config['BULK_MAX_ITEMS'] = 10000
+    
+    def ticket(self, i, **overrides):
+        data = {
+            'title': f'Bulk ticket {i}',
+            'description': 'Imported from monitoring',
+            'category': 'network',
+            'priority': 'high',
+            'submitter_email': 'alerts@uni.edu',
+            'submitter_name': 'Monitoring'
+        }
+        data.update(overrides)
+        return data
+    
+    def test_json_array_with_per_item_results(self):
+        """Test a JSON array is inserted in chunks with per-item results"""
+        self.app.config['BULK_CHUNK_SIZE'] = 2
+        records = [self.ticket(0), self.ticket(1, category='bogus'), self.ticket(2),
+                   self.ticket(3), {'title': 'incomplete'}]
+        response = self.client.post('/api/v1/tickets/bulk', json=records)
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual((data['created'], data['failed']), (3, 2))
+        self.assertEqual([r['index'] for r in data['results']], list(range(5)))
+        self.assertIn('Invalid category', data['results'][1]['error'])
+        for index in (0, 2, 3):
+            ticket_id = data['results'][index]['ticket_id']
+            stored = json.loads(self.client.get(f'/api/v1/tickets/{ticket_id}').data)
+            self.assertEqual(stored['title'], f'Bulk ticket {index}')
+    
+    def test_ndjson_stream(self):
+        """Test NDJSON bodies are parsed line by line"""
+        body = '\n'.join([json.dumps(self.ticket(0)), 'not json', '', json.dumps(self.ticket(1))])
+        response = self.client.post('/api/v1/tickets/bulk', data=body,
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(data['results'][1]['error'], 'Invalid JSON')
+    
+    def test_all_valid_returns_created(self):
+        """Test a fully valid batch returns 201"""
+        response = self.client.post('/api/v1/tickets/bulk', json=[self.ticket(i) for i in range(3)])
+        self.assertEqual(response.status_code, 201)
+    
+    def test_rejects_non_array_and_oversized(self):
+        """Test non-array bodies and batches over BULK_MAX_ITEMS are rejected"""
+        response = self.client.post('/api/v1/tickets/bulk', json=self.ticket(0))
+        self.assertEqual(response.status_code, 400)
+        self.app.config['BULK_MAX_ITEMS'] = 2
+        response = self.client.post('/api/v1/tickets/bulk', json=[self.ticket(i) for i in range(3)])
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(json.loads(response.data)['created'], 2)
+
+class ExportTestCase(unittest.TestCase):
+    """Test cases for streaming ticket export"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        self.client.post('/api/v1/tickets/bulk', json=[{
+            'title': f'Export ticket {i}',
+            'description': 'Line one, with a comma\nand a newline',
+            'category': 'hardware',
+            'priority': 'low',
+            'submitter_email': 'export@uni.edu',
+            'submitter_name': 'Exporter'
+        } for i in range(3)])
+    
+    def test_ndjson_export_matches_filters(self):
+        """Test NDJSON export returns every ticket matching the filters"""
+        response = self.client.get('/api/v1/tickets/export?format=ndjson&category=hardware')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertTrue(rows)
+        self.assertTrue(all(r['category'] == 'hardware' for r in rows))
+        self.assertEqual([r['id'] for r in rows], sorted(r['id'] for r in rows))
+    
+    def test_csv_export_round_trips(self):
+        """Test CSV export quotes embedded commas and newlines"""
+        import csv
+        import io
+        response = self.client.get('/api/v1/tickets/export?format=csv&fields=title,description')
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.data.decode())))
+        self.assertEqual(set(rows[0]), {'id', 'title', 'description'})
+        self.assertIn('Line one, with a comma\nand a newline', [r['description'] for r in rows])
+    
+    def test_since_filters_by_update_time(self):
+        """Test since= only exports tickets updated at or after the timestamp"""
+        response = self.client.get('/api/v1/tickets/export?since=2999-01-01T00:00:00')
+        self.assertEqual(response.data, b'')
+        response = self.client.get('/api/v1/tickets/export?since=yesterday')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_invalid_format(self):
+        """Test unknown export formats are rejected"""
+        response = self.client.get('/api/v1/tickets/export?format=xml')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_memory_stays_flat_for_large_exports(self):
+        """Test exporting 100k+ tickets streams without buffering the result"""
+        import tracemalloc
+        original_db = app_module.DATABASE
+        app_module.DATABASE = os.path.join(tempfile.mkdtemp(), 'export_tickets.db')
+        try:
+            init_db()
+            conn = app_module.connect_db()
+            conn.executemany(app_module.INSERT_TICKET_SQL,
+                             (('Bulk export', 'x' * 100, 'network', 'low', 'e@uni.edu', 'E')
+                              for _ in range(100000)))
+            conn.commit()
+            conn.close()
+            
+            response = self.client.get('/api/v1/tickets/export?format=ndjson', buffered=False)
+            total = 0
+            tracemalloc.start()
+            try:
+                for chunk in response.response:
+                    total += len(chunk)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                response.close()
+            self.assertGreater(total, 10 * 1024 * 1024)
+            self.assertLess(peak, 5 * 1024 * 1024)
+        finally:
+            app_module.DATABASE = original_db
+
+class SearchTestCase(unittest.TestCase):
+    """Test cases for full-text ticket search"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        self.client.post('/api/v1/tickets/bulk', json=[
+            {'title': 'Wifi down in lab B', 'description': 'No wireless signal since morning',
+             'category': 'network', 'priority': 'critical',
+             'submitter_email': 's@uni.edu', 'submitter_name': 'S'},
+            {'title': 'Printer jammed', 'description': 'Lab B printer; wifi works fine',
+             'category': 'hardware', 'priority': 'low',
+             'submitter_email': 's@uni.edu', 'submitter_name': 'S'},
+        ])
+    
+    def test_title_matches_rank_first(self):
+        """Test BM25 ranks title matches above description matches"""
+        response = self.client.get('/api/v1/tickets/search?q=wifi lab')
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.data)['results']
+        titles = [r['title'] for r in results]
+        self.assertLess(titles.index('Wifi down in lab B'), titles.index('Printer jammed'))
+        self.assertIn('**', results[0]['snippet'])
+    
+    def test_search_pagination_and_filters(self):
+        """Test limit/offset paging and status/category filters"""
+        data = json.loads(self.client.get('/api/v1/tickets/search?q=lab&limit=1').data)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['next_offset'], 1)
+        data = json.loads(self.client.get('/api/v1/tickets/search?q=lab&category=hardware').data)
+        self.assertTrue(all(r['category'] == 'hardware' for r in data['results']))
+    
+    def test_operator_syntax_is_literal(self):
+        """Test FTS5 operators and quotes in q are treated as plain text"""
+        for q in ('wifi AND', '"unbalanced', 'NEAR(', '*'):
+            response = self.client.get('/api/v1/tickets/search', query_string={'q': q})
+            self.assertEqual(response.status_code, 200, q)
+        response = self.client.get('/api/v1/tickets/search?q=')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_rebuild_command(self):
+        """Test the rebuild-search-index command repopulates the index"""
+        with self.app.app_context():
+            conn = app_module.get_db()
+            conn.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('delete-all')")
+            conn.commit()
+        data = json.loads(self.client.get('/api/v1/tickets/search?q=printer').data)
+        self.assertEqual(data['count'], 0)
+        result = self.app.test_cli_runner().invoke(args=['rebuild-search-index'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        data = json.loads(self.client.get('/api/v1/tickets/search?q=printer').data)
+        self.assertGreater(data['count'], 0)
+
+class ConditionalGetTestCase(unittest.TestCase):
+    """Test cases for ETag based conditional GETs"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def create_ticket(self):
+        return self.client.post('/api/v1/tickets', json={
+            'title': 'ETag ticket',
+            'description': 'ETag test',
+            'category': 'software',
+            'priority': 'medium',
+            'submitter_email': 'etag@uni.edu',
+            'submitter_name': 'Tagger'
+        })
+    
+    def test_not_modified_until_write(self):
+        """Test matching If-None-Match yields 304 until the data changes"""
+        for url in ('/api/v1/tickets', '/api/v1/metrics', '/api/v1/dashboard'):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                etag = first.headers['ETag']
+                self.assertIn('no-cache', first.headers['Cache-Control'])
+                
+                cached = self.client.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached.data, b'')
+                
+                self.create_ticket()
+                fresh = self.client.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(fresh.status_code, 200)
+                self.assertNotEqual(fresh.headers['ETag'], etag)
+    
+    def test_single_ticket_etag(self):
+        """Test single ticket reads revalidate and updates invalidate"""
+        ticket_id = json.loads(self.create_ticket().data)['ticket_id']
+        etag = self.client.get(f'/api/v1/tickets/{ticket_id}').headers['ETag']
+        cached = self.client.get(f'/api/v1/tickets/{ticket_id}', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'in_progress'})
+        fresh = self.client.get(f'/api/v1/tickets/{ticket_id}', headers={'If-None-Match': etag})
+        self.assertEqual(fresh.status_code, 200)
+    
+    def test_errors_carry_no_etag(self):
+        """Test 404 responses are not tagged"""
+        response = self.client.get('/api/v1/tickets/99999')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+class TicketCountersTestCase(unittest.TestCase):
+    """Test cases for the materialized ticket counters"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def live_counts(self):
+        """Aggregate the tickets table directly, in read_counters' shape"""
+        with self.app.app_context():
+            conn = app_module.get_db()
+            counts = {'total': {'': conn.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]}}
+            for dim in app_module.COUNTER_DIMENSIONS:
+                counts[dim] = {row[0]: row[1] for row in conn.execute(
+                    f'SELECT {dim}, COUNT(*) FROM tickets GROUP BY {dim}')}
+            if not counts['total']['']:
+                counts['total'] = {}
+        return counts
+    
+    def stored_counts(self):
+        with self.app.app_context():
+            return app_module.read_counters(app_module.get_db())
+    
+    def test_counters_follow_creates_and_updates(self):
+        """Test counters track inserts and status/priority transitions"""
+        response = self.client.post('/api/v1/tickets', json={
+            'title': 'Counter ticket',
+            'description': 'Counter test',
+            'category': 'login',
+            'priority': 'low',
+            'submitter_email': 'count@uni.edu',
+            'submitter_name': 'Counter'
+        })
+        ticket_id = json.loads(response.data)['ticket_id']
+        self.assertEqual(self.stored_counts(), self.live_counts())
+        
+        self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'closed', 'priority': 'high'})
+        self.assertEqual(self.stored_counts(), self.live_counts())
+    
+    def test_metrics_served_from_counters(self):
+        """Test the metrics API reports the counter values"""
+        data = json.loads(self.client.get('/api/v1/metrics').data)
+        live = self.live_counts()
+        self.assertEqual(data['total_tickets'], live['total'].get('', 0))
+        self.assertEqual(data['tickets_by_category'], live['category'])
+        self.assertEqual(data['tickets_by_priority'], live['priority'])
+    
+    def test_rebuild_command_repairs_drift(self):
+        """Test the rebuild-counters CLI command restores correct values"""
+        with self.app.app_context():
+            conn = app_module.get_db()
+            conn.execute("UPDATE ticket_counters SET count = count + 42 WHERE dimension = 'total'")
+            conn.commit()
+        self.assertNotEqual(self.stored_counts(), self.live_counts())
+        result = self.app.test_cli_runner().invoke(args=['rebuild-counters'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.stored_counts(), self.live_counts())
+
+class QueryPlanTestCase(unittest.TestCase):
+    """Regression tests asserting every API query is served by an index"""
+    
+    ROUTES = [
+        '/api/v1/tickets',
+        '/api/v1/tickets?status=open',
+        '/api/v1/tickets?category=network',
+        '/api/v1/tickets?status=open&category=network',
+        '/api/v1/tickets/1',
+        '/api/v1/metrics',
+        '/api/v1/dashboard',
+        '/api/v1/tickets/search?q=wifi&status=open',
+        '/metrics',
+    ]
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.app.config['DB_POOLING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def capture_queries(self, url):
+        """Return the SELECT statements the API issues against tickets for a URL"""
+        statements = []
+        with self.app.app_context():
+            conn = app_module.get_db()
+            conn.set_trace_callback(statements.append)
+            try:
+                self.client.get(url)
+                # Follow one page so the keyset range predicate is exercised too
+                if url.startswith('/api/v1/tickets?') or url == '/api/v1/tickets':
+                    sep = '&' if '?' in url else '?'
+                    self.client.get(f'{url}{sep}limit=1&cursor={app_module.encode_cursor("2099-01-01 00:00:00", 1)}')
+            finally:
+                conn.set_trace_callback(None)
+        return [s for s in statements
+                if s.lstrip().upper().startswith('SELECT') and 'tickets' in s]
+    
+    def assert_uses_index(self, sql):
+        with self.app.app_context():
+            plan = [row[3] for row in app_module.get_db().execute(f'EXPLAIN QUERY PLAN {sql}')]
+        for detail in plan:
+            self.assertNotIn('TEMP B-TREE', detail, f'{sql} -> {plan}')
+            if detail.startswith(('SCAN', 'SEARCH')) and ' tickets' in detail:
+                self.assertTrue('USING' in detail or 'VIRTUAL TABLE INDEX' in detail,
+                                f'{sql} -> {plan}')
+    
+    def test_schema_version_current(self):
+        """Test init_db brings the schema to the latest migration"""
+        with self.app.app_context():
+            version = app_module.schema_version(app_module.get_db())
+        self.assertEqual(version, len(app_module.SCHEMA_MIGRATIONS))
+    
+    def test_api_queries_use_indexes(self):
+        """Test EXPLAIN QUERY PLAN shows no full table scans or sorts"""
+        for url in self.ROUTES:
+            with self.subTest(url=url):
+                for sql in self.capture_queries(url):
+                    self.assert_uses_index(sql)
+
+    def test_export_queries_stream_in_id_order(self):
+        """Test exports, filtered or not, scan in id order without a temp B-tree sort"""
+        for filters in ({}, {'status': 'open'}, {'category': 'network'},
+                        {'status': 'open', 'category': 'network', 'since': '2024-01-01 00:00:00'}):
+            with self.subTest(**filters):
+                sql, params = app_module.export_query(app_module.TICKET_FIELDS, **filters)
+                with self.app.app_context():
+                    plan = [row[3] for row in app_module.get_db().execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+                self.assertEqual(plan, ['SCAN tickets'])
+
+class RequestMetricsTestCase(unittest.TestCase):
+    """Test cases for per-route Prometheus instrumentation"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def sample(self, name, **labels):
+        return app_module.REGISTRY.get_sample_value(name, labels) or 0
+    
+    def test_route_latency_status_and_db_time(self):
+        """Test requests are counted per endpoint/status with latency and DB time"""
+        before = self.sample('helpdesk_http_requests_total', method='GET', endpoint='get_ticket', status='404')
+        db_before = self.sample('helpdesk_db_query_duration_seconds_count', endpoint='get_ticket')
+        self.client.get('/api/v1/tickets/99999')
+        self.assertEqual(self.sample('helpdesk_http_requests_total', method='GET',
+                                     endpoint='get_ticket', status='404'), before + 1)
+        self.assertEqual(self.sample('helpdesk_db_query_duration_seconds_count', endpoint='get_ticket'),
+                         db_before + 1)
+        self.assertGreater(self.sample('helpdesk_http_request_duration_seconds_count',
+                                       method='GET', endpoint='get_ticket'), 0)
+        self.assertEqual(self.sample('helpdesk_http_requests_in_flight'), 0)
+    
+    def test_metrics_endpoint_exposes_instrumentation(self):
+        """Test /metrics serves ticket gauges and request histograms together"""
+        self.client.get('/health')
+        body = self.client.get('/metrics').data.decode()
+        self.assertIn('helpdesk_tickets_total', body)
+        self.assertIn('helpdesk_http_request_duration_seconds_bucket', body)
+        self.assertIn('endpoint="health_check"', body)
+    
+    def test_multiprocess_aggregation(self):
+        """Test counters from separate worker processes are summed on /metrics"""
+        import subprocess
+        metrics_dir = tempfile.mkdtemp()
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+        script = (
+            'import sys; sys.path.insert(0, {src!r}); import app as m; '
+            'm.DATABASE = {db!r}; c = m.app.test_client(); '
+            '[c.get("/health") for _ in range(3)]; '
+            'print(c.get("/metrics").data.decode())'
+        ).format(src=os.path.join(os.path.dirname(__file__), '..', 'src'), db=temp_db)
+        for _ in range(2):
+            output = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                                    capture_output=True, text=True).stdout
+        line = [l for l in output.splitlines()
+                if l.startswith('helpdesk_http_requests_total') and 'health_check' in l][0]
+        self.assertEqual(float(line.split()[-1]), 6.0)
+
+class LoggingTestCase(unittest.TestCase):
+    """Test cases for the queued, structured logging pipeline"""
+    
+    def make_record(self, level=logging.INFO, msg='Retrieved ticket: ID=%s', args=(7,)):
+        return logging.LogRecord('app', level, __file__, 1, msg, args, None)
+    
+    def test_json_formatter(self):
+        """Test records render as single-line JSON with the endpoint"""
+        record = self.make_record()
+        record.endpoint = 'get_ticket'
+        entry = json.loads(app_module.JsonFormatter().format(record))
+        self.assertEqual(entry['message'], 'Retrieved ticket: ID=7')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['endpoint'], 'get_ticket')
+    
+    def test_sampling_filter(self):
+        """Test INFO logs are sampled per endpoint while warnings always pass"""
+        log_filter = app_module.SamplingFilter()
+        rates = app.config['LOG_SAMPLE_RATES']
+        app.config['LOG_SAMPLE_RATES'] = {'get_ticket': 0.0}
+        try:
+            with app.test_request_context('/api/v1/tickets/1'):
+                self.assertFalse(log_filter.filter(self.make_record()))
+                self.assertTrue(log_filter.filter(self.make_record(level=logging.WARNING)))
+            self.assertTrue(log_filter.filter(self.make_record()))
+        finally:
+            app.config['LOG_SAMPLE_RATES'] = rates
+    
+    def test_queue_handler_defers_formatting(self):
+        """Test the request thread enqueues records without formatting them"""
+        log_queue = app_module.queue.SimpleQueue()
+        handler = app_module.LazyQueueHandler(log_queue)
+        handler.handle(self.make_record())
+        queued = log_queue.get_nowait()
+        self.assertEqual(queued.msg, 'Retrieved ticket: ID=%s')
+        self.assertEqual(queued.args, (7,))
+
+class AsgiAdapterTestCase(unittest.TestCase):
+    """Test cases for the ASGI serving mode"""
+    
+    def setUp(self):
+        with app.app_context():
+            init_db()
+    
+    async def call(self, method, path, body=b'', query=b'', headers=()):
+        """Drive asgi_app with one HTTP request and return (status, headers, body)"""
+        import asyncio
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+        complete = asyncio.Event()
+        
+        async def receive():
+            # Like uvicorn: block until the response is complete, then report the disconnect
+            if messages:
+                return messages.pop(0)
+            await complete.wait()
+            return {'type': 'http.disconnect'}
+        
+        async def send(message):
+            sent.append(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                complete.set()
+        
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+                 'headers': [(b'host', b'testserver')] + list(headers), 'http_version': '1.1',
+                 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000)}
+        await app_module.asgi_app(scope, receive, send)
+        self.assertEqual(sent[-1], {'type': 'http.response.body', 'body': b'', 'more_body': False})
+        return (sent[0]['status'], dict(sent[0]['headers']),
+                b''.join(m.get('body', b'') for m in sent[1:]))
+    
+    def test_lifespan_startup(self):
+        """Test lifespan startup runs create_app and shutdown completes"""
+        import asyncio
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            sent.append(message['type'])
+        
+        asyncio.run(app_module.asgi_app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+    
+    def test_same_routes_over_asgi(self):
+        """Test create/read round trip and query strings through the adapter"""
+        import asyncio
+        ticket = json.dumps({
+            'title': 'ASGI ticket', 'description': 'Served on asyncio', 'category': 'software',
+            'priority': 'low', 'submitter_email': 'a@uni.edu', 'submitter_name': 'Async'
+        }).encode()
+        status, _, body = asyncio.run(self.call('POST', '/api/v1/tickets', ticket,
+                                                headers=[(b'content-type', b'application/json')]))
+        self.assertEqual(status, 201)
+        ticket_id = json.loads(body)['ticket_id']
+        status, headers, body = asyncio.run(self.call('GET', f'/api/v1/tickets/{ticket_id}'))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertEqual(json.loads(body)['title'], 'ASGI ticket')
+        status, _, body = asyncio.run(self.call('GET', '/api/v1/tickets', query=b'limit=1&fields=title'))
+        self.assertEqual(json.loads(body)['count'], 1)
+    
+    def test_concurrent_requests_and_streaming(self):
+        """Test concurrent requests complete and streamed exports arrive intact"""
+        import asyncio
+        
+        async def burst():
+            return await asyncio.gather(*[self.call('GET', '/health') for _ in range(50)],
+                                        self.call('GET', '/api/v1/tickets/export', query=b'format=csv'))
+        
+        results = asyncio.run(burst())
+        self.assertTrue(all(status == 200 for status, _, _ in results))
+        self.assertTrue(results[-1][2].startswith(b'id,title'))
+
+    def test_client_disconnect_stops_streams(self):
+        """Test a client leaving mid-stream ends an export and an event stream on their threads"""
+        import asyncio
+        app.config['EVENTS_STREAM_SECONDS'] = 60
+        self.addCleanup(app.config.__setitem__, 'EVENTS_STREAM_SECONDS', 30)
+        
+        async def leave_after_first_chunk(path, query=b''):
+            gone = asyncio.Event()
+            sent = []
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await gone.wait()
+                return {'type': 'http.disconnect'}
+            
+            async def send(message):
+                # Like uvicorn, keep accepting sends silently once the client is gone
+                sent.append(message)
+                if message.get('body'):
+                    gone.set()
+            
+            scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query,
+                     'headers': [(b'host', b'testserver')], 'http_version': '1.1', 'scheme': 'http',
+                     'server': ('testserver', 80), 'client': ('127.0.0.1', 5000)}
+            await asyncio.wait_for(app_module.asgi_app(scope, receive, send), 10)
+            return sent
+        
+        app.config['EXPORT_FETCH_SIZE'] = 1
+        self.addCleanup(app.config.__setitem__, 'EXPORT_FETCH_SIZE', 1000)
+        with app.app_context():
+            conn = app_module.get_db()
+            conn.executemany("INSERT INTO tickets (title, description, category, priority, submitter_email, "
+                             "submitter_name) VALUES ('Bulk', 'Disconnect test', 'other', 'low', 'd@uni.edu', 'D')",
+                             [()] * 50)
+            conn.commit()
+        sent = asyncio.run(leave_after_first_chunk('/api/v1/tickets/export', b'format=csv'))
+        # The handler stops within the queue bound instead of exporting every row
+        self.assertLess(sum(1 for m in sent if m.get('body')), 20)
+        
+        # A private broadcaster, so the shared one doesn't start polling ahead of EventsTestCase
+        broadcaster = app_module.EventBroadcaster()
+        self.addCleanup(setattr, app_module, 'event_broadcaster', app_module.event_broadcaster)
+        app_module.event_broadcaster = broadcaster
+        start = time.monotonic()
+        sent = asyncio.run(leave_after_first_chunk('/api/v1/events'))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(broadcaster.open_streams(), 0)
+        self.assertNotIn({'type': 'http.response.body', 'body': b'', 'more_body': False}, sent)
+
+class StartupTestCase(unittest.TestCase):
+    """Test cases for explicit application startup"""
+    
+    def test_create_app_initializes_schema(self):
+        """Test create_app prepares a fresh database before any request"""
+        original_db = app_module.DATABASE
+        app_module.DATABASE = os.path.join(tempfile.mkdtemp(), 'startup.db')
+        try:
+            created = app_module.create_app({'TESTING': True})
+            self.assertIs(created, app)
+            conn = app_module.connect_db()
+            self.assertEqual(app_module.schema_version(conn), len(app_module.SCHEMA_MIGRATIONS))
+            conn.close()
+        finally:
+            app_module.DATABASE = original_db
+    
+    def test_requests_do_not_initialize_database(self):
+        """Test no per-request schema check is registered"""
+        hooks = [f.__name__ for f in app.before_request_funcs.get(None, [])]
+        self.assertNotIn('ensure_db', hooks)
+
+class DatabaseConnectionTestCase(unittest.TestCase):
+    """Test cases for pooled database connections"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        with self.app.app_context():
+            init_db()
+    
+    def tearDown(self):
+        self.app.config['DB_POOLING'] = True
+    
+    def test_wal_mode_enabled(self):
+        """Test connections run in WAL journal mode"""
+        with self.app.app_context():
+            mode = app_module.get_db().execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+    
+    def test_pooled_connection_reused(self):
+        """Test the same thread reuses its connection across app contexts"""
+        self.app.config['DB_POOLING'] = True
+        with self.app.app_context():
+            first = app_module.get_db()
+        with self.app.app_context():
+            second = app_module.get_db()
+        self.assertIs(first, second)
+    
+    def test_unpooled_connection_closed(self):
+        """Test connections are closed on teardown when pooling is disabled"""
+        self.app.config['DB_POOLING'] = False
+        with self.app.app_context():
+            conn = app_module.get_db()
+        with self.assertRaises(app_module.sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+    
+    def test_teardown_rolls_back_open_transaction(self):
+        """Test uncommitted writes are discarded when the context ends"""
+        with self.app.app_context():
+            conn = app_module.get_db()
+            before = conn.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+            conn.execute('''INSERT INTO tickets
+                            (title, description, category, priority, submitter_email, submitter_name)
+                            VALUES ('t', 'd', 'other', 'low', 'a@uni.edu', 'A')''')
+        with self.app.app_context():
+            after = app_module.get_db().execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+        self.assertEqual(before, after)
+
+class WriteQueueTestCase(unittest.TestCase):
+    """Test cases for the single-writer mutation queue"""
+    
+    TICKET = {
+        'title': 'Queued', 'description': 'Concurrent create', 'category': 'network',
+        'priority': 'medium', 'submitter_email': 'q@uni.edu', 'submitter_name': 'Queue'
+    }
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def tearDown(self):
+        self.app.config['WRITE_QUEUE'] = 'off'
+    
+    def ticket_count(self):
+        with self.app.app_context():
+            return app_module.get_db().execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+    
+    def concurrent_creates(self, count):
+        """Create tickets from count threads at once and return the status codes"""
+        barrier = threading.Barrier(count)
+        statuses = []
+        
+        def create():
+            client = self.app.test_client()
+            barrier.wait()
+            statuses.append(client.post('/api/v1/tickets', json=self.TICKET).status_code)
+        
+        threads = [threading.Thread(target=create) for _ in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return statuses
+    
+    def test_concurrent_creates_through_writer_thread(self):
+        """Test hundreds of concurrent creates all commit without lock errors"""
+        self.app.config['WRITE_QUEUE'] = 'thread'
+        busy_timeout = self.app.config['DB_BUSY_TIMEOUT_MS']
+        self.app.config['DB_BUSY_TIMEOUT_MS'] = 0
+        before = self.ticket_count()
+        batches = app_module.write_coalescer.batches
+        try:
+            statuses = self.concurrent_creates(200)
+        finally:
+            self.app.config['DB_BUSY_TIMEOUT_MS'] = busy_timeout
+        self.assertEqual(statuses, [201] * 200)
+        self.assertEqual(self.ticket_count(), before + 200)
+        # Group commit: far fewer transactions than creates
+        self.assertLess(app_module.write_coalescer.batches - batches, 200)
+    
+    def test_failed_mutation_does_not_abort_batch(self):
+        """Test one failing mutation is isolated by its savepoint"""
+        self.app.config['WRITE_QUEUE'] = 'thread'
+        with self.assertRaises(ValueError):
+            app_module.submit_write('update', 1, {'title': 'not allowed'})
+        response = self.client.post('/api/v1/tickets', json=self.TICKET)
+        self.assertEqual(response.status_code, 201)
+    
+    def test_update_through_writer_thread(self):
+        """Test updates and missing-ticket checks go through the queue"""
+        self.app.config['WRITE_QUEUE'] = 'thread'
+        ticket_id = self.client.post('/api/v1/tickets', json=self.TICKET).get_json()['ticket_id']
+        response = self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'closed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/v1/tickets/{ticket_id}').get_json()['status'], 'closed')
+        response = self.client.put('/api/v1/tickets/999999', json={'status': 'closed'})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_writer_process_socket(self):
+        """Test workers can submit mutations to a writer over its socket"""
+        address = os.path.join(tempfile.mkdtemp(), 'writer.sock')
+        self.app.config['WRITE_QUEUE_ADDRESS'] = address
+        threading.Thread(target=app_module.run_write_server, args=(address,), daemon=True).start()
+        for _ in range(100):
+            if os.path.exists(address):
+                break
+            time.sleep(0.01)
+        self.app.config['WRITE_QUEUE'] = 'process'
+        before = self.ticket_count()
+        statuses = self.concurrent_creates(50)
+        self.assertEqual(statuses, [201] * 50)
+        self.assertEqual(self.ticket_count(), before + 50)
+    
+    def test_unavailable_writer_falls_back_to_direct(self):
+        """Test writes still succeed when the writer socket is missing"""
+        self.app.config['WRITE_QUEUE'] = 'process'
+        self.app.config['WRITE_QUEUE_ADDRESS'] = os.path.join(tempfile.mkdtemp(), 'missing.sock')
+        response = self.client.post('/api/v1/tickets', json=self.TICKET)
+        self.assertEqual(response.status_code, 201)
+    
+    def test_lost_reply_is_not_written_again(self):
+        """Test a writer that dies after taking a mutation fails the request instead of writing it directly"""
+        from multiprocessing.connection import Listener
+        address = os.path.join(tempfile.mkdtemp(), 'writer.sock')
+        listener = Listener(address, family='AF_UNIX', authkey=app_module.write_queue_authkey())
+        
+        def take_and_die():
+            with listener.accept() as connection:
+                connection.recv()
+        
+        threading.Thread(target=take_and_die, daemon=True).start()
+        self.app.config['WRITE_QUEUE'] = 'process'
+        self.app.config['WRITE_QUEUE_ADDRESS'] = address
+        before = self.ticket_count()
+        response = self.client.post('/api/v1/tickets', json=self.TICKET)
+        listener.close()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.ticket_count(), before)
+    
+    def test_writer_survives_connection_failure(self):
+        """Test a failed database open fails that batch only and the writer reconnects"""
+        coalescer = app_module.WriteCoalescer()
+        connect_db = app_module.connect_db
+        def fail_once():
+            app_module.connect_db = connect_db
+            raise app_module.sqlite3.OperationalError('unable to open database file')
+        app_module.connect_db = fail_once
+        try:
+            with self.assertRaises(app_module.sqlite3.OperationalError):
+                coalescer.submit('create', app_module.ticket_values(self.TICKET))
+            self.assertTrue(coalescer.submit('create', app_module.ticket_values(self.TICKET)))
+        finally:
+            app_module.connect_db = connect_db
+        self.assertTrue(coalescer.thread.is_alive())
+    
+    def test_timed_out_write_is_not_applied(self):
+        """Test a write still queued at WRITE_QUEUE_TIMEOUT is dropped and reported"""
+        coalescer = app_module.WriteCoalescer()
+        started, release = threading.Event(), threading.Event()
+        def block(conn):
+            started.set()
+            release.wait(5)
+        app_module.MUTATIONS['block'] = block
+        self.app.config['WRITE_QUEUE_TIMEOUT'] = 0.1
+        def submit_block():
+            try:
+                coalescer.submit('block')
+            except app_module.WriteQueueTimeout:
+                pass
+        blocker = threading.Thread(target=submit_block)
+        try:
+            blocker.start()
+            started.wait(5)
+            before = self.ticket_count()
+            with self.assertRaises(app_module.WriteQueueTimeout):
+                coalescer.submit('create', app_module.ticket_values(self.TICKET))
+        finally:
+            release.set()
+            blocker.join(5)
+            del app_module.MUTATIONS['block']
+            self.app.config['WRITE_QUEUE_TIMEOUT'] = 30
+        # The queue is FIFO: once a later write is answered, the dropped one was skipped
+        self.assertFalse(coalescer.submit('update', 999999, {'status': 'closed'}))
+        self.assertEqual(self.ticket_count(), before)
+
+class TicketCacheTestCase(unittest.TestCase):
+    """Test cases for the single-ticket read-through cache"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        app_module.local_ticket_cache.clear()
+        self.ticket_id = self.client.post('/api/v1/tickets', json={
+            'title': 'Cached', 'description': 'Hot ticket', 'category': 'software',
+            'priority': 'low', 'submitter_email': 'c@uni.edu', 'submitter_name': 'Cache'
+        }).get_json()['ticket_id']
+    
+    def tearDown(self):
+        self.app.config['TICKET_CACHE_SIZE'] = 1024
+        self.app.config['TICKET_CACHE_TTL'] = 5
+        self.app.config['TICKET_CACHE_URL'] = ''
+    
+    def sample(self, name, tier=None):
+        labels = {'tier': tier} if tier else {}
+        return app_module.REGISTRY.get_sample_value(name, labels) or 0
+    
+    def test_repeat_lookup_served_from_cache(self):
+        """Test the second view of a ticket is a local hit with the same body"""
+        hits = self.sample('helpdesk_ticket_cache_hits_total', 'local')
+        first = self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        second = self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(second.mimetype, 'application/json')
+        self.assertEqual(self.sample('helpdesk_ticket_cache_hits_total', 'local'), hits + 1)
+    
+    def test_update_invalidates(self):
+        """Test an update is visible on the next lookup"""
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        self.client.put(f'/api/v1/tickets/{self.ticket_id}', json={'status': 'in_progress'})
+        data = self.client.get(f'/api/v1/tickets/{self.ticket_id}').get_json()
+        self.assertEqual(data['status'], 'in_progress')
+    
+    def test_entries_expire(self):
+        """Test entries older than TICKET_CACHE_TTL are refetched"""
+        self.app.config['TICKET_CACHE_TTL'] = 0.01
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        time.sleep(0.02)
+        misses = self.sample('helpdesk_ticket_cache_misses_total', 'local')
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        self.assertEqual(self.sample('helpdesk_ticket_cache_misses_total', 'local'), misses + 1)
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted beyond TICKET_CACHE_SIZE"""
+        self.app.config['TICKET_CACHE_SIZE'] = 1
+        evictions = self.sample('helpdesk_ticket_cache_evictions_total')
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        self.client.get('/api/v1/tickets/1')
+        self.assertEqual(self.sample('helpdesk_ticket_cache_evictions_total'), evictions + 1)
+        self.assertEqual(len(app_module.local_ticket_cache.entries), 1)
+    
+    def test_missing_ticket_not_cached(self):
+        """Test 404s are not cached"""
+        self.assertEqual(self.client.get('/api/v1/tickets/999999').status_code, 404)
+        self.assertIsNone(app_module.cached_ticket(999999))
+    
+    def test_shared_store(self):
+        """Test the shared tier serves and invalidates tickets across processes' local tiers"""
+        self.app.config['TICKET_CACHE_URL'] = 'memory://'
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        # Another worker has an empty local tier
+        app_module.local_ticket_cache.clear()
+        hits = self.sample('helpdesk_ticket_cache_hits_total', 'shared')
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        self.assertEqual(self.sample('helpdesk_ticket_cache_hits_total', 'shared'), hits + 1)
+        
+        self.client.put(f'/api/v1/tickets/{self.ticket_id}', json={'priority': 'critical'})
+        store = app_module.shared_ticket_store()
+        self.assertIsNone(store.get(f'helpdesk:ticket:{self.ticket_id}'))
+        data = self.client.get(f'/api/v1/tickets/{self.ticket_id}').get_json()
+        self.assertEqual(data['priority'], 'critical')
+    
+    def test_stale_entry_keeps_its_own_etag(self):
+        """Test a cached body older than a write elsewhere is never tagged with the current version"""
+        self.app.config['TICKET_CACHE_URL'] = 'memory://'
+        url = f'/api/v1/tickets/{self.ticket_id}'
+        cached_etag = self.client.get(url).headers['ETag']
+        # Another worker closes the ticket; this worker's cache still holds it open
+        conn = app_module.connect_db()
+        conn.execute("UPDATE tickets SET status = 'closed' WHERE id = ?", (self.ticket_id,))
+        conn.commit()
+        conn.close()
+        stale = self.client.get(url)
+        self.assertEqual(stale.get_json()['status'], 'open')
+        self.assertEqual(stale.headers['ETag'], cached_etag)
+        
+        app_module.local_ticket_cache.clear()
+        stale = self.client.get(url)
+        self.assertEqual(stale.headers['ETag'], cached_etag)
+        
+        # Once the entry expires from both tiers, revalidating with the stale tag refetches
+        app_module.local_ticket_cache.clear()
+        app_module.shared_ticket_store().delete(f'helpdesk:ticket:{self.ticket_id}')
+        response = self.client.get(url, headers={'If-None-Match': cached_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'closed')
+        self.assertNotEqual(response.headers['ETag'], cached_etag)
+    
+    def test_counters_on_metrics(self):
+        """Test cache counters are exposed on /metrics"""
+        self.client.get(f'/api/v1/tickets/{self.ticket_id}')
+        body = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('helpdesk_ticket_cache_hits_total', body)
+        self.assertIn('helpdesk_ticket_cache_misses_total', body)
+        self.assertIn('helpdesk_ticket_cache_evictions_total', body)
+
+class FrontendTestCase(unittest.TestCase):
+    """Test cases for the precompressed frontend"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+    
+    def test_identity_without_accept_encoding(self):
+        """Test clients that don't accept compression get plain HTML"""
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.content_encoding)
+        self.assertIn(b'Campus IT Helpdesk', response.data)
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertIn('max-age', response.headers['Cache-Control'])
+    
+    def test_gzip_negotiated(self):
+        """Test gzip is served when accepted and decodes to the same page"""
+        plain = self.client.get('/')
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertNotEqual(response.get_etag(), plain.get_etag())
+    
+    @unittest.skipIf(app_module.brotli is None, 'brotli not installed')
+    def test_brotli_preferred(self):
+        """Test brotli wins over gzip when both are accepted"""
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.content_encoding, 'br')
+    
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets an empty 304"""
+        etag = self.client.get('/', headers={'Accept-Encoding': 'gzip'}).get_etag()[0]
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+    
+    def test_rendered_once(self):
+        """Test requests don't render the template"""
+        self.client.get('/')
+        original = app_module.render_template_string
+        app_module.render_template_string = None
+        try:
+            self.assertEqual(self.client.get('/').status_code, 200)
+        finally:
+            app_module.render_template_string = original
+
+class CompressionTestCase(unittest.TestCase):
+    """Test cases for the JSON provider and API response compression"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        self.client.post('/api/v1/tickets/bulk', json=[{
+            'title': f'Large {i}', 'description': 'Printer jams on every page ' * 20,
+            'category': 'hardware', 'priority': 'low',
+            'submitter_email': 'z@uni.edu', 'submitter_name': 'Zip'
+        } for i in range(20)])
+    
+    def tearDown(self):
+        self.app.config['JSON_PROVIDER'] = 'auto'
+        app_module.configure_json()
+    
+    @unittest.skipIf(app_module.orjson is None, 'orjson not installed')
+    def test_fast_provider_matches_stdlib(self):
+        """Test both providers produce the same documents"""
+        self.assertIsInstance(self.app.json, app_module.OrjsonProvider)
+        fast = self.client.get('/api/v1/tickets?limit=5').get_json()
+        self.app.config['JSON_PROVIDER'] = 'stdlib'
+        app_module.configure_json()
+        self.assertNotIsInstance(self.app.json, app_module.OrjsonProvider)
+        self.assertEqual(self.client.get('/api/v1/tickets?limit=5').get_json(), fast)
+    
+    def test_gzip_ticket_list(self):
+        """Test large ticket lists are gzip-encoded with an encoding-specific ETag"""
+        plain = self.client.get('/api/v1/tickets?limit=20')
+        response = self.client.get('/api/v1/tickets?limit=20', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(response.data)), plain.get_json())
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(response.get_etag()[0], f'{plain.get_etag()[0]}-gzip')
+        
+        revalidated = self.client.get('/api/v1/tickets?limit=20', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+    
+    def test_deflate(self):
+        """Test deflate is used when gzip isn't accepted"""
+        response = self.client.get('/api/v1/tickets?limit=20', headers={'Accept-Encoding': 'deflate'})
+        self.assertEqual(response.content_encoding, 'deflate')
+        self.assertIn(b'"tickets"', zlib.decompress(response.data))
+    
+    def test_small_body_not_compressed(self):
+        """Test bodies under COMPRESS_MIN_SIZE are sent as-is"""
+        response = self.client.get('/api/v1/tickets?limit=1&fields=id', headers={'Accept-Encoding': 'gzip'})
+        self.assertIsNone(response.content_encoding)
+    
+    def test_metrics_compressed(self):
+        """Test the Prometheus endpoint honours Accept-Encoding"""
+        response = self.client.get('/metrics', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertIn(b'helpdesk_up', gzip.decompress(response.data))
+    
+    def test_other_endpoints_untouched(self):
+        """Test endpoints outside COMPRESSED_ENDPOINTS are never encoded"""
+        response = self.client.get('/api/v1/dashboard', headers={'Accept-Encoding': 'gzip'})
+        self.assertIsNone(response.content_encoding)
+
+class EventsTestCase(unittest.TestCase):
+    """Test cases for the Server-Sent Events stream"""
+    
+    TICKET = {
+        'title': 'Live', 'description': 'Pushed to dashboards', 'category': 'software',
+        'priority': 'medium', 'submitter_email': 'e@uni.edu', 'submitter_name': 'Events'
+    }
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.app.config['EVENTS_POLL_INTERVAL'] = 0.01
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def tearDown(self):
+        self.app.config['EVENTS_POLL_INTERVAL'] = 0.5
+        self.app.config['EVENTS_STREAM_SECONDS'] = 30
+        self.app.config['EVENTS_QUEUE_SIZE'] = 256
+        self.app.config['EVENTS_MAX_STREAMS'] = 2
+    
+    def next_events(self, subscription, count):
+        return [subscription.get(timeout=2) for _ in range(count)]
+    
+    def test_writes_recorded_in_change_log(self):
+        """Test triggers log creates and updates"""
+        ticket_id = self.client.post('/api/v1/tickets', json=self.TICKET).get_json()['ticket_id']
+        self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'in_progress'})
+        with self.app.app_context():
+            rows = app_module.get_db().execute(
+                'SELECT event FROM ticket_events WHERE ticket_id = ? ORDER BY id', (ticket_id,)).fetchall()
+        self.assertEqual([r[0] for r in rows], ['ticket-created', 'ticket-updated'])
+    
+    def test_broadcast_to_subscribers(self):
+        """Test one poller delivers events and counter changes to every subscriber"""
+        first = app_module.event_broadcaster.subscribe()
+        second = app_module.event_broadcaster.subscribe()
+        try:
+            ticket_id = self.client.post('/api/v1/tickets', json=self.TICKET).get_json()['ticket_id']
+            for subscription in (first, second):
+                created, counters = self.next_events(subscription, 2)
+                self.assertEqual(created[0], 'ticket-created')
+                self.assertEqual(created[2], {'ticket_id': ticket_id})
+                self.assertEqual(counters[0], 'counters')
+                self.assertIn('status', counters[2])
+        finally:
+            app_module.event_broadcaster.unsubscribe(first)
+            app_module.event_broadcaster.unsubscribe(second)
+    
+    def test_stream_replays_after_last_event_id(self):
+        """Test a reconnecting client gets what it missed, then the stream ends"""
+        self.app.config['EVENTS_STREAM_SECONDS'] = 0.05
+        ticket_id = self.client.post('/api/v1/tickets', json=self.TICKET).get_json()['ticket_id']
+        with self.app.app_context():
+            event_id = app_module.get_db().execute(
+                "SELECT id FROM ticket_events WHERE ticket_id = ? AND event = 'ticket-created'",
+                (ticket_id,)).fetchone()[0]
+        response = self.client.get('/api/v1/events', headers={'Last-Event-ID': str(event_id - 1)})
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        body = response.get_data(as_text=True)
+        self.assertTrue(body.startswith('retry: 2000\n\n'))
+        self.assertIn('event: counters\n', body)
+        self.assertIn(f'event: ticket-created\nid: {event_id}\ndata: {{"ticket_id":{ticket_id}}}\n\n', body)
+    
+    def test_slow_subscriber_dropped(self):
+        """Test a subscriber that stops reading is disconnected instead of buffering forever"""
+        self.app.config['EVENTS_QUEUE_SIZE'] = 2
+        subscription = app_module.event_broadcaster.subscribe()
+        for i in range(3):
+            app_module.event_broadcaster.publish(('ticket-created', i, {'ticket_id': i}))
+        self.assertNotIn(subscription, app_module.event_broadcaster.subscribers)
+        self.assertEqual(subscription.get_nowait()[1], 1)
+        self.assertIsNone(subscription.get_nowait())
+    
+    def test_streams_capped_per_worker(self):
+        """Test streams past EVENTS_MAX_STREAMS get 503 so they don't take every thread"""
+        self.app.config['EVENTS_MAX_STREAMS'] = 1
+        subscription = app_module.event_broadcaster.subscribe()
+        try:
+            response = self.client.get('/api/v1/events')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '30')
+        finally:
+            app_module.event_broadcaster.unsubscribe(subscription)
+        self.app.config['EVENTS_STREAM_SECONDS'] = 0.01
+        self.assertEqual(self.client.get('/api/v1/events').status_code, 200)
+
+class SnapshotTestCase(unittest.TestCase):
+    """Test cases for online database snapshots"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.app.config['BACKUP_DIR'] = tempfile.mkdtemp()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        self.client.post('/api/v1/tickets', json={
+            'title': 'Backup me', 'description': 'Snapshot test', 'category': 'other',
+            'priority': 'low', 'submitter_email': 's@uni.edu', 'submitter_name': 'Snap'
+        })
+    
+    def tearDown(self):
+        self.app.config['ADMIN_TOKEN'] = ''
+        self.app.config['BACKUP_KEEP'] = 24
+        self.app.config['BACKUP_KEEP_DAILY'] = 7
+        self.app.config['BACKUP_PAGES_PER_STEP'] = 1024
+    
+    def ticket_count(self, path):
+        conn = app_module.sqlite3.connect(path)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+        finally:
+            conn.close()
+    
+    def test_compressed_snapshot_is_complete(self):
+        """Test a gzip snapshot restores to a database with every ticket"""
+        snapshot = app_module.create_snapshot()
+        self.assertTrue(snapshot['name'].endswith('.db.gz'))
+        restored = os.path.join(self.app.config['BACKUP_DIR'], 'restored.db')
+        with gzip.open(snapshot['path']) as packed, open(restored, 'wb') as raw:
+            raw.write(packed.read())
+        with self.app.app_context():
+            expected = app_module.get_db().execute('SELECT COUNT(*) FROM tickets').fetchone()[0]
+        self.assertEqual(self.ticket_count(restored), expected)
+        self.assertFalse(os.path.exists(restored + '-wal'))
+    
+    def test_unchanged_database_skipped(self):
+        """Test a second snapshot with no writes in between is skipped unless forced"""
+        first = app_module.create_snapshot(compress=False)
+        second = app_module.create_snapshot(compress=False)
+        self.assertTrue(second['skipped'])
+        self.assertEqual(second['name'], first['name'])
+        self.assertFalse(app_module.create_snapshot(compress=False, force=True)['skipped'])
+    
+    def test_snapshot_during_writes(self):
+        """Test a paced snapshot completes while another connection keeps writing"""
+        self.app.config['BACKUP_PAGES_PER_STEP'] = 1
+        stop = threading.Event()
+        
+        def write():
+            conn = app_module.connect_db()
+            while not stop.is_set():
+                conn.execute(app_module.INSERT_TICKET_SQL, ('w', 'd', 'other', 'low', 'w@uni.edu', 'W'))
+                conn.commit()
+            conn.close()
+        
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            snapshot = app_module.create_snapshot(compress=False, force=True)
+        finally:
+            stop.set()
+            writer.join()
+        self.assertGreater(self.ticket_count(snapshot['path']), 0)
+    
+    def test_rotation(self):
+        """Test only BACKUP_KEEP recent snapshots plus daily ones survive"""
+        directory = self.app.config['BACKUP_DIR']
+        for name in ('tickets-20240101-000000-v1.db', 'tickets-20240101-120000-v2.db',
+                     'tickets-20240102-000000-v3.db', 'tickets-20240103-000000-v4.db'):
+            open(os.path.join(directory, name), 'w').close()
+        self.app.config['BACKUP_KEEP'] = 1
+        self.app.config['BACKUP_KEEP_DAILY'] = 2
+        removed = app_module.rotate_snapshots()
+        self.assertEqual(sorted(removed), ['tickets-20240101-000000-v1.db', 'tickets-20240101-120000-v2.db'])
+    
+    def test_admin_endpoint_requires_token(self):
+        """Test snapshots can only be triggered with the admin token"""
+        self.assertEqual(self.client.post('/api/v1/admin/snapshots').status_code, 403)
+        self.app.config['ADMIN_TOKEN'] = 'secret'
+        self.assertEqual(self.client.post('/api/v1/admin/snapshots').status_code, 401)
+        headers = {'Authorization': 'Bearer secret'}
+        response = self.client.post('/api/v1/admin/snapshots', headers=headers, json={'force': True})
+        self.assertEqual(response.status_code, 201)
+        listed = self.client.get('/api/v1/admin/snapshots', headers=headers).get_json()['snapshots']
+        self.assertEqual(listed[0]['name'], response.get_json()['name'])
+    
+    def test_cli_command(self):
+        """Test the snapshot CLI command writes to the given directory"""
+        directory = tempfile.mkdtemp()
+        result = self.app.test_cli_runner().invoke(args=['snapshot', '--dir', directory, '--no-compress'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(json.loads(result.output)['name'].endswith('.db'))
+
+class AnalyticsTestCase(unittest.TestCase):
+    """Test cases for rollup-backed analytics"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def create(self, category='network', priority='high'):
+        return self.client.post('/api/v1/tickets', json={
+            'title': 'Rollup', 'description': 'Analytics test', 'category': category,
+            'priority': priority, 'submitter_email': 'r@uni.edu', 'submitter_name': 'Roll'
+        }).get_json()['ticket_id']
+    
+    def test_triggers_fold_creations_and_resolutions(self):
+        """Test creates and transitions into a resolved status update the hourly bucket"""
+        before = self.client.get('/api/v1/analytics?granularity=hour').get_json()['by_category']
+        before = before.get('lab_computers', {'created': 0, 'resolved': 0})
+        ticket_id = self.create('lab_computers')
+        self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'closed'})
+        # Already resolved: a second transition within resolved statuses isn't counted again
+        self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'resolved'})
+        
+        data = self.client.get('/api/v1/analytics?granularity=hour').get_json()
+        stats = data['by_category']['lab_computers']
+        self.assertEqual(stats['created'], before['created'] + 1)
+        self.assertEqual(stats['resolved'], before['resolved'] + 1)
+        self.assertIsNotNone(stats['mean_resolution_hours'])
+        self.assertTrue(data['buckets'][-1]['period'].endswith(':00:00'))
+    
+    def test_sla_breach_counted(self):
+        """Test a resolution slower than the priority's target counts as a breach"""
+        ticket_id = self.create('hardware', 'critical')
+        with self.app.app_context():
+            conn = app_module.get_db()
+            conn.execute("UPDATE tickets SET created_at = datetime('now', '-5 hours') WHERE id = ?", (ticket_id,))
+            conn.commit()
+        before = self.client.get('/api/v1/analytics').get_json()['totals']['sla_breaches']
+        self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'closed'})
+        after = self.client.get('/api/v1/analytics').get_json()['totals']
+        self.assertEqual(after['sla_breaches'], before + 1)
+        self.assertGreater(after['sla_breach_rate'], 0)
+    
+    def test_backfill_matches_incremental(self):
+        """Test rebuilding from tickets reproduces the creation counts"""
+        self.create('software')
+        with self.app.app_context():
+            conn = app_module.get_db()
+            created = conn.execute('SELECT SUM(created) FROM ticket_rollups').fetchone()[0]
+            app_module.backfill_rollups(conn)
+            self.assertEqual(conn.execute('SELECT SUM(created) FROM ticket_rollups').fetchone()[0], created)
+            total = conn.execute('SELECT (SELECT COUNT(*) FROM tickets) + '
+                                 '(SELECT COUNT(*) FROM archived_tickets)').fetchone()[0]
+            self.assertEqual(created, total)
+    
+    def test_daily_granularity_and_filters(self):
+        """Test daily buckets, category filter and range validation"""
+        self.create('other')
+        data = self.client.get('/api/v1/analytics?category=other').get_json()
+        self.assertEqual(list(data['by_category']), ['other'])
+        self.assertEqual(len(data['buckets'][-1]['period']), 10)
+        
+        self.assertEqual(self.client.get('/api/v1/analytics?granularity=week').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/analytics?from=yesterday').status_code, 400)
+        response = self.client.get('/api/v1/analytics?granularity=hour&from=2020-01-01&to=2024-01-01')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_empty_range(self):
+        """Test a range without tickets returns zero totals"""
+        data = self.client.get('/api/v1/analytics?from=2000-01-01&to=2000-02-01').get_json()
+        self.assertEqual(data['buckets'], [])
+        self.assertEqual(data['totals']['created'], 0)
+        self.assertIsNone(data['totals']['mean_resolution_hours'])
+    
+    def test_offsets_normalized_to_utc(self):
+        """Test from/to with a UTC offset are converted instead of failing against naive times"""
+        from urllib.parse import quote
+        data = self.client.get('/api/v1/analytics?from=' + quote('2026-10-01T02:00:00+02:00')).get_json()
+        self.assertEqual(data['from'], '2026-10-01T00:00:00')
+        response = self.client.get('/api/v1/analytics?from=2026-10-01T00:00:00Z&to='
+                                   + quote('2026-10-01T06:30:00+05:30'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['to'], '2026-10-01T01:00:00')
+        self.assertEqual(response.get_json()['from'], '2026-10-01T00:00:00')
+
+    def test_sliding_window_changes_etag(self):
+        """Test the default window is hour-aligned and a moved window is not answered with 304"""
+        response = self.client.get('/api/v1/analytics')
+        data, etag = response.get_json(), response.headers['ETag']
+        self.assertTrue(data['to'].endswith(':00:00'))
+        self.assertEqual(self.client.get('/api/v1/analytics', headers={'If-None-Match': etag}).status_code, 304)
+        
+        real_datetime = app_module.datetime
+        
+        class Later(real_datetime):
+            @classmethod
+            def utcnow(cls):
+                return real_datetime.utcnow() + timedelta(hours=2)
+        
+        app_module.datetime = Later
+        self.addCleanup(setattr, app_module, 'datetime', real_datetime)
+        response = self.client.get('/api/v1/analytics', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get_json()['from'], data['from'])
+        # An explicit range doesn't move with the clock
+        url = '/api/v1/analytics?from=2026-01-01&to=2026-02-01'
+        etag = self.client.get(url).headers['ETag']
+        app_module.datetime = real_datetime
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+class ArchiveTestCase(unittest.TestCase):
+    """Test cases for archiving closed tickets"""
+    
+    @classmethod
+    def setUpClass(cls):
+        app.config['ARCHIVE_DIR'] = tempfile.mkdtemp()
+    
+    @classmethod
+    def tearDownClass(cls):
+        app.config['ARCHIVE_DIR'] = ''
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+    
+    def create(self, status=None, age_days=200):
+        ticket_id = self.client.post('/api/v1/tickets', json={
+            'title': 'Old printer jam', 'description': 'Archive test', 'category': 'hardware',
+            'priority': 'low', 'submitter_email': 'a@uni.edu', 'submitter_name': 'Arch'
+        }).get_json()['ticket_id']
+        if status:
+            self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': status})
+        with self.app.app_context():
+            conn = app_module.get_db()
+            conn.execute("UPDATE tickets SET updated_at = datetime('now', ?) WHERE id = ?",
+                         (f'-{age_days} days', ticket_id))
+            conn.commit()
+        return ticket_id
+    
+    def is_live(self, ticket_id):
+        with self.app.app_context():
+            return app_module.get_db().execute('SELECT 1 FROM tickets WHERE id = ?',
+                                               (ticket_id,)).fetchone() is not None
+    
+    def test_archives_only_old_closed_tickets(self):
+        """Test old resolved/closed tickets move to a monthly file and stay readable"""
+        closed = self.create('closed')
+        resolved = self.create('resolved')
+        still_open = self.create()
+        recent = self.create('closed', age_days=1)
+        
+        summary = app_module.archive_closed_tickets(days=90)
+        self.assertGreaterEqual(summary['archived'], 2)
+        self.assertFalse(self.is_live(closed))
+        self.assertFalse(self.is_live(resolved))
+        self.assertTrue(self.is_live(still_open))
+        self.assertTrue(self.is_live(recent))
+        for period in summary['periods']:
+            self.assertTrue(os.path.exists(os.path.join(app.config['ARCHIVE_DIR'], f'archive-{period}.db')))
+        
+        response = self.client.get(f'/api/v1/tickets/{closed}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'closed')
+        self.assertEqual(response.get_json()['title'], 'Old printer jam')
+        self.assertEqual(self.client.get('/api/v1/tickets/999999').status_code, 404)
+    
+    def test_counters_keep_archived_tickets(self):
+        """Test archiving leaves counters unchanged and a rebuild agrees"""
+        self.create('closed')
+        with self.app.app_context():
+            conn = app_module.get_db()
+            before = app_module.read_counters(conn)
+            app_module.archive_closed_tickets(days=90)
+            self.assertEqual(app_module.read_counters(conn), before)
+            app_module.rebuild_counters(conn)
+            self.assertEqual(app_module.read_counters(conn), before)
+    
+    def test_update_archived_ticket_conflicts(self):
+        """Test archived tickets are read-only"""
+        ticket_id = self.create('closed')
+        app_module.archive_closed_tickets(days=90)
+        response = self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'open'})
+        self.assertEqual(response.status_code, 409)
+    
+    def test_export_merges_archives(self):
+        """Test exports include archived tickets in id order, pruned by since"""
+        archived = self.create('closed')
+        app_module.archive_closed_tickets(days=90)
+        live = self.create()
+        
+        response = self.client.get('/api/v1/tickets/export?fields=status')
+        ids = [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertIn(archived, ids)
+        self.assertIn(live, ids)
+        
+        since = time.strftime('%Y-%m-%d', time.gmtime(time.time() - 86400 * 30))
+        response = self.client.get(f'/api/v1/tickets/export?since={since}')
+        ids = [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+        self.assertNotIn(archived, ids)
+
+class ReplicationTestCase(unittest.TestCase):
+    """Test cases for change-log replication to read replicas"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        self.log_dir = tempfile.mkdtemp()
+        self.replica_db = os.path.join(tempfile.mkdtemp(), 'replica.db')
+        self.writer_db = app_module.DATABASE
+        self.shipper = app_module.ChangeShipper(self.log_dir)
+        self.writer_conn = app_module.connect_db()
+        self.shipper.start(self.writer_conn)
+    
+    def tearDown(self):
+        self.writer_conn.close()
+        app_module.DATABASE = self.writer_db
+        self.app.config['REPLICATION_ROLE'] = 'off'
+        self.app.config['REPLICATION_LOG_DIR'] = '/data/replication'
+        self.app.config['REPLICATION_WRITER_URL'] = ''
+        self.app.config['REPLICATION_SEGMENT_ENTRIES'] = 10000
+    
+    def create(self, title='Replicated'):
+        return self.client.post('/api/v1/tickets', json={
+            'title': title, 'description': 'Replication test', 'category': 'network',
+            'priority': 'medium', 'submitter_email': 'r@uni.edu', 'submitter_name': 'Rep'
+        }).get_json()['ticket_id']
+    
+    def ship(self):
+        while self.shipper.ship_once(self.writer_conn):
+            pass
+    
+    def replica(self):
+        applier = app_module.ReplicaApplier(self.log_dir, self.replica_db)
+        applier.bootstrap()
+        return applier, app_module.connect_db(self.replica_db)
+    
+    def test_replica_follows_writer(self):
+        """Test a bootstrapped replica applies creates and updates, derived tables included"""
+        before = self.create('Before the base')
+        applier, conn = self.replica()
+        created = self.create('After the base')
+        self.client.put(f'/api/v1/tickets/{before}', json={'status': 'closed'})
+        self.ship()
+        self.assertGreater(applier.apply_once(conn), 0)
+        
+        rows = {row['id']: row for row in conn.execute('SELECT * FROM tickets WHERE id IN (?, ?)',
+                                                       (before, created))}
+        self.assertEqual(rows[before]['status'], 'closed')
+        self.assertEqual(rows[created]['title'], 'After the base')
+        self.assertEqual(app_module.read_counters(conn), app_module.read_counters(self.writer_conn))
+        match = conn.execute("SELECT rowid FROM tickets_fts WHERE tickets_fts MATCH 'after'").fetchall()
+        self.assertIn(created, [row[0] for row in match])
+        self.assertEqual(app_module.replica_position(conn)['seq'], self.shipper.seq)
+        self.assertEqual(applier.apply_once(conn), 0)
+        conn.close()
+    
+    def test_segments_rotate_and_gaps_are_detected(self):
+        """Test rotation keeps two bases, replicas cross segments, and a pruned-past replica stops"""
+        self.app.config['REPLICATION_SEGMENT_ENTRIES'] = 2
+        applier, conn = self.replica()
+        for i in range(3):
+            self.create(f'Rotation {i}')
+            self.create(f'Rotation {i}b')
+            self.ship()
+            while applier.apply_once(conn):
+                pass
+        self.assertEqual(app_module.replica_position(conn)['seq'], self.shipper.seq)
+        self.assertLessEqual(len(app_module.replication_files(app_module.REPLICATION_BASE_PATTERN,
+                                                              self.log_dir)), 2)
+        
+        stale = app_module.ReplicaApplier(self.log_dir, self.replica_db)
+        stale.seq = 0
+        with self.assertRaises(app_module.ReplicationGap):
+            stale.apply_once(conn)
+        conn.close()
+    
+    def test_archiving_and_deletes_replicate(self):
+        """Test archived and deleted tickets leave a replica, which serves archived ids from the shared files"""
+        self.app.config['REPLICATION_ROLE'] = 'writer'
+        self.app.config['REPLICATION_LOG_DIR'] = self.log_dir
+        seen, deleted = self.create('Seen then archived'), self.create('Deleted')
+        applier, conn = self.replica()
+        unseen = self.create('Archived unseen')
+        for ticket_id in (seen, unseen):
+            self.client.put(f'/api/v1/tickets/{ticket_id}', json={'status': 'closed'})
+            self.writer_conn.execute("UPDATE tickets SET updated_at = datetime('now', '-200 days') WHERE id = ?",
+                                     (ticket_id,))
+            self.writer_conn.commit()
+        self.writer_conn.execute('DELETE FROM tickets WHERE id = ?', (deleted,))
+        self.writer_conn.commit()
+        app_module.archive_closed_tickets(30)
+        self.ship()
+        while applier.apply_once(conn):
+            pass
+        
+        ids = (seen, unseen, deleted)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM tickets WHERE id IN (?, ?, ?)', ids).fetchone()[0], 0)
+        self.assertEqual({row[0] for row in conn.execute('SELECT id FROM archived_tickets WHERE id IN (?, ?, ?)',
+                                                         ids)}, {seen, unseen})
+        self.assertEqual(app_module.read_counters(conn), app_module.read_counters(self.writer_conn))
+        self.assertIn(seen, [row[0] for row in conn.execute(
+            "SELECT ticket_id FROM ticket_events WHERE event = 'ticket-archived'")])
+        conn.close()
+        
+        app_module.DATABASE = self.replica_db
+        self.app.config['REPLICATION_ROLE'] = 'reader'
+        response = self.client.get(f'/api/v1/tickets/{unseen}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['title'], 'Archived unseen')
+        with self.assertRaises(RuntimeError):
+            app_module.archive_closed_tickets(30)
+    
+    def start_writer(self):
+        """Serve a stand-in writer that echoes what it was sent"""
+        writer = Flask('writer')
+        
+        @writer.route('/<path:path>', methods=['GET', 'POST'])
+        def echo(path):
+            response = jsonify({'method': request.method, 'path': request.full_path.rstrip('?'),
+                                'body': request.get_json(silent=True), 'client': request.headers['X-Forwarded-For']})
+            response.set_cookie('helpdesk_seq', '42', httponly=True, samesite='Lax')
+            return response, 201 if request.method == 'POST' else 200
+        
+        server = make_server('127.0.0.1', 0, writer, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        return f'http://127.0.0.1:{server.server_port}'
+    
+    def test_reader_forwards_writes_and_unseen_reads(self):
+        """Test a reader serves reads locally but forwards writes and too-new reads to the writer"""
+        ticket_id = self.create()
+        self.ship()
+        applier, conn = self.replica()
+        applier.apply_once(conn)
+        conn.close()
+        app_module.DATABASE = self.replica_db
+        self.app.config['REPLICATION_ROLE'] = 'reader'
+        self.app.config['REPLICATION_WRITER_URL'] = self.start_writer()
+        
+        response = self.client.post('/api/v1/tickets', json={'title': 'Forwarded'},
+                                    environ_base={'REMOTE_ADDR': '10.0.0.7'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json(), {'method': 'POST', 'path': '/api/v1/tickets',
+                                               'body': {'title': 'Forwarded'}, 'client': '10.0.0.7'})
+        # Set by the writer, but stored for this (the reader's) origin
+        cookie = response.headers['Set-Cookie']
+        self.assertIn('helpdesk_seq=42', cookie)
+        self.assertNotIn('Domain', cookie)
+        self.assertEqual(self.client.get(f'/api/v1/tickets/{ticket_id}',
+                                         headers={'X-Replication-Seq': '1'}).status_code, 200)
+        
+        response = self.client.get('/api/v1/tickets?limit=1', headers={'X-Replication-Seq': '999999999'})
+        self.assertEqual(response.get_json()['path'], '/api/v1/tickets?limit=1')
+        self.assertEqual(self.client.get('/health', headers={'X-Replication-Seq': '999999999'}).status_code, 200)
+        
+        self.app.config['REPLICATION_WRITER_URL'] = 'http://127.0.0.1:1'
+        self.assertEqual(self.client.post('/api/v1/tickets', json={}).status_code, 502)
+    
+    def test_writer_reports_position_and_lag(self):
+        """Test writes return their change seq and the status endpoint reports lag"""
+        self.app.config['REPLICATION_ROLE'] = 'writer'
+        self.app.config['REPLICATION_LOG_DIR'] = self.log_dir
+        response = self.client.post('/api/v1/tickets', json={
+            'title': 'Position', 'description': 'Replication test', 'category': 'other',
+            'priority': 'low', 'submitter_email': 'p@uni.edu', 'submitter_name': 'Pos'})
+        seq = int(response.headers['X-Replication-Seq'])
+        self.assertEqual(seq, app_module.committed_seq(self.writer_conn))
+        self.assertIn(f'helpdesk_seq={seq}', response.headers['Set-Cookie'])
+        self.assertIn('Path=/;', response.headers['Set-Cookie'])
+        
+        status = self.client.get('/api/v1/replication').get_json()
+        self.assertEqual(status['lag_entries'], seq - self.shipper.seq)
+        self.ship()
+        status = self.client.get('/api/v1/replication').get_json()
+        self.assertEqual((status['position'], status['lag_entries']), (seq, 0))
+        self.assertIn('helpdesk_replication_lag_entries{service="25RP19452-NIYONKURU",role="writer"} 0',
+                      self.client.get('/metrics').get_data(as_text=True))
+
+class AdmissionTestCase(unittest.TestCase):
+    """Test cases for rate limiting and load shedding"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        self.app.config['ADMISSION_CONTROL'] = True
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            init_db()
+        app_module.token_buckets.reset()
+    
+    def tearDown(self):
+        self.app.config['ADMISSION_CONTROL'] = False
+        self.app.config['ADMISSION_READ_BURST'] = 60
+        self.app.config['ADMISSION_WRITE_BURST'] = 10
+        self.app.config['ADMISSION_CLIENT_HEADER'] = ''
+    
+    def get(self, path, client='10.0.0.1', **kwargs):
+        return self.client.get(path, environ_base={'REMOTE_ADDR': client}, **kwargs)
+    
+    def test_rate_limit_per_client(self):
+        """Test a client over its burst gets 429 with Retry-After while others are admitted"""
+        self.app.config['ADMISSION_READ_BURST'] = 2
+        self.assertEqual(self.get('/api/v1/dashboard').status_code, 200)
+        self.assertEqual(self.get('/api/v1/dashboard').status_code, 200)
+        response = self.get('/api/v1/dashboard')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(self.get('/api/v1/dashboard', client='10.0.0.2').status_code, 200)
+    
+    def test_priority_and_write_lanes_not_starved(self):
+        """Test health, metrics and writes are admitted once a client's reads are exhausted"""
+        self.app.config['ADMISSION_READ_BURST'] = 1
+        self.get('/api/v1/tickets')
+        self.assertEqual(self.get('/api/v1/tickets').status_code, 429)
+        self.assertEqual(self.get('/health').status_code, 200)
+        self.assertEqual(self.get('/metrics').status_code, 200)
+        response = self.client.post('/api/v1/tickets', environ_base={'REMOTE_ADDR': '10.0.0.1'}, json={
+            'title': 'Wi-Fi down', 'description': 'Admission test', 'category': 'network',
+            'priority': 'high', 'submitter_email': 'w@uni.edu', 'submitter_name': 'Wifi'})
+        self.assertEqual(response.status_code, 201)
+    
+    def test_overload_sheds_reads_first(self):
+        """Test a worker at its read cap answers 503 to reads but still admits writes"""
+        limiter = app_module.inflight_limiter
+        limiter.reads = limiter.total = self.app.config['ADMISSION_MAX_INFLIGHT_READS']
+        try:
+            response = self.get('/api/v1/tickets')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertEqual(self.get('/api/v1/health').status_code, 200)
+            response = self.client.put('/api/v1/tickets/999999', json={'status': 'closed'})
+            self.assertEqual(response.status_code, 404)
+        finally:
+            limiter.reads = limiter.total = 0
+        self.assertEqual(self.get('/api/v1/tickets').status_code, 200)
+        self.assertEqual((limiter.reads, limiter.total), (0, 0))
+    
+    def test_open_streams_count_against_inflight_cap(self):
+        """Test open event streams take from ADMISSION_MAX_INFLIGHT, leaving no thread unaccounted"""
+        self.app.config['ADMISSION_MAX_INFLIGHT'] = 2
+        streams = [app_module.event_broadcaster.subscribe() for _ in range(2)]
+        try:
+            self.assertEqual(self.get('/api/v1/tickets').status_code, 503)
+            self.assertEqual(self.get('/health').status_code, 200)
+        finally:
+            for subscription in streams:
+                app_module.event_broadcaster.unsubscribe(subscription)
+            self.app.config['ADMISSION_MAX_INFLIGHT'] = 6
+        self.assertEqual(self.get('/api/v1/tickets').status_code, 200)
+    
+    def test_buckets_shared_across_processes(self):
+        """Test tokens taken in a forked worker count against the same bucket"""
+        def drain():
+            for _ in range(3):
+                app_module.token_buckets.take('read:10.0.0.9', 0.001, 3)
+        child = app_module.multiprocessing.get_context('fork').Process(target=drain)
+        child.start()
+        child.join(10)
+        self.assertGreater(app_module.token_buckets.take('read:10.0.0.9', 0.001, 3), 0)
+    
+    @unittest.skipIf(importlib.util.find_spec('uvicorn') is None, 'uvicorn not installed')
+    def test_buckets_shared_by_asgi_workers(self):
+        """Test uvicorn workers under gunicorn share one bucket per client, not one each"""
+        import socket
+        import subprocess
+        import urllib.error
+        import urllib.request
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        root = os.path.join(os.path.dirname(__file__), '..')
+        env = dict(os.environ, SERVER_MODE='asgi', GUNICORN_WORKERS='4', ADMISSION_CONTROL='true',
+                   ADMISSION_READ_RATE='0.001', ADMISSION_READ_BURST='5',
+                   DATABASE_PATH=os.path.join(tempfile.mkdtemp(), 'asgi.db'))
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'docker/gunicorn.conf.py',
+                                   '--bind', f'127.0.0.1:{port}'], cwd=root, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.addCleanup(server.wait, 10)
+        self.addCleanup(server.terminate)
+        
+        def status(path):
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=5) as response:
+                    return response.status
+            except urllib.error.HTTPError as e:
+                return e.code
+        
+        for _ in range(100):
+            try:
+                if status('/health') == 200:
+                    break
+            except OSError:
+                time.sleep(0.1)
+        # Fresh connections spread over the workers; per-worker buckets would admit 5 each
+        statuses = [status('/api/v1/dashboard') for _ in range(20)]
+        self.assertEqual(statuses.count(200), 5, statuses)
+    
+    def test_client_header(self):
+        """Test clients behind a proxy are told apart by the configured header"""
+        self.app.config['ADMISSION_READ_BURST'] = 1
+        self.app.config['ADMISSION_CLIENT_HEADER'] = 'X-Forwarded-For'
+        first = {'X-Forwarded-For': '192.0.2.1, 10.0.0.1'}
+        self.assertEqual(self.get('/api/v1/dashboard', headers=first).status_code, 200)
+        self.assertEqual(self.get('/api/v1/dashboard', headers=first).status_code, 429)
+        second = {'X-Forwarded-For': '192.0.2.2, 10.0.0.1'}
+        self.assertEqual(self.get('/api/v1/dashboard', headers=second).status_code, 200)
+
+class CoalescingTestCase(unittest.TestCase):
+    """Test cases for sharing identical concurrent reads"""
+    
+    def setUp(self):
+        self.app = app
+        self.app.config['TESTING'] = True
+        with self.app.app_context():
+            init_db()
+        self.read_counters = app_module.read_counters
+    
+    def tearDown(self):
+        app_module.read_counters = self.read_counters
+        self.app.config['READ_COALESCING'] = True
+    
+    def sample(self, endpoint, role):
+        labels = {'endpoint': endpoint, 'role': role}
+        return app_module.REGISTRY.get_sample_value('helpdesk_coalesced_reads_total', labels) or 0
+    
+    def slow_read_counters(self, delay):
+        """Patch read_counters to take `delay` seconds and return the list of calls"""
+        calls = []
+        def read_counters(conn):
+            # Only count requests: the live-updates broadcaster reads counters too
+            if app_module.has_request_context():
+                calls.append(1)
+            time.sleep(delay)
+            return self.read_counters(conn)
+        app_module.read_counters = read_counters
+        return calls
+    
+    def concurrent_get(self, path, count, headers=None):
+        barrier = threading.Barrier(count)
+        responses = [None] * count
+        def get(i):
+            client = self.app.test_client()
+            barrier.wait()
+            responses[i] = client.get(path, headers=headers)
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return responses
+    
+    def test_concurrent_reads_share_one_query(self):
+        """Test identical concurrent requests run the view once and get the same body"""
+        calls = self.slow_read_counters(0.5)
+        followers = self.sample('get_metrics', 'follower')
+        responses = self.concurrent_get('/api/v1/metrics', 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual(len({r.get_data() for r in responses}), 1)
+        self.assertEqual(len({r.headers['ETag'] for r in responses}), 1)
+        self.assertEqual(self.sample('get_metrics', 'follower') - followers, 3)
+    
+    def test_followers_share_the_encoded_body(self):
+        """Test a burst of gzip-accepting reads is compressed once, by the leader"""
+        encode_response = app_module.encode_response
+        encodings = []
+        def counting_encode(response, encoding):
+            encodings.append(encoding)
+            return encode_response(response, encoding)
+        app_module.encode_response = counting_encode
+        self.addCleanup(setattr, app_module, 'encode_response', encode_response)
+        self.app.config['COMPRESS_MIN_SIZE'] = 0
+        self.addCleanup(self.app.config.__setitem__, 'COMPRESS_MIN_SIZE', 1024)
+        self.slow_read_counters(0.5)
+        
+        responses = self.concurrent_get('/api/v1/metrics', 4, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(encodings, ['gzip'])
+        self.assertEqual({r.headers['Content-Encoding'] for r in responses}, {'gzip'})
+        self.assertEqual(len({r.get_data() for r in responses}), 1)
+        self.assertTrue(responses[0].headers['ETag'].endswith('-gzip"'))
+        self.assertIn('total_tickets', json.loads(gzip.decompress(responses[0].get_data())))
+    
+    def test_sequential_and_different_reads_not_shared(self):
+        """Test only requests in flight together with the same parameters are coalesced"""
+        leaders = self.sample('get_tickets', 'leader')
+        followers = self.sample('get_tickets', 'follower')
+        client = self.app.test_client()
+        self.assertEqual(client.get('/api/v1/tickets?limit=5').status_code, 200)
+        self.assertEqual(client.get('/api/v1/tickets?limit=5').status_code, 200)
+        self.assertEqual(client.get('/api/v1/tickets?limit=6').status_code, 200)
+        self.assertEqual(self.sample('get_tickets', 'leader') - leaders, 3)
+        self.assertEqual(self.sample('get_tickets', 'follower'), followers)
+    
+    def test_leader_error_reaches_followers(self):
+        """Test waiting callers see the leader's exception and the key is released"""
+        flights = app_module.SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        def fail():
+            started.set()
+            release.wait(5)
+            raise RuntimeError('database is locked')
+        errors = []
+        def follow():
+            try:
+                flights.do('key', lambda: 'unused')
+            except RuntimeError as e:
+                errors.append(str(e))
+        leader = threading.Thread(target=lambda: self.assertRaises(RuntimeError, flights.do, 'key', fail))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=follow)
+        follower.start()
+        time.sleep(0.1)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(errors, ['database is locked'])
+        self.assertEqual(flights.do('key', lambda: 'fresh'), ('fresh', False))
+    
+    def test_disabled(self):
+        """Test READ_COALESCING=false runs the view for every request"""
+        self.app.config['READ_COALESCING'] = False
+        calls = self.slow_read_counters(0.2)
+        responses = self.concurrent_get('/api/v1/dashboard', 3)
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual(len(calls), 3)
+
 if __name__ == '__main__':
     unittest.main()